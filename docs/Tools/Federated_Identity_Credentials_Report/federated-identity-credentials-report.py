@@ -7,37 +7,53 @@ asociadas a identidades administradas asignadas por el usuario en Azure.
 
 Características:
 - Autenticación mediante Managed Identity o Azure CLI
-- Exportación a múltiples formatos (JSON, CSV, Excel)
+- Exportación a múltiples formatos (JSON, JSON Lines, CSV, Excel) en streaming: los
+  registros se escriben según se obtienen, con memoria constante
 - Filtrado por suscripción, grupo de recursos o identidad específica
 - Logging detallado y manejo de errores
 - Retry logic con exponential backoff
+- Consulta concurrente de credenciales por identidad (pool acotado, backoff ante 429)
+- Varias suscripciones en paralelo, cada una con sus clientes y su control de throttling
+- Backend alternativo con Azure Resource Graph: identidades y credenciales de todas las
+  suscripciones en consultas paginadas, sin una petición por identidad
+- Checkpoint de suscripciones e identidades completadas y --resume para continuar una
+  ejecución interrumpida sin repetir lo ya consultado
 
 Requisitos:
 - azure-identity
 - azure-mgmt-msi
-- pandas
 - openpyxl (para exportar a Excel)
+- azure-mgmt-resourcegraph (solo para --backend resource-graph)
 
 Autor: Script generado para reporte de Federated Identity Credentials
 Fecha: 2025-06-26
 """
 
 import argparse
+import csv
+import itertools
 import json
 import logging
+import os
+import random
 import sys
+import textwrap
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Tuple
+from urllib.parse import urlparse
 import time
 
 try:
     from azure.identity import DefaultAzureCredential, AzureCliCredential, InteractiveBrowserCredential, DeviceCodeCredential
     from azure.mgmt.msi import ManagedServiceIdentityClient
-    from azure.mgmt.resource import ResourceManagementClient, SubscriptionClient
-    from azure.core.exceptions import AzureError, HttpResponseError
-    import pandas as pd
+    from azure.mgmt.resource import SubscriptionClient
+    from azure.core.credentials import AccessToken
+    from azure.core.exceptions import AzureError, HttpResponseError, ServiceRequestError, ServiceResponseError
 except ImportError as e:
-    print(f"Error: Faltan dependencias requeridas. Instala con: pip install azure-identity azure-mgmt-msi azure-mgmt-resource pandas openpyxl")
+    print(f"Error: Faltan dependencias requeridas. Instala con: pip install azure-identity azure-mgmt-msi azure-mgmt-resource openpyxl")
     sys.exit(1)
 
 # Configuración de logging
@@ -51,6 +67,477 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Peticiones simultáneas a ARM al listar credenciales federadas (una por identidad)
+DEFAULT_MAX_WORKERS = 8
+# Suscripciones procesadas a la vez con --all-subscriptions (cada una con max_workers propios)
+DEFAULT_SUBSCRIPTION_WORKERS = 4
+# Reintentos por petición ante 429 (throttling), 5xx o errores de conexión
+DEFAULT_MAX_RETRIES = 5
+# Códigos transitorios que se reintentan con exponential backoff
+RETRYABLE_STATUS_CODES = (500, 502, 503, 504)
+
+# arm: cliente MSI (identidades por suscripción + una petición por identidad)
+# resource-graph: consultas paginadas a Azure Resource Graph sobre todas las suscripciones
+BACKENDS = ('arm', 'resource-graph')
+# Filas por página de Resource Graph (máximo de $top) y suscripciones por consulta
+RESOURCE_GRAPH_PAGE_SIZE = 1000
+RESOURCE_GRAPH_SUBSCRIPTION_BATCH = 1000
+
+FEDERATED_CREDENTIAL_TYPE = 'Microsoft.ManagedIdentity/userAssignedIdentities/federatedIdentityCredentials'
+
+# Columnas del reporte (orden de _build_records) y de las tuplas de credenciales
+REPORT_FIELDS = (
+    'identity_name', 'identity_id', 'identity_resource_group', 'identity_location',
+    'identity_principal_id', 'identity_client_id', 'identity_tenant_id',
+    'credential_name', 'credential_id', 'credential_issuer', 'credential_subject',
+    'credential_audiences', 'credential_description', 'credential_type',
+    'subscription_id', 'subscription_name', 'tenant_id', 'report_timestamp'
+)
+CREDENTIAL_TUPLE_FIELDS = ('credential_issuer', 'credential_subject', 'credential_audiences', 'credential_type')
+
+FORMATS = ('json', 'jsonl', 'csv', 'excel')
+FORMAT_EXTENSIONS = {'json': 'json', 'jsonl': 'jsonl', 'csv': 'csv', 'excel': 'xlsx'}
+# Filas por hoja de Excel; al llegar al límite se continúa en otra hoja
+EXCEL_MAX_ROWS = 1048576
+
+# Journal de checkpoint (junto a federated_identity_report.log) y versión de su formato
+DEFAULT_CHECKPOINT_FILE = 'federated_identity_report.checkpoint.jsonl'
+CHECKPOINT_VERSION = 1
+
+
+class _StaticTokenCredential:
+    """Credencial con un token ficticio para endpoints ARM locales (mock), sin Azure AD"""
+
+    def get_token(self, *scopes, **kwargs):
+        return AccessToken('mock-token', int(time.time()) + 3600)
+
+
+def is_local_endpoint(endpoint: Optional[str]) -> bool:
+    """Indica si el endpoint ARM es un mock local (http://localhost o 127.0.0.1)"""
+    if not endpoint:
+        return False
+    parsed = urlparse(endpoint)
+    return parsed.scheme == 'http' and parsed.hostname in ('localhost', '127.0.0.1', '::1')
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """
+    Segundos de espera que indica un 429: Retry-After (ARM) o
+    x-ms-user-quota-resets-after en formato hh:mm:ss (Resource Graph)
+    """
+    if headers is None:
+        return None
+    try:
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            return max(float(retry_after), 0.1)
+        resets_after = headers.get('x-ms-user-quota-resets-after')
+        if resets_after:
+            hours, minutes, seconds = resets_after.split(':')
+            return max(int(hours) * 3600 + int(minutes) * 60 + float(seconds), 0.1)
+    except ValueError:
+        pass
+    return None
+
+
+def resource_id_key(resource: Dict) -> str:
+    """
+    Orden de identidades y credenciales en el reporte: por id de recurso sin distinguir
+    mayúsculas, igual en los dos backends (ARM no garantiza el orden de sus listados)
+    """
+    return (resource.get('id') or '').lower()
+
+
+def kql_string(value: str) -> str:
+    """Literal de cadena KQL con comillas simples escapadas"""
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+class ArmThrottle:
+    """
+    Control de throttling de ARM para las peticiones de una suscripción.
+    
+    ARM limita por suscripción y principal, así que cada suscripción tiene el suyo y un
+    429 en una no frena a las demás:
+    - Un 429 pausa a todos los workers durante el Retry-After indicado por ARM
+    - El primer 429 de cada episodio reduce a la mitad las peticiones simultáneas, que
+      vuelven a subir de una en una por cada segundo sin 429 (AIMD, como en TCP)
+    """
+    
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        # Pausa compartida tras un 429 (time.monotonic() hasta el que esperar)
+        self._throttled_until = 0.0
+        # Peticiones simultáneas permitidas ahora mismo (<= max_workers)
+        self._slots = threading.Condition(self._lock)
+        self._concurrency = max_workers
+        self._in_flight = 0
+        self._last_adjust = time.monotonic()
+        self.stats = {'requests': 0, 'throttled': 0, 'retries': 0, 'min_concurrency': max_workers}
+    
+    def wait(self):
+        """Espera mientras dure la pausa por throttling marcada por cualquier worker"""
+        while True:
+            with self._lock:
+                remaining = self._throttled_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+    
+    def acquire(self):
+        with self._slots:
+            while self._in_flight >= self._concurrency:
+                self._slots.wait()
+            self._in_flight += 1
+            self.stats['requests'] += 1
+    
+    def release(self, succeeded: bool):
+        """Libera la petición; cada segundo sin 429 se permite una petición simultánea más"""
+        with self._slots:
+            self._in_flight -= 1
+            if succeeded and self._concurrency < self.max_workers:
+                now = time.monotonic()
+                if now - self._last_adjust >= 1.0:
+                    self._concurrency += 1
+                    self._last_adjust = now
+            self._slots.notify_all()
+    
+    def throttled(self, delay: float):
+        """Registra un 429: pausa de `delay` segundos para todos los workers"""
+        with self._slots:
+            self.stats['throttled'] += 1
+            self.stats['retries'] += 1
+            now = time.monotonic()
+            # Solo el primer 429 de cada episodio reduce la concurrencia: los que llegan
+            # durante la pausa son de peticiones que ya estaban en vuelo
+            if now >= self._throttled_until:
+                self._concurrency = max(1, self._concurrency // 2)
+                self._last_adjust = now + delay
+                self.stats['min_concurrency'] = min(self.stats['min_concurrency'], self._concurrency)
+            self._throttled_until = max(self._throttled_until, now + delay)
+    
+    def retried(self):
+        with self._lock:
+            self.stats['retries'] += 1
+
+
+class SubscriptionContext:
+    """Clientes y throttling de una suscripción: cada worker de suscripción usa el suyo"""
+    
+    def __init__(self, subscription: Dict, msi_client, throttle: ArmThrottle):
+        self.subscription = subscription
+        self.msi_client = msi_client
+        self.throttle = throttle
+    
+    @property
+    def name(self) -> str:
+        return self.subscription['display_name']
+
+
+class ReportWriter:
+    """
+    Escritura incremental de registros a disco.
+    
+    El fichero se crea con el primer registro (sin registros no se crea, salvo con
+    create_empty) y cada registro se escribe al recibirlo, así que la memoria no depende
+    del tamaño del reporte.
+    """
+    
+    def __init__(self, filename: str, fields: Tuple[str, ...], sheet_name: str = 'Report',
+                 create_empty: bool = False):
+        self.filename = filename
+        self.fields = fields
+        self.sheet_name = sheet_name
+        self.create_empty = create_empty
+        self.count = 0
+        self._file = None
+    
+    def write(self, record: Dict):
+        if self._file is None:
+            self._open()
+        self._write(record)
+        self.count += 1
+        self._flush()
+    
+    def close(self):
+        if self._file is None and self.create_empty:
+            self._open()
+        if self._file is not None:
+            self._close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _open(self):
+        self._file = open(self.filename, 'w', encoding='utf-8', newline='')
+    
+    def _write(self, record: Dict):
+        raise NotImplementedError
+    
+    def _flush(self):
+        # Registro a registro: tras un fallo, el fichero tiene todos los registros completos
+        self._file.flush()
+    
+    def _close(self):
+        self._file.close()
+
+
+class JsonReportWriter(ReportWriter):
+    """Array JSON con el mismo formato que json.dump(indent=2); incompleto si el proceso muere"""
+    
+    def _open(self):
+        super()._open()
+        self._file.write('[')
+    
+    def _write(self, record: Dict):
+        text = json.dumps({field: record.get(field) for field in self.fields}, indent=2, ensure_ascii=False)
+        self._file.write((',\n' if self.count else '\n') + textwrap.indent(text, '  '))
+    
+    def _close(self):
+        self._file.write('\n]' if self.count else ']')
+        super()._close()
+
+
+class JsonLinesReportWriter(ReportWriter):
+    """Un objeto JSON por línea: tras un fallo, todas las líneas escritas son válidas"""
+    
+    def _write(self, record: Dict):
+        self._file.write(json.dumps({field: record.get(field) for field in self.fields}, ensure_ascii=False) + '\n')
+
+
+class CsvReportWriter(ReportWriter):
+    
+    def _open(self):
+        super()._open()
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction='ignore', lineterminator='\n')
+        self._writer.writeheader()
+    
+    def _write(self, record: Dict):
+        self._writer.writerow(record)
+
+
+class ExcelReportWriter(ReportWriter):
+    """
+    Hoja de Excel en modo write-only: openpyxl vuelca las filas a disco según llegan.
+    
+    El xlsx se genera al cerrar (también si el reporte se interrumpe con una excepción o
+    Ctrl+C). Los anchos de columna se fijan antes de la primera fila, porque en modo
+    write-only no se pueden cambiar después.
+    """
+    
+    # Columnas con ids de recurso largos
+    WIDE_COLUMNS = ('identity_id', 'credential_id', 'credential_issuer', 'credential_subject')
+    
+    def _open(self):
+        from openpyxl import Workbook
+        
+        self._file = Workbook(write_only=True)
+        self._sheet_rows = EXCEL_MAX_ROWS
+    
+    def _new_sheet(self):
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+        from openpyxl.utils import get_column_letter
+        
+        sheets = len(self._file.worksheets)
+        ws = self._file.create_sheet(title=self.sheet_name if not sheets else f"{self.sheet_name}_{sheets + 1}")
+        for index, field in enumerate(self.fields, start=1):
+            width = 50 if field in self.WIDE_COLUMNS else min(max(len(field) + 2, 20), 50)
+            ws.column_dimensions[get_column_letter(index)].width = width
+        header_font = Font(bold=True)
+        header = []
+        for field in self.fields:
+            cell = WriteOnlyCell(ws, value=field)
+            cell.font = header_font
+            header.append(cell)
+        ws.append(header)
+        self._sheet = ws
+        self._sheet_rows = 1
+    
+    def _write(self, record: Dict):
+        if self._sheet_rows >= EXCEL_MAX_ROWS:
+            self._new_sheet()
+        self._sheet.append([record.get(field) for field in self.fields])
+        self._sheet_rows += 1
+    
+    def _flush(self):
+        pass
+    
+    def _close(self):
+        if not self._file.worksheets:
+            self._new_sheet()
+        self._file.save(self.filename)
+
+
+REPORT_WRITERS = {'json': JsonReportWriter, 'jsonl': JsonLinesReportWriter,
+                  'csv': CsvReportWriter, 'excel': ExcelReportWriter}
+
+
+def credentials_tuples_filename(base_filename: str, format_type: str) -> str:
+    """Fichero de tuplas junto al reporte: reporte.csv -> reporte_credentials_tuples.csv"""
+    name_parts = base_filename.rsplit('.', 1)
+    if len(name_parts) == 2:
+        return f"{name_parts[0]}_credentials_tuples.{name_parts[1]}"
+    return f"{base_filename}_credentials_tuples.{FORMAT_EXTENSIONS[format_type]}"
+
+
+class CredentialTuplesWriter:
+    """
+    Tuplas (issuer, subject, audiences, type) sin duplicados, escritas al aparecer por
+    primera vez. Solo se guardan en memoria las claves de las tuplas ya vistas.
+    """
+    
+    def __init__(self, writer: ReportWriter):
+        self.writer = writer
+        self._seen = set()
+    
+    def add(self, record: Dict):
+        # Solo incluir registros que tienen credenciales válidas (no 'N/A')
+        if record.get('credential_issuer', 'N/A') == 'N/A' or record.get('credential_subject', 'N/A') == 'N/A':
+            return
+        key = tuple(record.get(field, '') for field in CREDENTIAL_TUPLE_FIELDS)
+        if key not in self._seen:
+            self._seen.add(key)
+            self.writer.write(dict(zip(CREDENTIAL_TUPLE_FIELDS, key)))
+    
+    def close(self):
+        self.writer.close()
+
+
+class CheckpointJournal:
+    """
+    Journal de checkpoint (JSON Lines, solo se añaden líneas) del backend arm.
+    
+    - Una línea por identidad completada, con sus registros del reporte
+    - Una línea por suscripción completada (todas sus identidades sin errores), con el
+      orden de sus identidades
+    
+    Con resume=True se carga el journal existente: las suscripciones completadas no se
+    vuelven a consultar y, en las demás, solo se piden las identidades que faltan. En
+    memoria solo se guarda la posición de cada línea; los registros se leen del fichero al
+    reemitirlos. Las identidades o suscripciones que fallaron no quedan marcadas, así que
+    se reintentan al reanudar.
+    """
+    
+    def __init__(self, path: str, params: Dict[str, Any], resume: bool = False):
+        self.path = path
+        self.params = params
+        self._lock = threading.Lock()
+        # {subscription_id: {identity_id: posición de la línea}}
+        self._identities: Dict[str, Dict[str, int]] = {}
+        # Suscripciones completadas: {subscription_id: [identity_id en orden del reporte]}
+        self._subscriptions: Dict[str, List[str]] = {}
+        self.resumed_subscriptions = 0
+        self.resumed_identities = 0
+        
+        if resume and os.path.exists(path):
+            valid_size = self._load()
+            # Una línea a medias (proceso terminado mientras escribía) se descarta
+            with open(path, 'r+b') as f:
+                f.truncate(valid_size)
+            self._file = open(path, 'a', encoding='utf-8')
+            logger.info(f"Reanudando desde {path}: {len(self._subscriptions)} suscripción(es) y "
+                        f"{sum(len(ids) for ids in self._identities.values())} identidades completadas")
+        else:
+            if resume:
+                logger.warning(f"No existe el checkpoint {path}: se empieza desde el principio")
+            elif os.path.exists(path):
+                logger.warning(f"Se sobrescribe el checkpoint anterior {path} (usa --resume para continuarlo)")
+            self._file = open(path, 'w', encoding='utf-8')
+            self._append({'type': 'header', 'version': CHECKPOINT_VERSION, 'params': params})
+        self._reader = open(path, 'rb')
+    
+    def _load(self) -> int:
+        """Indexa el journal existente y devuelve el tamaño de su parte válida"""
+        path = self.path
+        valid_size = 0
+        with open(path, 'rb') as f:
+            for number, line in enumerate(iter(f.readline, b'')):
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if number == 0:
+                    if entry.get('type') != 'header' or entry.get('version') != CHECKPOINT_VERSION:
+                        raise ValueError(f"{path} no es un checkpoint válido de este script")
+                    if entry.get('params') != self.params:
+                        raise ValueError(f"El checkpoint {path} es de otra ejecución ({entry.get('params')}); "
+                                         f"usa los mismos parámetros o ejecuta sin --resume")
+                elif entry['type'] == 'identity':
+                    self._identities.setdefault(entry['subscription_id'], {})[entry['identity_id'].lower()] = valid_size
+                elif entry['type'] == 'subscription':
+                    self._subscriptions[entry['subscription_id']] = entry['identities']
+                valid_size += len(line)
+        if valid_size == 0:
+            raise ValueError(f"{path} no es un checkpoint válido de este script")
+        return valid_size
+    
+    def _append(self, entry: Dict):
+        with self._lock:
+            # Tras close() se descarta: un worker rezagado no falla ni escribe en otro fichero
+            if self._file.closed:
+                logger.debug(f"Checkpoint cerrado: se descarta la entrada {entry.get('type')}")
+                return
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._file.flush()
+    
+    def _read(self, offset: int) -> Dict:
+        with self._lock:
+            self._reader.seek(offset)
+            return json.loads(self._reader.readline())
+    
+    def is_completed(self, subscription_id: str) -> bool:
+        return subscription_id in self._subscriptions
+    
+    def subscription_records(self, subscription_id: str) -> List[Dict]:
+        """Registros de una suscripción completada, en el orden del reporte original"""
+        offsets = self._identities.get(subscription_id, {})
+        records = []
+        for identity_id in self._subscriptions[subscription_id]:
+            records.extend(self._read(offsets[identity_id.lower()])['records'])
+        with self._lock:
+            self.resumed_subscriptions += 1
+        return records
+    
+    def identity_records(self, subscription_id: str, identity_id: str) -> Optional[List[Dict]]:
+        """Registros guardados de una identidad, o None si no está completada"""
+        offset = self._identities.get(subscription_id, {}).get(identity_id.lower())
+        if offset is None:
+            return None
+        with self._lock:
+            self.resumed_identities += 1
+        return self._read(offset)['records']
+    
+    def record_identity(self, subscription_id: str, identity_id: str, records: List[Dict]):
+        self._append({'type': 'identity', 'subscription_id': subscription_id,
+                      'identity_id': identity_id, 'records': records})
+    
+    def record_subscription(self, subscription_id: str, identity_ids: List[str]):
+        self._append({'type': 'subscription', 'subscription_id': subscription_id, 'identities': identity_ids})
+    
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+    
+    def close(self):
+        # Con el lock: una escritura en curso termina su línea antes de cerrar
+        with self._lock:
+            self._file.close()
+            self._reader.close()
+    
+    def remove(self):
+        """Borra el journal (ejecución completada sin errores)"""
+        self.close()
+        os.remove(self.path)
+
+
 class FederatedIdentityReporter:
     """
     Clase principal para generar reportes de credenciales de identidad federada.
@@ -60,10 +547,20 @@ class FederatedIdentityReporter:
     - Retry logic con exponential backoff
     - Logging comprehensivo
     - Manejo robusto de errores
+    - Throttling de ARM: las identidades se consultan en paralelo (max_workers) bajo un
+      ArmThrottle por suscripción (pausa compartida ante 429 y concurrencia AIMD)
+    - Con all_subscriptions se procesan subscription_workers suscripciones a la vez, cada
+      una con sus propios clientes; el fallo de una no afecta a las demás
+    - Backend resource-graph: dos consultas paginadas a Azure Resource Graph (identidades y
+      credenciales) en lugar de N+1 peticiones a ARM
     """
     
     def __init__(self, subscription_id: Optional[str] = None, use_cli_auth: bool = False, 
-                 all_subscriptions: bool = False, tenant_id: Optional[str] = None):
+                 all_subscriptions: bool = False, tenant_id: Optional[str] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS, max_retries: int = DEFAULT_MAX_RETRIES,
+                 arm_endpoint: Optional[str] = None,
+                 subscription_workers: int = DEFAULT_SUBSCRIPTION_WORKERS, backend: str = 'arm',
+                 checkpoint: Optional[CheckpointJournal] = None):
         """
         Inicializa el cliente de reporte.
         
@@ -72,13 +569,39 @@ class FederatedIdentityReporter:
             use_cli_auth: Si usar autenticación de Azure CLI en lugar de Managed Identity
             all_subscriptions: Si procesar todas las suscripciones disponibles
             tenant_id: ID del tenant de Azure (opcional)
+            max_workers: Identidades consultadas a la vez (1 = secuencial)
+            max_retries: Reintentos por petición ante 429, 5xx o errores de conexión
+            arm_endpoint: Endpoint de ARM (nubes soberanas o mock local); por defecto el público
+            subscription_workers: Suscripciones procesadas a la vez (1 = secuencial)
+            backend: 'arm' (cliente MSI por suscripción) o 'resource-graph' (consultas paginadas)
+            checkpoint: Journal donde registrar (y del que reanudar) el trabajo completado
         """
         self.subscription_id = subscription_id
         self.all_subscriptions = all_subscriptions
         self.tenant_id = tenant_id
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(0, max_retries)
+        self.arm_endpoint = arm_endpoint.rstrip('/') if arm_endpoint else None
+        self.subscription_workers = max(1, subscription_workers)
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend no soportado: {backend} (usa {' o '.join(BACKENDS)})")
+        self.backend = backend
+        self.checkpoint = checkpoint
         self.credential = self._get_credential(use_cli_auth)
-        self.msi_client = None
-        self.resource_client = None
+        
+        # Un mock local va por http: el SDK solo envía el bearer token por https si no se indica
+        self._request_options = {'enforce_https': False} if is_local_endpoint(self.arm_endpoint) else {}
+        
+        # Un ArmThrottle por suscripción (más el del listado de suscripciones) para las estadísticas
+        self._throttles_lock = threading.Lock()
+        self._throttles: List[ArmThrottle] = []
+        self._subscriptions_throttle = self._new_throttle()
+        # Suscripciones que fallaron: (suscripción, error) e identidades que fallaron
+        self.failed_subscriptions: List[Tuple[Dict, str]] = []
+        self.failed_identities = 0
+        self._failures_lock = threading.Lock()
+        # Generación interrumpida (Ctrl+C): los workers no empiezan más consultas
+        self._cancelled = threading.Event()
         
         # Validar parámetros
         if not all_subscriptions and not subscription_id:
@@ -94,6 +617,9 @@ class FederatedIdentityReporter:
         Implementa múltiples métodos de autenticación incluyendo MFA.
         """
         try:
+            if is_local_endpoint(self.arm_endpoint):
+                logger.warning(f"Endpoint ARM local ({self.arm_endpoint}): se usa un token ficticio")
+                return _StaticTokenCredential()
             if use_cli_auth:
                 logger.info("Usando autenticación de Azure CLI")
                 if self.tenant_id:
@@ -146,28 +672,47 @@ class FederatedIdentityReporter:
             logger.error(f"Error al obtener credenciales: {e}")
             raise
     
-    def _initialize_clients(self, subscription_id: str):
+    def _new_throttle(self) -> ArmThrottle:
+        throttle = ArmThrottle(self.max_workers)
+        with self._throttles_lock:
+            self._throttles.append(throttle)
+        return throttle
+    
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Estadísticas de llamadas a ARM sumadas de todas las suscripciones"""
+        with self._throttles_lock:
+            throttles = list(self._throttles)
+        stats = {key: sum(t.stats[key] for t in throttles) for key in ('requests', 'throttled', 'retries')}
+        stats['min_concurrency'] = min(t.stats['min_concurrency'] for t in throttles)
+        return stats
+    
+    def _initialize_clients(self, subscription: Dict) -> SubscriptionContext:
         """
-        Inicializa los clientes de Azure con retry logic para una suscripción específica.
+        Crea los clientes de Azure de una suscripción con retry logic.
+        
+        Cada suscripción tiene sus propios clientes (y pool de conexiones) y su ArmThrottle,
+        de modo que varias suscripciones pueden procesarse en paralelo.
         
         Args:
-            subscription_id: ID de la suscripción para la cual inicializar los clientes
+            subscription: Suscripción (subscription_id, display_name, tenant_id)
+            
+        Returns:
+            Contexto con el cliente MSI y el control de throttling de la suscripción
         """
+        subscription_id = subscription['subscription_id']
         max_retries = 3
         retry_delay = 1
         
         for attempt in range(max_retries):
             try:
-                self.msi_client = ManagedServiceIdentityClient(
+                msi_client = ManagedServiceIdentityClient(
                     self.credential, 
-                    subscription_id
-                )
-                self.resource_client = ResourceManagementClient(
-                    self.credential,
-                    subscription_id
+                    subscription_id,
+                    **self._client_options()
                 )
                 logger.debug(f"Clientes de Azure inicializados correctamente para suscripción: {subscription_id}")
-                return
+                return SubscriptionContext(subscription, msi_client, self._new_throttle())
             except Exception as e:
                 if attempt < max_retries - 1:
                     logger.warning(f"Intento {attempt + 1} fallido, reintentando en {retry_delay}s: {e}")
@@ -177,6 +722,79 @@ class FederatedIdentityReporter:
                     logger.error(f"Error al inicializar clientes después de {max_retries} intentos: {e}")
                     raise
     
+    def _client_options(self) -> Dict[str, Any]:
+        """
+        Opciones comunes de los clientes del SDK.
+        
+        - Endpoint y scope del token si se indicó arm_endpoint
+        - Sin reintentos del SDK: los gestiona _call_with_backoff, que ante un 429 pausa a
+          todos los workers en lugar de que cada uno reintente por su cuenta
+        - Pool de conexiones HTTP del tamaño de max_workers (requests usa 10 por defecto)
+        """
+        options: Dict[str, Any] = {'retry_total': 0}
+        if self.arm_endpoint:
+            options['base_url'] = self.arm_endpoint
+            options['credential_scopes'] = [f"{self.arm_endpoint}/.default"]
+        if self.max_workers > 10:
+            import requests
+            from azure.core.pipeline.transport import RequestsTransport
+            
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.max_workers,
+                                                    pool_maxsize=self.max_workers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            options['transport'] = RequestsTransport(session=session, session_owner=False)
+        return options
+    
+    def _call_with_backoff(self, func, description: str, throttle: ArmThrottle):
+        """
+        Ejecuta una llamada a ARM con reintentos.
+        
+        - 429: pausa compartida del Retry-After de ARM (o exponential backoff si no viene)
+        - 5xx transitorios y errores de conexión: exponential backoff con jitter
+        - Resto de errores (404, 403...): se propagan sin reintentar
+        
+        Args:
+            throttle: Control de throttling de la suscripción a la que va la llamada
+        """
+        for attempt in range(self.max_retries + 1):
+            throttle.wait()
+            throttle.acquire()
+            throttled = succeeded = False
+            try:
+                result = func()
+                succeeded = True
+                return result
+            except HttpResponseError as e:
+                if e.status_code == 429:
+                    throttled = True
+                elif e.status_code not in RETRYABLE_STATUS_CODES:
+                    raise
+                error = e
+            except (ServiceRequestError, ServiceResponseError) as e:
+                error = e
+            finally:
+                throttle.release(succeeded)
+            
+            if attempt == self.max_retries:
+                logger.error(f"{description}: sin éxito tras {self.max_retries} reintentos")
+                raise error
+            
+            # Exponential backoff con jitter para que los workers no reintenten a la vez
+            delay = min(2 ** attempt, 30) * (0.5 + random.random() / 2)
+            if throttled:
+                response = getattr(error, 'response', None)
+                delay = retry_after_seconds(response.headers if response is not None else None) or delay
+                throttle.throttled(delay)
+                logger.warning(f"{description}: throttling de ARM (429), pausa de {delay:.1f}s "
+                               f"(intento {attempt + 1}/{self.max_retries})")
+            else:
+                throttle.retried()
+                logger.warning(f"{description}: {error}. Reintentando en {delay:.1f}s "
+                               f"(intento {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+    
     def get_all_subscriptions(self) -> List[Dict]:
         """
         Obtiene todas las suscripciones disponibles para el usuario.
@@ -187,10 +805,14 @@ class FederatedIdentityReporter:
         """
         try:
             logger.info("Obteniendo lista de todas las suscripciones disponibles...")
-            subscription_client = SubscriptionClient(self.credential)
+            subscription_client = SubscriptionClient(self.credential, **self._client_options())
             
             subscriptions = []
-            subscription_list = subscription_client.subscriptions.list()
+            subscription_list = self._call_with_backoff(
+                lambda: list(subscription_client.subscriptions.list(**self._request_options)),
+                "Listado de suscripciones",
+                self._subscriptions_throttle
+            )
             
             for sub in subscription_list:
                 # Verificar el estado de la suscripción
@@ -235,11 +857,13 @@ class FederatedIdentityReporter:
             logger.error(f"Error obteniendo lista de suscripciones: {e}")
             raise
     
-    def get_user_assigned_identities(self, resource_group_name: Optional[str] = None) -> List[Dict]:
+    def get_user_assigned_identities(self, context: SubscriptionContext,
+                                     resource_group_name: Optional[str] = None) -> List[Dict]:
         """
         Obtiene todas las identidades administradas asignadas por el usuario.
         
         Args:
+            context: Clientes de la suscripción (de _initialize_clients)
             resource_group_name: Nombre del grupo de recursos (opcional)
             
         Returns:
@@ -249,13 +873,24 @@ class FederatedIdentityReporter:
         
         try:
             if resource_group_name:
-                logger.info(f"Obteniendo identidades del grupo de recursos: {resource_group_name}")
-                identity_list = self.msi_client.user_assigned_identities.list_by_resource_group(
-                    resource_group_name
+                logger.info(f"Obteniendo identidades del grupo de recursos: {resource_group_name} "
+                            f"(suscripción: {context.name})")
+                identity_list = self._call_with_backoff(
+                    lambda: list(context.msi_client.user_assigned_identities.list_by_resource_group(
+                        resource_group_name, **self._request_options
+                    )),
+                    f"Identidades del grupo de recursos {resource_group_name}",
+                    context.throttle
                 )
             else:
-                logger.info("Obteniendo todas las identidades de la suscripción")
-                identity_list = self.msi_client.user_assigned_identities.list_by_subscription()
+                logger.info(f"Obteniendo todas las identidades de la suscripción: {context.name}")
+                identity_list = self._call_with_backoff(
+                    lambda: list(context.msi_client.user_assigned_identities.list_by_subscription(
+                        **self._request_options
+                    )),
+                    f"Identidades de la suscripción {context.name}",
+                    context.throttle
+                )
             
             for identity in identity_list:
                 identities.append({
@@ -267,8 +902,9 @@ class FederatedIdentityReporter:
                     'client_id': identity.client_id,
                     'tenant_id': identity.tenant_id
                 })
+            identities.sort(key=resource_id_key)
                 
-            logger.info(f"Se encontraron {len(identities)} identidades administradas")
+            logger.info(f"Se encontraron {len(identities)} identidades administradas en {context.name}")
             return identities
             
         except HttpResponseError as e:
@@ -278,11 +914,13 @@ class FederatedIdentityReporter:
             logger.error(f"Error inesperado al obtener identidades: {e}")
             raise
     
-    def get_federated_credentials(self, identity_name: str, resource_group_name: str) -> List[Dict]:
+    def get_federated_credentials(self, context: SubscriptionContext, identity_name: str,
+                                  resource_group_name: str) -> List[Dict]:
         """
         Obtiene las credenciales de identidad federada para una identidad específica.
         
         Args:
+            context: Clientes de la suscripción de la identidad
             identity_name: Nombre de la identidad administrada
             resource_group_name: Nombre del grupo de recursos
             
@@ -294,9 +932,15 @@ class FederatedIdentityReporter:
         try:
             logger.debug(f"Obteniendo credenciales federadas para {identity_name}")
             
-            cred_list = self.msi_client.federated_identity_credentials.list(
-                resource_group_name,
-                identity_name
+            # Se consumen todas las páginas dentro del reintento: un 429 a mitad repite el listado
+            cred_list = self._call_with_backoff(
+                lambda: list(context.msi_client.federated_identity_credentials.list(
+                    resource_group_name,
+                    identity_name,
+                    **self._request_options
+                )),
+                f"Credenciales federadas de {identity_name}",
+                context.throttle
             )
             
             for cred in cred_list:
@@ -309,6 +953,7 @@ class FederatedIdentityReporter:
                     'description': getattr(cred, 'description', ''),
                     'type': cred.type
                 })
+            credentials.sort(key=resource_id_key)
                 
             logger.debug(f"Se encontraron {len(credentials)} credenciales federadas para {identity_name}")
             return credentials
@@ -324,6 +969,94 @@ class FederatedIdentityReporter:
             logger.error(f"Error inesperado al obtener credenciales federadas: {e}")
             raise
     
+    def fetch_federated_credentials(self, context: SubscriptionContext,
+                                    identities: List[Dict]) -> Iterator[Tuple[Dict, Optional[List[Dict]]]]:
+        """
+        Obtiene las credenciales federadas de varias identidades con hasta max_workers
+        peticiones simultáneas.
+        
+        Args:
+            context: Clientes de la suscripción de las identidades
+            identities: Identidades de la suscripción
+            
+        Returns:
+            Iterador de (identidad, credenciales) en el mismo orden que `identities`;
+            credenciales es None si la identidad falló (el error queda en el log)
+        """
+        def fetch(identity):
+            if self._cancelled.is_set():
+                return None
+            logger.info(f"Procesando identidad: {identity['name']} en suscripción: {context.name}")
+            try:
+                return self.get_federated_credentials(context, identity['name'], identity['resource_group'])
+            except Exception as e:
+                logger.error(f"Error procesando identidad {identity['name']} en suscripción {context.name}: {e}")
+                return None
+        
+        if self.max_workers == 1 or len(identities) <= 1:
+            for identity in identities:
+                yield identity, fetch(identity)
+            return
+        
+        # executor.map entrega los resultados en orden aunque terminen desordenados; si no se
+        # consumen todos (interrupción), las identidades que no han empezado se cancelan
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(identities)))
+        try:
+            yield from zip(identities, executor.map(fetch, identities))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _build_records(self, identity: Dict, federated_creds: List[Dict], subscription: Dict) -> List[Dict]:
+        """Registros del reporte de una identidad (uno por credencial, o uno 'N/A' si no tiene)"""
+        if not federated_creds:
+            # Incluir identidades sin credenciales federadas
+            return [{
+                'identity_name': identity['name'],
+                'identity_id': identity['id'],
+                'identity_resource_group': identity['resource_group'],
+                'identity_location': identity['location'],
+                'identity_principal_id': identity['principal_id'],
+                'identity_client_id': identity['client_id'],
+                'identity_tenant_id': identity['tenant_id'],
+                'credential_name': 'N/A',
+                'credential_id': 'N/A',
+                'credential_issuer': 'N/A',
+                'credential_subject': 'N/A',
+                'credential_audiences': 'N/A',
+                'credential_description': 'Sin credenciales federadas',
+                'credential_type': 'N/A',
+                'subscription_id': subscription['subscription_id'],
+                'subscription_name': subscription['display_name'],
+                'tenant_id': subscription.get('tenant_id', 'N/A'),
+                'report_timestamp': datetime.now().isoformat()
+            }]
+        
+        return [{
+            # Información de la identidad
+            'identity_name': identity['name'],
+            'identity_id': identity['id'],
+            'identity_resource_group': identity['resource_group'],
+            'identity_location': identity['location'],
+            'identity_principal_id': identity['principal_id'],
+            'identity_client_id': identity['client_id'],
+            'identity_tenant_id': identity['tenant_id'],
+            
+            # Información de la credencial federada
+            'credential_name': cred['name'],
+            'credential_id': cred['id'],
+            'credential_issuer': cred['issuer'],
+            'credential_subject': cred['subject'],
+            'credential_audiences': ', '.join(cred['audiences']) if cred['audiences'] else '',
+            'credential_description': cred['description'],
+            'credential_type': cred['type'],
+            
+            # Metadatos del reporte
+            'subscription_id': subscription['subscription_id'],
+            'subscription_name': subscription['display_name'],
+            'tenant_id': subscription.get('tenant_id', 'N/A'),
+            'report_timestamp': datetime.now().isoformat()
+        } for cred in federated_creds]
+    
     def generate_report(self, resource_group_name: Optional[str] = None, 
                        identity_name: Optional[str] = None) -> List[Dict]:
         """
@@ -334,10 +1067,25 @@ class FederatedIdentityReporter:
             identity_name: Filtrar por identidad específica
             
         Returns:
-            Lista de registros del reporte
+            Lista de registros del reporte (para tenants grandes, mejor iter_report)
+        """
+        return list(self.iter_report(resource_group_name, identity_name))
+    
+    def iter_report(self, resource_group_name: Optional[str] = None,
+                    identity_name: Optional[str] = None) -> Iterator[Dict]:
         """
-        report_data = []
+        Genera los registros del reporte según se obtienen, sin acumularlos.
         
+        Solo quedan en memoria los registros de las suscripciones en curso (backend arm)
+        o del lote de suscripciones en curso (backend resource-graph).
+        
+        Args:
+            resource_group_name: Filtrar por grupo de recursos específico
+            identity_name: Filtrar por identidad específica
+            
+        Returns:
+            Iterador de registros, en el orden de las suscripciones
+        """
         try:
             # Determinar qué suscripciones procesar
             if self.all_subscriptions:
@@ -347,7 +1095,7 @@ class FederatedIdentityReporter:
                         logger.warning(f"No se encontraron suscripciones habilitadas en el tenant {self.tenant_id}")
                     else:
                         logger.warning("No se encontraron suscripciones habilitadas")
-                    return []
+                    return
             else:
                 # Para suscripción específica, obtener información del tenant si está disponible
                 subscription_info = {
@@ -357,228 +1105,395 @@ class FederatedIdentityReporter:
                 }
                 subscriptions = [subscription_info]
             
-            # Procesar cada suscripción
-            for subscription in subscriptions:
-                current_subscription_id = subscription['subscription_id']
-                subscription_name = subscription['display_name']
-                
-                logger.info(f"Procesando suscripción: {subscription_name} ({current_subscription_id})")
-                
-                try:
-                    # Inicializar clientes para esta suscripción
-                    self._initialize_clients(current_subscription_id)
-                    
-                    # Obtener identidades administradas
-                    identities = self.get_user_assigned_identities(resource_group_name)
-                    
-                    # Filtrar por identidad específica si se proporciona
-                    if identity_name:
-                        identities = [id for id in identities if id['name'] == identity_name]
-                        if not identities:
-                            logger.warning(f"No se encontró la identidad especificada: {identity_name} en suscripción {subscription_name}")
-                            continue
-                    
-                    # Procesar cada identidad
-                    for identity in identities:
-                        # Validar que la identidad tenga un nombre válido
-                        if not identity.get('name') or identity['name'].strip() == '':
-                            logger.warning(f"Se omitió una identidad con nombre vacío o nulo en suscripción: {subscription_name}")
-                            continue
-                            
-                        logger.info(f"Procesando identidad: {identity['name']} en suscripción: {subscription_name}")
-                        
-                        try:
-                            federated_creds = self.get_federated_credentials(
-                                identity['name'], 
-                                identity['resource_group']
-                            )
-                            
-                            if federated_creds:
-                                for cred in federated_creds:
-                                    report_record = {
-                                        # Información de la identidad
-                                        'identity_name': identity['name'],
-                                        'identity_id': identity['id'],
-                                        'identity_resource_group': identity['resource_group'],
-                                        'identity_location': identity['location'],
-                                        'identity_principal_id': identity['principal_id'],
-                                        'identity_client_id': identity['client_id'],
-                                        'identity_tenant_id': identity['tenant_id'],
-                                        
-                                        # Información de la credencial federada
-                                        'credential_name': cred['name'],
-                                        'credential_id': cred['id'],
-                                        'credential_issuer': cred['issuer'],
-                                        'credential_subject': cred['subject'],
-                                        'credential_audiences': ', '.join(cred['audiences']) if cred['audiences'] else '',
-                                        'credential_description': cred['description'],
-                                        'credential_type': cred['type'],
-                                        
-                                        # Metadatos del reporte
-                                        'subscription_id': current_subscription_id,
-                                        'subscription_name': subscription_name,
-                                        'tenant_id': subscription.get('tenant_id', 'N/A'),
-                                        'report_timestamp': datetime.now().isoformat()
-                                    }
-                                    report_data.append(report_record)
-                            else:
-                                # Incluir identidades sin credenciales federadas
-                                report_record = {
-                                    'identity_name': identity['name'],
-                                    'identity_id': identity['id'],
-                                    'identity_resource_group': identity['resource_group'],
-                                    'identity_location': identity['location'],
-                                    'identity_principal_id': identity['principal_id'],
-                                    'identity_client_id': identity['client_id'],
-                                    'identity_tenant_id': identity['tenant_id'],
-                                    'credential_name': 'N/A',
-                                    'credential_id': 'N/A',
-                                    'credential_issuer': 'N/A',
-                                    'credential_subject': 'N/A',
-                                    'credential_audiences': 'N/A',
-                                    'credential_description': 'Sin credenciales federadas',
-                                    'credential_type': 'N/A',
-                                    'subscription_id': current_subscription_id,
-                                    'subscription_name': subscription_name,
-                                    'tenant_id': subscription.get('tenant_id', 'N/A'),
-                                    'report_timestamp': datetime.now().isoformat()
-                                }
-                                report_data.append(report_record)
-                                
-                        except Exception as e:
-                            logger.error(f"Error procesando identidad {identity['name']} en suscripción {subscription_name}: {e}")
-                            continue
-                            
-                except Exception as e:
-                    logger.error(f"Error procesando suscripción {subscription_name}: {e}")
-                    continue
+            self.failed_subscriptions = []
+            self.failed_identities = 0
+            self._cancelled.clear()
+            if self.backend == 'resource-graph':
+                records = self._resource_graph_records(subscriptions, resource_group_name, identity_name)
+            else:
+                records = self._arm_records(subscriptions, resource_group_name, identity_name)
             
-            logger.info(f"Reporte generado exitosamente con {len(report_data)} registros de {len(subscriptions)} suscripción(es)")
-            return report_data
+            count = 0
+            try:
+                for record in records:
+                    count += 1
+                    yield record
+            except BaseException:
+                self._cancelled.set()
+                raise
+            finally:
+                # Si se deja de consumir el reporte (Ctrl+C, fallo al escribir), el backend
+                # se cierra ya: cancela lo pendiente y espera a sus workers
+                records.close()
+            
+            if self.failed_subscriptions:
+                logger.warning(f"{len(self.failed_subscriptions)} suscripción(es) con errores: "
+                               + ", ".join(sub['display_name'] for sub, _ in self.failed_subscriptions))
+            logger.info(f"Reporte generado exitosamente con {count} registros de {len(subscriptions)} suscripción(es)")
             
         except Exception as e:
             logger.error(f"Error generando reporte: {e}")
             raise
     
-    def export_to_json(self, data: List[Dict], filename: str):
-        """Exporta los datos a formato JSON."""
+    def _arm_records(self, subscriptions: List[Dict], resource_group_name: Optional[str],
+                     identity_name: Optional[str]) -> Iterator[Dict]:
+        """
+        Backend arm: suscripciones en paralelo (subscription_workers), cada una con sus
+        clientes. Los registros mantienen el orden de `subscriptions`.
+        """
+        progress = {'done': 0, 'start': time.monotonic()}
+        progress_lock = threading.Lock()
+        
+        def scan(subscription):
+            if self._cancelled.is_set():
+                return []
+            start = time.monotonic()
+            try:
+                if self.checkpoint and self.checkpoint.is_completed(subscription['subscription_id']):
+                    logger.info(f"Suscripción {subscription['display_name']} completada en el checkpoint")
+                    records = self.checkpoint.subscription_records(subscription['subscription_id'])
+                else:
+                    records = self._scan_subscription(subscription, resource_group_name, identity_name)
+            except Exception as e:
+                # Aislar el fallo: el resto de suscripciones sigue adelante
+                logger.error(f"Error procesando suscripción {subscription['display_name']}: {e}")
+                with progress_lock:
+                    self.failed_subscriptions.append((subscription, str(e)))
+                records = []
+            with progress_lock:
+                progress['done'] += 1
+                done = progress['done']
+                remaining = len(subscriptions) - done
+                eta = (time.monotonic() - progress['start']) / done * remaining
+                logger.info(f"[{done}/{len(subscriptions)}] Suscripción {subscription['display_name']}: "
+                            f"{len(records)} registros en {time.monotonic() - start:.1f}s"
+                            + (f" (quedan {remaining}, ~{eta:.0f}s)" if remaining else ""))
+            return records
+        
+        if self.subscription_workers == 1 or len(subscriptions) <= 1:
+            for subscription in subscriptions:
+                yield from scan(subscription)
+            return
+        
+        workers = min(self.subscription_workers, len(subscriptions))
+        logger.info(f"Procesando {len(subscriptions)} suscripciones ({workers} en paralelo)")
+        # Ventana acotada (en lugar de executor.map, que lanza todas): como mucho 2×workers
+        # suscripciones terminadas esperan en memoria a que se escriban las anteriores
+        pending_subscriptions = iter(subscriptions)
+        executor = ThreadPoolExecutor(max_workers=workers)
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            logger.info(f"Reporte exportado a JSON: {filename}")
-        except Exception as e:
-            logger.error(f"Error exportando a JSON: {e}")
+            pending = deque(executor.submit(scan, subscription)
+                            for subscription in itertools.islice(pending_subscriptions, 2 * workers))
+            while pending:
+                records = pending.popleft().result()
+                for subscription in itertools.islice(pending_subscriptions, 1):
+                    pending.append(executor.submit(scan, subscription))
+                yield from records
+        except BaseException:
+            # Ctrl+C o generador cerrado a medias: las suscripciones en curso dejan de pedir
+            # identidades y las que no han empezado se cancelan
+            self._cancelled.set()
             raise
+        finally:
+            # Al volver, ningún worker sigue escribiendo en el checkpoint
+            executor.shutdown(wait=True, cancel_futures=True)
     
-    def export_to_csv(self, data: List[Dict], filename: str):
-        """Exporta los datos a formato CSV."""
+    def _scan_subscription(self, subscription: Dict, resource_group_name: Optional[str],
+                           identity_name: Optional[str]) -> List[Dict]:
+        """
+        Registros del reporte de una suscripción, con sus propios clientes.
+        
+        Se ejecuta en un worker de suscripción; los errores de listado se propagan
+        (_arm_records los aísla) y los de identidades sueltas quedan en el log.
+        
+        Con checkpoint, cada identidad completada se registra en el journal y las que ya
+        estaban en él no se vuelven a consultar.
+        """
+        subscription_id = subscription['subscription_id']
+        logger.info(f"Procesando suscripción: {subscription['display_name']} ({subscription_id})")
+        context = self._initialize_clients(subscription)
+        
+        # Obtener identidades administradas
+        identities = self.get_user_assigned_identities(context, resource_group_name)
+        
+        # Filtrar por identidad específica si se proporciona
+        if identity_name:
+            identities = [id for id in identities if id['name'] == identity_name]
+            if not identities:
+                logger.warning(f"No se encontró la identidad especificada: {identity_name} en suscripción {context.name}")
+                if self.checkpoint:
+                    self.checkpoint.record_subscription(subscription_id, [])
+                return []
+        
+        # Validar que cada identidad tenga un nombre válido
+        valid_identities = []
+        for identity in identities:
+            if not identity.get('name') or identity['name'].strip() == '':
+                logger.warning(f"Se omitió una identidad con nombre vacío o nulo en suscripción: {context.name}")
+                continue
+            valid_identities.append(identity)
+        
+        # Identidades ya completadas en el checkpoint (al reanudar)
+        saved = {}
+        if self.checkpoint:
+            for identity in valid_identities:
+                identity_records = self.checkpoint.identity_records(subscription_id, identity['id'])
+                if identity_records is not None:
+                    saved[identity['id']] = identity_records
+            if saved:
+                logger.info(f"{len(saved)} de {len(valid_identities)} identidades de {context.name} "
+                            f"ya estaban en el checkpoint")
+        
+        # Credenciales del resto de identidades en paralelo; los registros mantienen el
+        # orden de las identidades (resource_id_key)
+        fetched = self.fetch_federated_credentials(
+            context, [identity for identity in valid_identities if identity['id'] not in saved]
+        )
+        records = []
+        failed = 0
+        for identity in valid_identities:
+            if identity['id'] in saved:
+                records.extend(saved[identity['id']])
+                continue
+            _, federated_creds = next(fetched)
+            if federated_creds is None:
+                failed += 1
+                continue
+            identity_records = self._build_records(identity, federated_creds, subscription)
+            if self.checkpoint:
+                self.checkpoint.record_identity(subscription_id, identity['id'], identity_records)
+            records.extend(identity_records)
+        
+        if failed:
+            with self._failures_lock:
+                self.failed_identities += failed
+        elif self.checkpoint:
+            self.checkpoint.record_subscription(subscription_id, [identity['id'] for identity in valid_identities])
+        return records
+    
+    def _query_resource_graph(self, client, query: str, subscription_ids: List[str],
+                              description: str, throttle: ArmThrottle) -> Iterator[Dict]:
+        """
+        Ejecuta una consulta de Resource Graph y recorre todas sus páginas.
+        
+        Las páginas se piden de RESOURCE_GRAPH_PAGE_SIZE filas encadenando el $skipToken de
+        cada respuesta; cada página se reintenta por separado ante 429 (la cuota de Resource
+        Graph se indica con x-ms-user-quota-resets-after) o errores transitorios.
+        """
+        from azure.mgmt.resourcegraph.models import QueryRequest, QueryRequestOptions
+        
+        skip_token = None
+        page = 0
+        while True:
+            page += 1
+            request = QueryRequest(
+                subscriptions=subscription_ids,
+                query=query,
+                options=QueryRequestOptions(top=RESOURCE_GRAPH_PAGE_SIZE, skip_token=skip_token,
+                                            result_format='objectArray')
+            )
+            response = self._call_with_backoff(
+                lambda: client.resources(request, **self._request_options),
+                f"{description} (página {page})",
+                throttle
+            )
+            logger.debug(f"{description}: página {page} con {len(response.data)} filas")
+            yield from response.data
+            skip_token = response.skip_token
+            if not skip_token:
+                return
+    
+    def _resource_graph_records(self, subscriptions: List[Dict], resource_group_name: Optional[str],
+                                identity_name: Optional[str]) -> Iterator[Dict]:
+        """
+        Backend resource-graph: identidades y credenciales federadas de todas las
+        suscripciones con dos consultas paginadas, en lotes de RESOURCE_GRAPH_SUBSCRIPTION_BATCH
+        suscripciones.
+        
+        Las suscripciones a las que no hay acceso no devuelven filas (Resource Graph no da
+        error); si falla un lote, sus suscripciones quedan en failed_subscriptions.
+        """
         try:
-            df = pd.DataFrame(data)
-            df.to_csv(filename, index=False, encoding='utf-8')
-            logger.info(f"Reporte exportado a CSV: {filename}")
-        except Exception as e:
-            logger.error(f"Error exportando a CSV: {e}")
+            from azure.mgmt.resourcegraph import ResourceGraphClient
+        except ImportError:
+            raise RuntimeError("El backend resource-graph requiere azure-mgmt-resourcegraph. "
+                               "Instala con: pip install azure-mgmt-resourcegraph")
+        
+        client = ResourceGraphClient(self.credential, **self._client_options())
+        throttle = self._new_throttle()
+        
+        # El order by da un orden estable entre páginas del $skipToken; el orden del reporte
+        # se fija después con resource_id_key
+        filters = ''
+        if resource_group_name:
+            filters += f"\n| where resourceGroup =~ {kql_string(resource_group_name)}"
+        identity_query = (
+            "resources\n"
+            "| where type =~ 'microsoft.managedidentity/userassignedidentities'"
+            + filters
+            + (f"\n| where name =~ {kql_string(identity_name)}" if identity_name else "")
+            + "\n| project id, name, location, subscriptionId, principalId = tostring(properties.principalId),"
+              " clientId = tostring(properties.clientId), tenantId = tostring(properties.tenantId)"
+              "\n| order by id asc"
+        )
+        credential_query = (
+            "resources\n"
+            "| where type =~ 'microsoft.managedidentity/userassignedidentities/federatedidentitycredentials'"
+            + filters
+            + "\n| project id, name, type, issuer = tostring(properties.issuer),"
+              " subject = tostring(properties.subject), audiences = properties.audiences,"
+              " description = tostring(properties.description)"
+              "\n| order by id asc"
+        )
+        
+        found = False
+        for first in range(0, len(subscriptions), RESOURCE_GRAPH_SUBSCRIPTION_BATCH):
+            batch = subscriptions[first:first + RESOURCE_GRAPH_SUBSCRIPTION_BATCH]
+            subscription_ids = [sub['subscription_id'] for sub in batch]
+            start = time.monotonic()
+            try:
+                identities = [{
+                    'name': row['name'],
+                    'id': row['id'],
+                    'resource_group': row['id'].split('/')[4],
+                    'location': row.get('location'),
+                    'principal_id': row.get('principalId'),
+                    'client_id': row.get('clientId'),
+                    'tenant_id': row.get('tenantId'),
+                    'subscription_id': row['subscriptionId'].lower(),
+                } for row in self._query_resource_graph(client, identity_query, subscription_ids,
+                                                        "Resource Graph: identidades", throttle)]
+                
+                # Credenciales agrupadas por el id de su identidad (prefijo del id de la credencial)
+                credentials_by_identity: Dict[str, List[Dict]] = {}
+                credential_count = 0
+                for row in self._query_resource_graph(client, credential_query, subscription_ids,
+                                                      "Resource Graph: credenciales federadas", throttle):
+                    separator = row['id'].lower().rfind('/federatedidentitycredentials/')
+                    if separator < 0:
+                        continue
+                    credentials_by_identity.setdefault(row['id'][:separator].lower(), []).append({
+                        'name': row['id'].rsplit('/', 1)[-1],
+                        'id': row['id'],
+                        'issuer': row.get('issuer'),
+                        'subject': row.get('subject'),
+                        'audiences': row.get('audiences') or [],
+                        'description': row.get('description') or '',
+                        # Resource Graph devuelve el tipo en minúsculas
+                        'type': (FEDERATED_CREDENTIAL_TYPE if (row.get('type') or '').lower()
+                                 == FEDERATED_CREDENTIAL_TYPE.lower() else row.get('type'))
+                    })
+                    credential_count += 1
+            except Exception as e:
+                logger.error(f"Error consultando Resource Graph para {len(batch)} suscripción(es): {e}")
+                self.failed_subscriptions.extend((sub, str(e)) for sub in batch)
+                continue
+            
+            logger.info(f"Resource Graph: {len(identities)} identidades y {credential_count} credenciales "
+                        f"federadas en {len(batch)} suscripción(es) ({time.monotonic() - start:.1f}s)")
+            
+            # Mismo orden que el backend arm: por suscripción y, dentro de cada una, por
+            # resource_id_key (el order by de las consultas compara el id tal cual)
+            identities_by_subscription: Dict[str, List[Dict]] = {}
+            for identity in identities:
+                identities_by_subscription.setdefault(identity.pop('subscription_id'), []).append(identity)
+            for subscription in batch:
+                subscription_identities = identities_by_subscription.get(subscription['subscription_id'].lower(), [])
+                for identity in sorted(subscription_identities, key=resource_id_key):
+                    if not identity.get('name') or identity['name'].strip() == '':
+                        logger.warning(f"Se omitió una identidad con nombre vacío o nulo en suscripción: "
+                                       f"{subscription['display_name']}")
+                        continue
+                    federated_creds = sorted(credentials_by_identity.get(identity['id'].lower(), []),
+                                             key=resource_id_key)
+                    found = True
+                    yield from self._build_records(identity, federated_creds, subscription)
+        
+        if identity_name and not found and not self.failed_subscriptions:
+            logger.warning(f"No se encontró la identidad especificada: {identity_name}")
+    
+    def export_report(self, records: Iterable[Dict], filename: str,
+                      format_type: str = 'json') -> Tuple[int, Optional[str], int]:
+        """
+        Escribe los registros en `filename` según llegan y, a la vez, las tuplas de
+        credenciales sin duplicados en su fichero (ver credentials_tuples_filename).
+        
+        Si la generación falla a mitad, los ficheros se cierran con los registros ya
+        escritos: JSON Lines y CSV quedan válidos línea a línea y el Excel se guarda.
+        
+        Returns:
+            (registros escritos, fichero de tuplas o None si no se creó, tuplas únicas)
+        """
+        writer_class = REPORT_WRITERS[format_type]
+        report = writer_class(filename, REPORT_FIELDS, sheet_name='Federated_Identity_Credentials')
+        # Como antes: en JSON el fichero de tuplas se crea aunque no haya ninguna
+        tuples = CredentialTuplesWriter(writer_class(
+            credentials_tuples_filename(filename, format_type), CREDENTIAL_TUPLE_FIELDS,
+            sheet_name='Credentials_Tuples', create_empty=format_type == 'json'
+        ))
+        try:
+            for record in records:
+                report.write(record)
+                tuples.add(record)
+        except BaseException:
+            if report.count:
+                logger.warning(f"Reporte interrumpido: {filename} conserva los {report.count} registros "
+                               f"escritos hasta el fallo")
             raise
+        finally:
+            report.close()
+            if report.count:
+                tuples.close()
+        
+        if report.count:
+            logger.info(f"Reporte exportado a {format_type.upper()}: {filename} ({report.count} registros)")
+            if tuples.writer.count or tuples.writer.create_empty:
+                logger.info(f"Tuplas de credenciales exportadas a: {tuples.writer.filename} "
+                            f"({tuples.writer.count} tuplas únicas)")
+                return report.count, tuples.writer.filename, tuples.writer.count
+        return report.count, None, 0
+    
+    def export_to_json(self, data: List[Dict], filename: str):
+        """Exporta los datos a formato JSON."""
+        self._export(data, filename, 'json')
+    
+    def export_to_csv(self, data: List[Dict], filename: str):
+        """Exporta los datos a formato CSV."""
+        self._export(data, filename, 'csv')
     
     def export_to_excel(self, data: List[Dict], filename: str):
-        """Exporta los datos a formato Excel con formato mejorado."""
+        """Exporta los datos a formato Excel (cabecera en negrita y anchos de columna)."""
+        self._export(data, filename, 'excel')
+    
+    def _export(self, data: Iterable[Dict], filename: str, format_type: str):
         try:
-            df = pd.DataFrame(data)
-            
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Federated_Identity_Credentials', index=False)
-                
-                # Obtener el worksheet para formatear
-                worksheet = writer.sheets['Federated_Identity_Credentials']
-                
-                # Ajustar ancho de columnas
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except (AttributeError, TypeError):
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            logger.info(f"Reporte exportado a Excel: {filename}")
+            with REPORT_WRITERS[format_type](filename, REPORT_FIELDS, sheet_name='Federated_Identity_Credentials',
+                                             create_empty=True) as writer:
+                for record in data:
+                    writer.write(record)
+            logger.info(f"Reporte exportado a {format_type.upper()}: {filename}")
         except Exception as e:
-            logger.error(f"Error exportando a Excel: {e}")
+            logger.error(f"Error exportando a {format_type.upper()}: {e}")
             raise
-
-    def export_credentials_tuples(self, data: List[Dict], base_filename: str, format_type: str = 'json'):
+    
+    def export_credentials_tuples(self, data: Iterable[Dict], base_filename: str, format_type: str = 'json'):
         """
         Exporta solo las tuplas de credenciales federadas (credential_issuer, credential_subject, 
         credential_audiences, credential_type) sin duplicados.
         """
         try:
-            # Extraer solo las tuplas de credenciales, filtrando aquellas que no son 'N/A'
-            credentials_tuples = []
-            seen_tuples = set()
-            
-            for record in data:
-                # Solo incluir registros que tienen credenciales válidas (no 'N/A')
-                if (record.get('credential_issuer', 'N/A') != 'N/A' and 
-                    record.get('credential_subject', 'N/A') != 'N/A'):
-                    
-                    tuple_data = {
-                        'credential_issuer': record.get('credential_issuer', ''),
-                        'credential_subject': record.get('credential_subject', ''),
-                        'credential_audiences': record.get('credential_audiences', ''),
-                        'credential_type': record.get('credential_type', '')
-                    }
-                    
-                    # Crear una clave única para evitar duplicados
-                    tuple_key = (
-                        tuple_data['credential_issuer'],
-                        tuple_data['credential_subject'],
-                        tuple_data['credential_audiences'],
-                        tuple_data['credential_type']
-                    )
-                    
-                    if tuple_key not in seen_tuples:
-                        seen_tuples.add(tuple_key)
-                        credentials_tuples.append(tuple_data)
-            
-            # Generar nombre de archivo para las tuplas
-            name_parts = base_filename.rsplit('.', 1)
-            if len(name_parts) == 2:
-                tuples_filename = f"{name_parts[0]}_credentials_tuples.{name_parts[1]}"
-            else:
-                tuples_filename = f"{base_filename}_credentials_tuples.{format_type}"
-            
-            # Exportar según el formato
-            if format_type == 'json':
-                with open(tuples_filename, 'w', encoding='utf-8') as f:
-                    json.dump(credentials_tuples, f, indent=2, ensure_ascii=False)
-            elif format_type == 'csv':
-                if credentials_tuples:
-                    df = pd.DataFrame(credentials_tuples)
-                    df.to_csv(tuples_filename, index=False, encoding='utf-8')
-            elif format_type == 'excel':
-                if credentials_tuples:
-                    df = pd.DataFrame(credentials_tuples)
-                    with pd.ExcelWriter(tuples_filename, engine='openpyxl') as writer:
-                        df.to_excel(writer, sheet_name='Credentials_Tuples', index=False)
-                        
-                        # Formatear el Excel
-                        worksheet = writer.sheets['Credentials_Tuples']
-                        for column in worksheet.columns:
-                            max_length = 0
-                            column_letter = column[0].column_letter
-                            for cell in column:
-                                try:
-                                    if len(str(cell.value)) > max_length:
-                                        max_length = len(str(cell.value))
-                                except:
-                                    pass
-                            adjusted_width = min(max_length + 2, 50)
-                            worksheet.column_dimensions[column_letter].width = adjusted_width
+            tuples_filename = credentials_tuples_filename(base_filename, format_type)
+            tuples = CredentialTuplesWriter(REPORT_WRITERS[format_type](
+                tuples_filename, CREDENTIAL_TUPLE_FIELDS, sheet_name='Credentials_Tuples',
+                create_empty=format_type == 'json'
+            ))
+            try:
+                for record in data:
+                    tuples.add(record)
+            finally:
+                tuples.close()
             
-            logger.info(f"Tuplas de credenciales exportadas a: {tuples_filename} ({len(credentials_tuples)} tuplas únicas)")
+            logger.info(f"Tuplas de credenciales exportadas a: {tuples_filename} ({tuples.writer.count} tuplas únicas)")
             return tuples_filename
             
         except Exception as e:
@@ -598,6 +1513,12 @@ Ejemplos de uso:
   python federated-identity-credentials-report.py --subscription-id "12345678-1234-1234-1234-123456789012" --resource-group "mi-rg"
   python federated-identity-credentials-report.py --all-subscriptions --identity-name "mi-identity"
   python federated-identity-credentials-report.py --subscription-id "12345678-1234-1234-1234-123456789012" --format excel
+  python federated-identity-credentials-report.py --all-subscriptions --format jsonl
+  python federated-identity-credentials-report.py --all-subscriptions --resume
+  python federated-identity-credentials-report.py --all-subscriptions --max-workers 16
+  python federated-identity-credentials-report.py --all-subscriptions --subscription-workers 8
+  python federated-identity-credentials-report.py --all-subscriptions --backend resource-graph
+  python federated-identity-credentials-report.py --subscription-id "00000000-0000-0000-0000-000000000000" --arm-endpoint http://127.0.0.1:8080
         """
     )
     
@@ -629,9 +1550,10 @@ Ejemplos de uso:
     
     parser.add_argument(
         '--format',
-        choices=['json', 'csv', 'excel'],
+        choices=FORMATS,
         default='json',
-        help='Formato de salida del reporte (default: json)'
+        help='Formato de salida del reporte (default: json; jsonl = un registro por línea, '
+             'válido aunque el proceso se interrumpa)'
     )
     
     parser.add_argument(
@@ -645,6 +1567,61 @@ Ejemplos de uso:
         help='Usar autenticación de Azure CLI en lugar de Managed Identity'
     )
     
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f'Identidades consultadas en paralelo (default: {DEFAULT_MAX_WORKERS}; 1 = secuencial)'
+    )
+    
+    parser.add_argument(
+        '--backend',
+        choices=BACKENDS,
+        default='arm',
+        help='Origen de los datos: arm (una petición por identidad) o resource-graph '
+             '(consultas paginadas a Azure Resource Graph) (default: arm)'
+    )
+    
+    parser.add_argument(
+        '--subscription-workers',
+        type=int,
+        default=DEFAULT_SUBSCRIPTION_WORKERS,
+        help=f'Suscripciones procesadas en paralelo con --all-subscriptions, cada una con '
+             f'sus --max-workers (default: {DEFAULT_SUBSCRIPTION_WORKERS}; 1 = secuencial)'
+    )
+    
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help=f'Reintentos por petición ante throttling (429), 5xx o errores de red (default: {DEFAULT_MAX_RETRIES})'
+    )
+    
+    parser.add_argument(
+        '--arm-endpoint',
+        help='Endpoint de Azure Resource Manager (nubes soberanas o mock local, ej: http://127.0.0.1:8080)'
+    )
+    
+    parser.add_argument(
+        '--checkpoint',
+        default=DEFAULT_CHECKPOINT_FILE,
+        help=f'Journal de suscripciones e identidades completadas (default: {DEFAULT_CHECKPOINT_FILE}); '
+             f'se borra al terminar sin errores'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continuar desde el checkpoint de una ejecución anterior con los mismos parámetros, '
+             'sin repetir las suscripciones e identidades completadas'
+    )
+    
+    parser.add_argument(
+        '--no-checkpoint',
+        action='store_true',
+        help='No escribir el journal de checkpoint'
+    )
+    
     parser.add_argument(
         '--verbose',
         action='store_true',
@@ -663,61 +1640,127 @@ Ejemplos de uso:
     if args.all_subscriptions and args.subscription_id:
         logger.warning("Se especificó --subscription-id y --all-subscriptions. Se usará --all-subscriptions.")
     
+    if args.resume and args.no_checkpoint:
+        parser.error("--resume no es compatible con --no-checkpoint")
+    
+    checkpoint = None
+    records = None
     try:
+        # Journal de checkpoint (backend arm): las consultas de Resource Graph son pocas y se repiten
+        if args.backend == 'arm' and not args.no_checkpoint:
+            checkpoint = CheckpointJournal(args.checkpoint, {
+                'backend': args.backend,
+                'subscription_id': None if args.all_subscriptions else args.subscription_id,
+                'tenant_id': args.tenant_id,
+                'resource_group': args.resource_group,
+                'identity_name': args.identity_name,
+                # Otro endpoint (nube, mock) o credencial ve otros datos: no mezclar sus registros
+                'arm_endpoint': args.arm_endpoint.rstrip('/') if args.arm_endpoint else None,
+                'use_cli_auth': args.use_cli_auth,
+            }, resume=args.resume)
+        elif args.resume:
+            logger.warning("--resume solo aplica al backend arm: se consulta todo de nuevo")
+        
         # Crear el reporter
         reporter = FederatedIdentityReporter(
             subscription_id=args.subscription_id,
             use_cli_auth=args.use_cli_auth,
             all_subscriptions=args.all_subscriptions,
-            tenant_id=args.tenant_id
-        )
-        
-        # Generar el reporte
-        logger.info("Iniciando generación de reporte...")
-        report_data = reporter.generate_report(
-            resource_group_name=args.resource_group,
-            identity_name=args.identity_name
+            tenant_id=args.tenant_id,
+            max_workers=args.max_workers,
+            max_retries=args.max_retries,
+            arm_endpoint=args.arm_endpoint,
+            subscription_workers=args.subscription_workers,
+            backend=args.backend,
+            checkpoint=checkpoint
         )
         
-        if not report_data:
-            logger.warning("No se encontraron datos para el reporte")
-            return
-        
         # Determinar nombre del archivo de salida
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         if args.output:
             output_filename = args.output
         else:
-            extension = 'xlsx' if args.format == 'excel' else args.format
-            output_filename = f"federated_identity_credentials_report_{timestamp}.{extension}"
+            output_filename = f"federated_identity_credentials_report_{timestamp}.{FORMAT_EXTENSIONS[args.format]}"
         
-        # Exportar en el formato especificado
-        if args.format == 'json':
-            reporter.export_to_json(report_data, output_filename)
-        elif args.format == 'csv':
-            reporter.export_to_csv(report_data, output_filename)
-        elif args.format == 'excel':
-            reporter.export_to_excel(report_data, output_filename)
+        # Generar el reporte y exportarlo en streaming (registros y tuplas según se obtienen)
+        logger.info("Iniciando generación de reporte...")
+        start = time.perf_counter()
+        records = reporter.iter_report(
+            resource_group_name=args.resource_group,
+            identity_name=args.identity_name
+        )
+        total_records, tuples_filename, total_tuples = reporter.export_report(records, output_filename, args.format)
+        elapsed = time.perf_counter() - start
         
-        # Exportar tuplas de credenciales (si hay datos)
-        reporter.export_credentials_tuples(report_data, output_filename, args.format)
+        # Sin errores el checkpoint ya no hace falta; con errores se conserva para reintentar
+        # solo lo que falló con --resume
+        pending_work = bool(reporter.failed_subscriptions or reporter.failed_identities)
+        if checkpoint:
+            if pending_work:
+                checkpoint.close()
+            else:
+                checkpoint.remove()
+        
+        if not total_records:
+            logger.warning("No se encontraron datos para el reporte")
+            if reporter.failed_subscriptions:
+                sys.exit(1)
+            return
         
         # Mostrar resumen
         print(f"\n{'='*60}")
         print("RESUMEN DEL REPORTE")
         print(f"{'='*60}")
-        print(f"Total de registros: {len(report_data)}")
+        print(f"Total de registros: {total_records}")
         print(f"Archivo generado: {output_filename}")
+        if tuples_filename:
+            print(f"Tuplas de credenciales: {tuples_filename} ({total_tuples} únicas)")
         print(f"Formato: {args.format.upper()}")
+        stats = reporter.stats
+        if reporter.backend == 'resource-graph':
+            workers = "backend=resource-graph"
+        else:
+            workers = f"max-workers={reporter.max_workers}, subscription-workers={reporter.subscription_workers}"
+        print(f"Tiempo de consulta: {elapsed:.1f}s ({stats['requests']} llamadas a ARM, {workers}, "
+              f"{stats['throttled']} respuestas 429, {stats['retries']} reintentos)")
+        if stats['throttled']:
+            print(f"Concurrencia mínima por throttling: {stats['min_concurrency']}")
+        if reporter.failed_subscriptions:
+            print(f"Suscripciones con errores ({len(reporter.failed_subscriptions)}):")
+            for subscription, error in reporter.failed_subscriptions:
+                print(f"  - {subscription['display_name']} ({subscription['subscription_id']}): {error}")
+        if reporter.failed_identities:
+            print(f"Identidades con errores: {reporter.failed_identities} (detalle en el log)")
+        if checkpoint and (checkpoint.resumed_subscriptions or checkpoint.resumed_identities):
+            print(f"Reanudado del checkpoint: {checkpoint.resumed_subscriptions} suscripción(es) y "
+                  f"{checkpoint.resumed_identities} identidades sin volver a consultar")
+        if checkpoint and pending_work:
+            print(f"Checkpoint conservado: {checkpoint.path} (--resume reintenta solo lo que falló)")
         print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}")
         
     except KeyboardInterrupt:
         logger.info("Operación cancelada por el usuario")
+        _keep_checkpoint(checkpoint, records)
         sys.exit(1)
     except Exception as e:
         logger.error(f"Error ejecutando el script: {e}")
+        _keep_checkpoint(checkpoint, records)
         sys.exit(1)
 
+
+def _keep_checkpoint(checkpoint: Optional[CheckpointJournal], records: Optional[Iterator[Dict]] = None):
+    """
+    Cierra el journal tras un fallo e indica cómo continuar.
+    
+    Antes se cierra el generador del reporte, que cancela las consultas pendientes y espera
+    a los workers en curso: hasta entonces aún pueden registrar identidades en el journal.
+    """
+    if records is not None:
+        records.close()
+    if checkpoint and not checkpoint.closed:
+        checkpoint.close()
+        logger.info(f"Checkpoint guardado en {checkpoint.path}: repite el comando con --resume para continuar")
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Endpoint ARM simulado para probar federated-identity-credentials-report.py sin tenant
+
+Sirve las rutas que usa el reporte con datos sintéticos deterministas:
+- GET /subscriptions
+- GET /subscriptions/{id}/providers/Microsoft.ManagedIdentity/userAssignedIdentities (paginado)
+- GET /subscriptions/{id}/resourceGroups/{rg}/providers/Microsoft.ManagedIdentity/userAssignedIdentities
+- GET .../userAssignedIdentities/{nombre}/federatedIdentityCredentials
+- POST /providers/Microsoft.ResourceGraph/resources (Resource Graph, paginado con $skipToken)
+- GET /stats (peticiones, respuestas 429 y concurrencia máxima observada)
+
+Cada petición tarda --latency ms (como un round-trip a ARM) y, con --rate, un token
+bucket por suscripción (como ARM) devuelve 429 con Retry-After al superar las peticiones
+por segundo indicadas. Con --forbidden, las últimas suscripciones responden 403 (sin rol
+de lectura) para probar que el reporte aísla los fallos por suscripción.
+
+Resource Graph responde por defecto con filas generadas de los mismos datos sintéticos
+(solo se interpretan los filtros que genera el reporte). Con --arg-pages se sirven en su
+lugar páginas grabadas de un tenant real: un JSON {"identities": [respuesta, ...],
+"credentials": [respuesta, ...]} con las respuestas tal cual de la API REST, que el mock
+encadena con su propio $skipToken.
+
+Uso:
+  python mock-arm-endpoint.py --identities 2000 --latency 50
+  python mock-arm-endpoint.py --identities 2000 --latency 50 --rate 100
+  python mock-arm-endpoint.py --identities 200 --subscriptions 300 --forbidden 2
+  python mock-arm-endpoint.py --arg-pages resource-graph-pages.json --subscriptions 2
+
+  python federated-identity-credentials-report.py \\
+      --subscription-id 00000000-0000-0000-0000-000000000000 \\
+      --arm-endpoint http://127.0.0.1:8080 --max-workers 16
+
+Solo requiere la librería estándar.
+"""
+
+import argparse
+import json
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TENANT_ID = '11111111-1111-1111-1111-111111111111'
+# Tamaño de página del listado de identidades (ARM pagina con nextLink)
+PAGE_SIZE = 100
+
+SUBSCRIPTION_PATH = re.compile(r'^/subscriptions/([^/]+)/', re.IGNORECASE)
+IDENTITIES_PATH = re.compile(
+    r'^/subscriptions/([^/]+)(?:/resourceGroups/([^/]+))?'
+    r'/providers/Microsoft\.ManagedIdentity/userAssignedIdentities/?$', re.IGNORECASE
+)
+RESOURCE_GRAPH_PATH = '/providers/microsoft.resourcegraph/resources'
+# Filtros de las consultas KQL que genera el reporte
+KQL_RESOURCE_GROUP = re.compile(r"resourceGroup =~ '((?:[^'\\]|\\.)*)'")
+KQL_NAME = re.compile(r"\| where name =~ '((?:[^'\\]|\\.)*)'")
+# Filas por página de Resource Graph si la petición no indica $top
+RESOURCE_GRAPH_DEFAULT_TOP = 100
+CREDENTIALS_PATH = re.compile(
+    r'^/subscriptions/([^/]+)/resourceGroups/([^/]+)/providers/Microsoft\.ManagedIdentity'
+    r'/userAssignedIdentities/([^/]+)/federatedIdentityCredentials/?$', re.IGNORECASE
+)
+
+
+def subscription_ids(count):
+    """IDs de suscripción sintéticos: 00000000-0000-0000-0000-00000000000N"""
+    return [f"00000000-0000-0000-0000-{i:012d}" for i in range(count)]
+
+
+def identity(subscription_id, index):
+    """Identidad sintética número `index` (20 grupos de recursos)"""
+    name = f"id-{index:05d}"
+    resource_group = f"rg-{index % 20:02d}"
+    return {
+        'id': f"/subscriptions/{subscription_id}/resourcegroups/{resource_group}/providers/"
+              f"Microsoft.ManagedIdentity/userAssignedIdentities/{name}",
+        'name': name,
+        'type': 'Microsoft.ManagedIdentity/userAssignedIdentities',
+        'location': 'westeurope',
+        'tags': {},
+        'properties': {
+            'tenantId': TENANT_ID,
+            'principalId': f"{index:08d}-0000-0000-0000-{0:012d}",
+            'clientId': f"{index:08d}-1111-0000-0000-{0:012d}",
+        },
+    }
+
+
+def federated_credentials(identity_id, index):
+    """0, 1 o 2 credenciales según la identidad; los subjects se repiten entre identidades"""
+    credentials = []
+    for n in range(index % 3):
+        name = f"github-{n}"
+        credentials.append({
+            'id': f"{identity_id}/federatedIdentityCredentials/{name}",
+            'name': name,
+            'type': 'Microsoft.ManagedIdentity/userAssignedIdentities/federatedIdentityCredentials',
+            'properties': {
+                'issuer': 'https://token.actions.githubusercontent.com',
+                'subject': f"repo:contoso/repo-{index % 50}:environment:{('dev', 'prod')[n]}",
+                'audiences': ['api://AzureADTokenExchange'],
+                'description': '',
+            },
+        })
+    return credentials
+
+
+def resource_graph_rows(server, request):
+    """Filas sintéticas de una consulta de Resource Graph (identidades o credenciales)"""
+    query = request.get('query', '')
+    subscriptions = [sub for sub in request.get('subscriptions') or server.subscriptions
+                     if sub in server.subscriptions and sub not in server.forbidden]
+    resource_group = KQL_RESOURCE_GROUP.search(query)
+    name = KQL_NAME.search(query)
+    rows = []
+    for subscription_id in subscriptions:
+        for index in range(server.identities):
+            uai = identity(subscription_id, index)
+            if resource_group and uai['id'].split('/')[4] != resource_group.group(1).lower():
+                continue
+            if 'federatedidentitycredentials' in query.lower():
+                # Resource Graph devuelve el tipo en minúsculas y el nombre como identidad/credencial
+                rows.extend({
+                    'id': cred['id'],
+                    'name': f"{uai['name']}/{cred['name']}",
+                    'type': cred['type'].lower(),
+                    'issuer': cred['properties']['issuer'],
+                    'subject': cred['properties']['subject'],
+                    'audiences': cred['properties']['audiences'],
+                    'description': cred['properties']['description'],
+                } for cred in federated_credentials(uai['id'], index))
+            elif not name or uai['name'].lower() == name.group(1).lower():
+                rows.append({
+                    'id': uai['id'],
+                    'name': uai['name'],
+                    'location': uai['location'],
+                    'subscriptionId': subscription_id,
+                    'principalId': uai['properties']['principalId'],
+                    'clientId': uai['properties']['clientId'],
+                    'tenantId': uai['properties']['tenantId'],
+                })
+    return sorted(rows, key=lambda row: row['id'])
+
+
+def resource_graph_page(server, request):
+    """Respuesta de Resource Graph para la página indicada por $skipToken"""
+    options = request.get('options') or {}
+    skip = int(options.get('$skipToken') or 0)
+    if server.arg_pages is not None:
+        # Páginas grabadas: el $skipToken es el número de página
+        kind = 'credentials' if 'federatedidentitycredentials' in request.get('query', '').lower() else 'identities'
+        pages = server.arg_pages.get(kind, [])
+        body = dict(pages[skip]) if skip < len(pages) else {'totalRecords': 0, 'count': 0, 'data': []}
+        body.pop('$skipToken', None)
+        if skip + 1 < len(pages):
+            body['$skipToken'] = str(skip + 1)
+        return body
+
+    top = int(options.get('$top') or RESOURCE_GRAPH_DEFAULT_TOP)
+    rows = resource_graph_rows(server, request)
+    page = rows[skip:skip + top]
+    body = {'totalRecords': len(rows), 'count': len(page), 'data': page,
+            'facets': [], 'resultTruncated': 'false'}
+    if skip + top < len(rows):
+        body['$skipToken'] = str(skip + top)
+    return body
+
+
+class TokenBucket:
+    """Limitador de peticiones por segundo (como el token bucket de ARM)"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """0 si hay token disponible; si no, segundos hasta el siguiente (Retry-After)"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+class MockArmHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive: el pool de conexiones del SDK se reutiliza
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/stats':
+            with self.server.lock:
+                self.send_json(200, dict(self.server.stats))
+            return
+        self.handle_request(url, self.route)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if url.path.rstrip('/').lower() != RESOURCE_GRAPH_PATH:
+            self.send_json(404, {'error': {'code': 'NotFound', 'message': f"Ruta no simulada: {url.path}"}})
+            return
+        self.handle_request(url, lambda url: self.send_json(200, resource_graph_page(self.server, body)))
+
+    def handle_request(self, url, route):
+        """Latencia, límite de peticiones y estadísticas comunes a todas las rutas"""
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.stats['requests'] += 1
+            server.stats['peak_concurrency'] = max(server.stats['peak_concurrency'], server.active)
+        try:
+            match = SUBSCRIPTION_PATH.match(url.path)
+            bucket = server.buckets.get(match.group(1) if match else None)
+            wait = bucket.take() if bucket else 0
+            if wait:
+                with server.lock:
+                    server.stats['throttled'] += 1
+                seconds = max(1, math.ceil(wait))
+                # Resource Graph indica la espera con su cuota por usuario en lugar de Retry-After
+                headers = ({'x-ms-user-quota-remaining': '0', 'x-ms-user-quota-resets-after': f"00:00:{seconds:02d}"}
+                           if url.path.lower().startswith('/providers/microsoft.resourcegraph')
+                           else {'Retry-After': str(seconds)})
+                self.send_json(429, {'error': {'code': 'TooManyRequests', 'message': 'Mock throttling'}}, headers)
+                return
+            time.sleep(server.latency)
+            route(url)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def route(self, url):
+        server = self.server
+        path = url.path
+        if path.rstrip('/') == '/subscriptions':
+            self.send_json(200, {'value': [
+                {'id': f"/subscriptions/{sub}", 'subscriptionId': sub, 'tenantId': TENANT_ID,
+                 'displayName': f"Mock subscription {i}", 'state': 'Enabled'}
+                for i, sub in enumerate(server.subscriptions)
+            ]})
+            return
+
+        match = SUBSCRIPTION_PATH.match(path)
+        if match and match.group(1) in server.forbidden:
+            self.send_json(403, {'error': {'code': 'AuthorizationFailed',
+                                           'message': f"Sin permisos de lectura en {match.group(1)}"}})
+            return
+
+        match = IDENTITIES_PATH.match(path)
+        if match and match.group(1) in server.subscriptions:
+            subscription_id, resource_group = match.groups()
+            indexes = [i for i in range(server.identities)
+                       if not resource_group or f"rg-{i % 20:02d}" == resource_group.lower()]
+            skip = int(parse_qs(url.query).get('$skiptoken', ['0'])[0])
+            body = {'value': [identity(subscription_id, i) for i in indexes[skip:skip + PAGE_SIZE]]}
+            if skip + PAGE_SIZE < len(indexes):
+                host = self.headers.get('Host', f"127.0.0.1:{server.server_port}")
+                body['nextLink'] = f"http://{host}{path}?api-version=2023-01-31&$skiptoken={skip + PAGE_SIZE}"
+            self.send_json(200, body)
+            return
+
+        match = CREDENTIALS_PATH.match(path)
+        if match and match.group(1) in server.subscriptions:
+            subscription_id, resource_group, name = match.groups()
+            index = int(name.rsplit('-', 1)[-1]) if name.startswith('id-') else -1
+            if not 0 <= index < server.identities or f"rg-{index % 20:02d}" != resource_group.lower():
+                self.send_json(404, {'error': {'code': 'ResourceNotFound', 'message': f"{name} no existe"}})
+                return
+            identity_id = identity(subscription_id, index)['id']
+            self.send_json(200, {'value': federated_credentials(identity_id, index)})
+            return
+
+        self.send_json(404, {'error': {'code': 'NotFound', 'message': f"Ruta no simulada: {path}"}})
+
+
+def create_server(port=8080, identities=2000, subscriptions=1, latency=50, rate=0, burst=50,
+                  forbidden=0, arg_pages=None):
+    """
+    Servidor del mock sin arrancar (serve_forever), también para usarlo desde tests
+
+    Con port=0 se escoge un puerto libre (server.server_port); latency va en ms y
+    arg_pages es el JSON de páginas grabadas ya cargado.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockArmHandler)
+    server.daemon_threads = True
+    server.subscriptions = subscription_ids(subscriptions)
+    server.identities = identities
+    server.latency = latency / 1000
+    # Sin suscripción en la ruta (listado de suscripciones) se usa el bucket de la clave None
+    server.buckets = ({key: TokenBucket(rate, burst) for key in server.subscriptions + [None]}
+                      if rate > 0 else {})
+    server.arg_pages = arg_pages
+    server.forbidden = set(server.subscriptions[len(server.subscriptions) - forbidden:]) if forbidden > 0 else set()
+    server.lock = threading.Lock()
+    server.active = 0
+    server.stats = {'requests': 0, 'throttled': 0, 'peak_concurrency': 0}
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Endpoint ARM simulado para el reporte de Federated Identity Credentials')
+    parser.add_argument('--port', type=int, default=8080, help='Puerto (default: 8080)')
+    parser.add_argument('--identities', type=int, default=2000, help='Identidades por suscripción (default: 2000)')
+    parser.add_argument('--subscriptions', type=int, default=1, help='Suscripciones simuladas (default: 1)')
+    parser.add_argument('--latency', type=float, default=50, help='Latencia por petición en ms (default: 50)')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Peticiones por segundo y suscripción antes de responder 429 (default: 0 = sin límite)')
+    parser.add_argument('--burst', type=int, default=50, help='Ráfaga permitida por el límite (default: 50)')
+    parser.add_argument('--forbidden', type=int, default=0,
+                        help='Últimas N suscripciones que responden 403 (default: 0)')
+    parser.add_argument('--arg-pages', help='JSON con páginas grabadas de Resource Graph a servir')
+    args = parser.parse_args()
+
+    arg_pages = None
+    if args.arg_pages:
+        with open(args.arg_pages, 'r', encoding='utf-8') as f:
+            arg_pages = json.load(f)
+    server = create_server(args.port, args.identities, args.subscriptions, args.latency, args.rate,
+                           args.burst, args.forbidden, arg_pages)
+
+    print(f"Mock ARM en http://127.0.0.1:{args.port} ({args.subscriptions} suscripción(es), "
+          f"{args.identities} identidades, {args.latency:.0f} ms/petición"
+          + (f", límite {args.rate:g} req/s por suscripción" if args.rate > 0 else '')
+          + (f", {args.forbidden} con 403" if args.forbidden > 0 else '') + "). Ctrl+C para salir")
+    print(f"Suscripciones: {', '.join(server.subscriptions)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\nPeticiones: {server.stats['requests']} | 429: {server.stats['throttled']} | "
+              f"concurrencia máxima: {server.stats['peak_concurrency']}")
+
+
+if __name__ == '__main__':
+    main()
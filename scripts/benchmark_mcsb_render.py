@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark del build de la sección Azure/Security según MCSB_RENDER_MODE
+Compara 'read_excel' (mkdocs-table-reader parsea los xlsx en cada build) con 'static'
+(tablas Markdown pre-renderizadas por los hooks splitMCSB.py / splitMCSBv2.py)
+
+Uso (desde la raíz del repo):
+  python scripts/benchmark_mcsb_render.py [--runs 3]
+
+Requiere mkdocs y mkdocs-table-reader-plugin (requirements.txt). No necesita red:
+usa la copia local del workbook v1 (MCSB_OFFLINE=1).
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ['read_excel', 'static']
+
+MKDOCS_CONFIG = """\
+site_name: MCSB render benchmark
+docs_dir: docs
+site_dir: site
+plugins:
+  - table-reader
+"""
+
+GENERATE_PAGES = """\
+import importlib.util
+import sys
+sys.path.insert(0, 'scripts')  # Igual que mkdocs al cargar los hooks
+for hook in ('splitMCSB', 'splitMCSBv2'):
+    spec = importlib.util.spec_from_file_location(hook, f'scripts/{hook}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.on_pre_build(None)
+"""
+
+
+def prepare_workspace(repo_root, workspace, mode):
+    """Copia scripts + sección Azure/Security y genera las páginas en el modo indicado"""
+    shutil.copytree(os.path.join(repo_root, 'scripts'), os.path.join(workspace, 'scripts'))
+    shutil.copytree(os.path.join(repo_root, 'docs', 'Azure', 'Security'),
+                    os.path.join(workspace, 'docs', 'Azure', 'Security'))
+    shutil.copytree(os.path.join(repo_root, 'docs', 'assets', 'tables'),
+                    os.path.join(workspace, 'docs', 'assets', 'tables'))
+    with open(os.path.join(workspace, 'mkdocs.yml'), 'w', encoding='utf-8') as f:
+        f.write(MKDOCS_CONFIG)
+
+    env = dict(os.environ, MCSB_RENDER_MODE=mode, MCSB_OFFLINE='1')
+    subprocess.run([sys.executable, '-c', GENERATE_PAGES], cwd=workspace, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+
+
+def time_build(workspace):
+    """Ejecuta `mkdocs build` en el workspace y devuelve la duración en segundos"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'mkdocs', 'build', '--quiet'], cwd=workspace,
+                   check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de build MCSB: read_excel vs static')
+    parser.add_argument('--runs', type=int, default=3, help='Builds por modo (default: 3)')
+    args = parser.parse_args()
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = {}
+
+    for mode in MODES:
+        with tempfile.TemporaryDirectory() as workspace:
+            prepare_workspace(repo_root, workspace, mode)
+            results[mode] = [time_build(workspace) for _ in range(args.runs)]
+
+    print(f"\n{'='*70}")
+    print(f"Build Azure/Security ({args.runs} runs por modo)")
+    print(f"{'='*70}")
+    for mode, times in results.items():
+        print(f"  {mode:<12} mejor: {min(times):.2f}s | media: {sum(times)/len(times):.2f}s")
+    speedup = min(results['read_excel']) / min(results['static'])
+    print(f"\n  static es {speedup:.1f}x más rápido que read_excel\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark de create_excel (generate_mcsb_v2_hierarchical.py) con controles sintéticos
+Mide tiempo y pico de RSS en un proceso limpio por ejecución
+
+Uso (desde la raíz del repo):
+  python scripts/benchmark_mcsb_v2_excel.py                  # versión actual
+  python scripts/benchmark_mcsb_v2_excel.py --ref HEAD~1     # comparar con otra revisión
+  python scripts/benchmark_mcsb_v2_excel.py --controls 10000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+GENERATOR = "scripts/generate_mcsb_v2_hierarchical.py"
+
+# Se ejecuta en un subproceso para que el pico de RSS sea solo el de esta medición
+RUNNER = """\
+import importlib.util, json, resource, sys, time
+spec = importlib.util.spec_from_file_location('generator', sys.argv[1])
+g = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(g)
+
+controls = []
+n = int(sys.argv[3])
+headers = json.loads(sys.argv[4])
+for i in range(n):
+    _, _, prefix = g.DOMAINS[i % len(g.DOMAINS)]
+    parent = f"{prefix}-{i // len(g.DOMAINS) // 4 + 1}"
+    is_child = i % 4 != 0
+    control = {h: f"{h} " + "lorem ipsum dolor sit amet " * 8 for h in headers}
+    control.update({
+        'Control ID': parent,
+        'Implementation ID': f"{parent}.{i % 4}" if is_child else '',
+        'Control Type': 'Child' if is_child else 'Parent',
+        'Azure Policy': [(f"Policy {j}", f"https://portal.azure.com/policy/{j}") for j in range(i % 3)],
+    })
+    controls.append(control)
+
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+g.create_excel(controls, sys.argv[2])
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'seconds': elapsed, 'peak_rss_kb': peak, 'baseline_rss_kb': baseline}))
+"""
+
+HEADERS = [
+    'Control ID', 'Implementation ID', 'Control Name', 'Control Type', 'Core Pillar', 'Azure Policy',
+    'Security Principle', 'Risk to mitigate', 'MITRE ATT&CK',
+    'Implementation example', 'Criticality',
+    'NIST SP 800-53 Rev.5', 'PCI-DSS v4', 'CIS Controls v8.1',
+    'NIST CSF v2.0', 'ISO 27001:2022', 'SOC 2'
+]
+
+
+def run(generator_path, controls):
+    """Ejecuta create_excel en un subproceso y devuelve las métricas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'bench.xlsx')
+        result = subprocess.run(
+            [sys.executable, '-c', RUNNER, generator_path, output, str(controls), json.dumps(HEADERS)],
+            check=True, capture_output=True, text=True
+        )
+        metrics = json.loads(result.stdout.strip().splitlines()[-1])
+        metrics['size_kb'] = os.path.getsize(output) / 1024
+        return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de create_excel con controles sintéticos')
+    parser.add_argument('--controls', type=int, default=10000, help='Número de controles (default: 10000)')
+    parser.add_argument('--ref', help='Revisión git con la que comparar (ej: HEAD~1)')
+    args = parser.parse_args()
+
+    targets = [('actual', GENERATOR)]
+    tmp_files = []
+    if args.ref:
+        source = subprocess.run(['git', 'show', f"{args.ref}:{GENERATOR}"],
+                                check=True, capture_output=True, text=True).stdout
+        tmp = tempfile.NamedTemporaryFile('w', suffix='.py', delete=False, encoding='utf-8')
+        tmp.write(source)
+        tmp.close()
+        tmp_files.append(tmp.name)
+        targets.insert(0, (args.ref, tmp.name))
+
+    try:
+        print(f"\n{'='*70}")
+        print(f"create_excel con {args.controls} controles sintéticos")
+        print(f"{'='*70}")
+        for label, path in targets:
+            m = run(path, args.controls)
+            print(f"  {label:<10} tiempo: {m['seconds']:.2f}s | pico RSS: {m['peak_rss_kb']/1024:.0f} MB "
+                  f"(+{(m['peak_rss_kb'] - m['baseline_rss_kb'])/1024:.0f} MB sobre la base) | "
+                  f"xlsx: {m['size_kb']:.0f} KB")
+        print()
+    finally:
+        for path in tmp_files:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de PostValidator.validate() sobre un post sintético grande
+Mezcla párrafos, listas, tablas, encabezados y bloques de código (con y sin lenguaje)
+
+Con --startup mide en su lugar el caso de pre-commit: validar un post normal de punta
+a punta (arranque del intérprete + imports + validación) y el desglose de
+`python -X importtime` de los imports del script.
+
+Uso (desde la raíz del repo):
+  python scripts/benchmark_validate_post.py                  # versión actual
+  python scripts/benchmark_validate_post.py --ref HEAD~1     # comparar con otra revisión
+  python scripts/benchmark_validate_post.py --lines 200000 --runs 5
+  python scripts/benchmark_validate_post.py --startup --ref HEAD~1 --runs 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+VALIDATOR = "scripts/validate_post.py"
+# Módulos que importa el punto de entrada (se copian junto a él al comparar con --ref)
+VALIDATOR_MODULES = ["scripts/post_validator.py", "scripts/post_index.py", "scripts/post_report.py",
+                     "scripts/post_watch.py"]
+
+# Se ejecuta en un subproceso por versión para no mezclar módulos ni caches de `re`
+RUNNER = """\
+import importlib.util, json, os, sys, time
+from pathlib import Path
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[1])))
+spec = importlib.util.spec_from_file_location('validate_post', sys.argv[1])
+v = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(v)
+
+times = []
+for _ in range(int(sys.argv[3])):
+    validator = v.PostValidator(Path(sys.argv[2]))
+    start = time.perf_counter()
+    validator.validate()
+    times.append(time.perf_counter() - start)
+print(json.dumps({'times': times, 'errors': validator.errors, 'warnings': validator.warnings}))
+"""
+
+FRONTMATTER = """\
+---
+draft: false
+date: 2025-01-01
+authors:
+  - rfernandezdo
+categories:
+  - Azure
+tags:
+  - Benchmark
+---
+
+# Post sintético para benchmark
+
+## Resumen
+
+Post generado para medir el validador.
+"""
+
+# Bloque de ~25 líneas que se repite hasta alcanzar el tamaño pedido
+SECTION = """\
+## Sección {n}
+
+Texto de la sección {n} con **negrita**, `código inline` y un [enlace](https://example.com/{n}).
+Segunda línea del párrafo para que no todo sean listas.
+
+- Elemento uno
+- Elemento dos
+  - Anidado
+1. Paso numerado
+2. Otro paso
+
+**Puntos clave:**
+- Lista pegada al texto (MD032)
+
+| Columna | Valor |
+|---------|-------|
+| a | {n} |
+
+```bash
+az group list --query "[?name=='rg-{n}']"
+# comentario dentro del bloque
+- no es una lista
+```
+
+```
+bloque sin lenguaje
+```
+
+"""
+
+
+def synthetic_post(lines):
+    """Genera un post de aproximadamente `lines` líneas"""
+    parts = [FRONTMATTER]
+    total = FRONTMATTER.count('\n')
+    n = 0
+    while total < lines:
+        section = SECTION.format(n=n)
+        parts.append(section)
+        total += section.count('\n')
+        n += 1
+    parts.append("## Referencias\n\n- https://example.com\n")
+    return ''.join(parts)
+
+
+def run(validator_path, post_path, runs):
+    """Ejecuta validate() en un subproceso y devuelve tiempos y resultados"""
+    result = subprocess.run(
+        [sys.executable, '-c', RUNNER, validator_path, post_path, str(runs)],
+        check=True, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+# Como en una máquina de desarrollo: los módulos importados dejan su bytecode en __pycache__
+STARTUP_ENV = {key: value for key, value in os.environ.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+
+
+def time_commands(commands, runs):
+    """Mejor tiempo (s) de `runs` ejecuciones de cada proceso, o None si falla
+
+    Las ejecuciones se alternan entre comandos (una ronda de cada uno cada vez): la deriva
+    de la máquina (otros procesos, frecuencia de CPU) afecta a todos por igual.
+    """
+    best = [None] * len(commands)
+    failed = set()
+    for _ in range(runs):
+        for i, command in enumerate(commands):
+            if i in failed:
+                continue
+            start = time.perf_counter()
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=STARTUP_ENV)
+            elapsed = time.perf_counter() - start
+            if result.returncode not in (0, 1):  # 1 = post inválido, también es una ejecución completa
+                failed.add(i)
+            else:
+                best[i] = elapsed if best[i] is None else min(best[i], elapsed)
+    return [None if i in failed else elapsed for i, elapsed in enumerate(best)]
+
+
+def import_times(validator_path, post_path):
+    """Imports de primer nivel del script según -X importtime: [(módulo, ms acumulados)]
+
+    Se excluyen los que ya carga el intérprete antes del script (site, encodings...).
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', validator_path, post_path, '--no-cache'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=STARTUP_ENV)
+    preloaded = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'pass'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=STARTUP_ENV).stderr
+    preloaded = {line.split('|')[2].strip() for line in preloaded.splitlines() if line.count('|') == 2}
+
+    # importtime lista cada módulo después de los que importa él; sangría = profundidad.
+    # Los imports de los módulos del propio validador se desglosan en lugar de agruparse.
+    own_modules = {os.path.splitext(os.path.basename(path))[0] for path in VALIDATOR_MODULES}
+    modules = []
+    children = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entry = (name.strip(), int(parts[1]) / 1000)
+        if depth == 1:
+            children.append(entry)
+        elif depth == 0 and entry[0] not in preloaded:
+            if entry[0] in own_modules:
+                modules.extend(child for child in children if child[0] not in preloaded)
+            else:
+                modules.append(entry)
+        if depth == 0:
+            children = []
+    return modules
+
+
+def startup(targets, runs):
+    """Caso pre-commit: un post normal validado de punta a punta"""
+    with tempfile.TemporaryDirectory() as tmp:
+        post_path = os.path.join(tmp, '20250101_synthetic_benchmark.md')
+        with open(post_path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_post(150))
+        cache_path = os.path.join(tmp, 'cache.sqlite')
+
+        commands = [[sys.executable, '-c', 'pass']]
+        for label, path in targets:
+            # Una cache por versión; la primera ejecución la llena (cache caliente)
+            cached = [sys.executable, path, post_path, '--cache-file', f"{cache_path}.{len(commands)}"]
+            subprocess.run(cached, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=STARTUP_ENV)
+            commands += [[sys.executable, path, post_path, '--no-cache'], cached]
+        baseline, *times = time_commands(commands, runs)
+
+        print(f"\n{'='*70}")
+        print(f"Validar 1 post de punta a punta (mejor de {runs}, ejecuciones alternadas)")
+        print(f"{'='*70}")
+        print(f"  {'python -c pass':<28} {baseline * 1000:7.1f} ms (arranque del intérprete)")
+
+        for i, (label, _) in enumerate(targets):
+            no_cache, cached = times[2 * i:2 * i + 2]
+            for mode, elapsed in (('--no-cache', no_cache), ('cache caliente', cached)):
+                if elapsed is None:
+                    print(f"  {label + ' ' + mode:<28} n/a (no soportado en esta versión)")
+                else:
+                    print(f"  {label + ' ' + mode:<28} {elapsed * 1000:7.1f} ms "
+                          f"(+{(elapsed - baseline) * 1000:.1f} ms sobre el intérprete)")
+
+        for label, path in targets:
+            modules = sorted(import_times(path, post_path), key=lambda item: item[1], reverse=True)
+            print(f"\n  Imports de {label} (-X importtime, acumulado): "
+                  f"{sum(ms for _, ms in modules):.1f} ms")
+            for name, ms in modules[:8]:
+                print(f"    {name:<30} {ms:6.1f} ms")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark del validador sobre un post sintético')
+    parser.add_argument('--lines', type=int, default=50000, help='Líneas del post sintético (default: 50000)')
+    parser.add_argument('--runs', type=int, default=5, help='Repeticiones por versión (default: 5)')
+    parser.add_argument('--ref', help='Revisión git con la que comparar (ej: HEAD~1)')
+    parser.add_argument('--startup', action='store_true',
+                        help='Medir arranque + validación de un post normal (caso pre-commit)')
+    args = parser.parse_args()
+
+    targets = [('actual', VALIDATOR)]
+    with tempfile.TemporaryDirectory() as tmp:
+        post_path = os.path.join(tmp, '20250101_synthetic_benchmark.md')
+        with open(post_path, 'w', encoding='utf-8') as f:
+            f.write(synthetic_post(args.lines))
+
+        if args.ref:
+            # Copia de la revisión en un directorio propio (el punto de entrada importa sus módulos)
+            ref_dir = os.path.join(tmp, 'ref')
+            os.makedirs(ref_dir)
+            for path in [VALIDATOR] + VALIDATOR_MODULES:
+                source = subprocess.run(['git', 'show', f"{args.ref}:{path}"], capture_output=True, text=True)
+                if source.returncode == 0:
+                    with open(os.path.join(ref_dir, os.path.basename(path)), 'w', encoding='utf-8') as f:
+                        f.write(source.stdout)
+            targets.insert(0, (args.ref, os.path.join(ref_dir, os.path.basename(VALIDATOR))))
+
+        if args.startup:
+            startup(targets, args.runs)
+            return
+
+        print(f"\n{'='*70}")
+        print(f"PostValidator.validate() sobre un post de {args.lines} líneas ({args.runs} runs)")
+        print(f"{'='*70}")
+        results = {}
+        for label, path in targets:
+            results[label] = run(path, post_path, args.runs)
+            times = results[label]['times']
+            print(f"  {label:<10} mejor: {min(times)*1000:.1f} ms | media: {sum(times)/len(times)*1000:.1f} ms")
+
+        if args.ref:
+            base, current = results[args.ref], results['actual']
+            speedup = min(base['times']) / min(current['times'])
+            same = (base['errors'], base['warnings']) == (current['errors'], current['warnings'])
+            print(f"\n  actual es {speedup:.1f}x más rápido que {args.ref}")
+            print(f"  Resultados idénticos: {'sí' if same else 'NO'}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,12 +6,27 @@ Incluye Azure Policy mapping de mcsb-v2-controls-policy-mapping
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.comments import Comment
+from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.dimensions import SheetFormatProperties
 import re
+import os
+import sys
+import json
 import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# URL base de las páginas MCSB v2 (sobrescribible con --base-url para servir HTML guardado en local)
+BASE_URL = "https://learn.microsoft.com/en-us/security/benchmark/azure"
 
 # Cache global de Azure Policies (con URLs)
 AZURE_POLICIES_CACHE = {}  # {control_id: [(name, url), ...]}
@@ -38,6 +53,244 @@ DOMAINS = [
 # Mapeo de prefix → domain_slug para hyperlinks
 DOMAIN_SLUG_MAP = {prefix: slug for _, slug, prefix in DOMAINS}
 
+class TokenBucket:
+    """Rate limiter token bucket compartido entre hilos (sustituye al sleep fijo entre dominios)"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate  # tokens por segundo (<= 0 desactiva el límite)
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+# Rate limiter global para todas las peticiones HTTP (configurable con --rate/--burst)
+RATE_LIMITER = TokenBucket(rate=1.0)
+
+class HttpSession:
+    """Sesión HTTP compartida: pool de conexiones keep-alive, compresión, reintentos y métricas
+
+    Los reintentos (429/5xx) usan backoff exponencial y respetan la cabecera Retry-After.
+    """
+
+    def __init__(self, pool_size=16, retries=5, backoff_factor=1.0, timeout=30):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'User-Agent': 'rfernandezdo.github.io MCSB v2 generator',
+        })
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET', 'HEAD'],
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.retries = retries
+        self.metrics = []  # [(url, status, segundos, bytes, reintentos)]
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        """GET con rate limiting; registra tiempo total y reintentos por petición"""
+        RATE_LIMITER.acquire()
+        start = time.perf_counter()
+        status = 'error'
+        size = 0
+        retries = 0
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            status = response.status_code
+            size = len(response.content)
+            # urllib3 deja en la respuesta el Retry usado, con un elemento por reintento
+            history = getattr(getattr(response.raw, 'retries', None), 'history', None)
+            retries = len(history) if history else 0
+            return response
+        except requests.exceptions.RetryError:
+            retries = self.retries  # Reintentos agotados
+            raise
+        finally:
+            with self.lock:
+                self.metrics.append((url, status, time.perf_counter() - start, size, retries))
+
+    def print_metrics(self):
+        """Imprime resumen de tiempos de las peticiones realizadas"""
+        if not self.metrics:
+            return
+        times = sorted(m[2] for m in self.metrics)
+        total_bytes = sum(m[3] for m in self.metrics)
+        not_modified = sum(1 for m in self.metrics if m[1] == 304)
+        errors = sum(1 for m in self.metrics if m[1] == 'error' or (isinstance(m[1], int) and m[1] >= 400))
+        retries = sum(m[4] for m in self.metrics)
+        print(f"\n{'='*80}")
+        print("Métricas HTTP")
+        print(f"{'='*80}")
+        print(f"  Peticiones: {len(times)} ({not_modified} no modificadas, {errors} con error, {retries} reintentos)")
+        print(f"  Tiempo total: {sum(times):.2f}s | medio: {sum(times)/len(times):.3f}s | "
+              f"p50: {times[len(times)//2]:.3f}s | máx: {times[-1]:.3f}s")
+        print(f"  Descargado: {total_bytes/1024:.1f} KB")
+        for url, status, elapsed, _, _ in sorted(self.metrics, key=lambda m: m[2], reverse=True)[:3]:
+            print(f"    {elapsed:.3f}s [{status}] {url}")
+
+# Sesión HTTP global compartida por todas las descargas
+HTTP_SESSION = HttpSession()
+
+class HttpCache:
+    """Cache HTTP en disco con revalidación condicional (ETag / Last-Modified)
+
+    Estructura:
+      entries/<sha256(url)>.json  -> url, etag, last_modified, blob
+      blobs/<sha256(body)>        -> cuerpo de la respuesta (content-addressed)
+    """
+
+    def __init__(self, cache_dir, max_bytes=50 * 1024 * 1024, offline=False):
+        self.cache_dir = cache_dir
+        self.entries_dir = os.path.join(cache_dir, 'entries')
+        self.blobs_dir = os.path.join(cache_dir, 'blobs')
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.lock = threading.Lock()
+        os.makedirs(self.entries_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self.evict()  # Aplica el límite aunque esta ejecución solo revalide
+
+    def _entry_path(self, url):
+        return os.path.join(self.entries_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _load(self, url):
+        """Devuelve (entry, body) o (None, None) si no está en cache"""
+        entry_path = self._entry_path(url)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(os.path.join(self.blobs_dir, entry['blob']), 'rb') as f:
+                body = f.read()
+            os.utime(entry_path)  # Marca de uso para la eviction LRU
+        except (OSError, ValueError, KeyError):
+            return None, None
+        return entry, body
+
+    def _store(self, url, response):
+        body = response.content
+        blob = hashlib.sha256(body).hexdigest()
+        blob_path = os.path.join(self.blobs_dir, blob)
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'blob': blob,
+            'fetched_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        # Blob, entrada y eviction bajo el mismo lock: si no, la eviction de otro hilo
+        # borra como huérfano un blob cuya entrada aún no se ha escrito
+        with self.lock:
+            if not os.path.exists(blob_path):
+                self._write_atomic(blob_path, body)
+            self._write_atomic(self._entry_path(url), json.dumps(entry, indent=2).encode('utf-8'))
+            self._evict_locked()
+
+    def get(self, url):
+        """Devuelve el cuerpo de `url`, revalidando contra el servidor si hay copia en cache"""
+        entry, body = self._load(url)
+
+        if self.offline:
+            if body is None:
+                raise RuntimeError(f"Modo offline: {url} no está en cache ({self.cache_dir})")
+            return body
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = HTTP_SESSION.get(url, headers=headers)
+        if response.status_code == 304 and body is not None:
+            return body
+
+        response.raise_for_status()
+        self._store(url, response)
+        return response.content
+
+    def evict(self):
+        """Elimina las entradas menos usadas hasta quedar por debajo de max_bytes"""
+        with self.lock:
+            self._evict_locked()
+
+    def _evict_locked(self):
+        """Cuerpo de evict(); el llamador tiene que tener self.lock"""
+        entries = []
+        referenced = {}
+        for name in os.listdir(self.entries_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.entries_dir, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    blob = json.load(f)['blob']
+                mtime = os.path.getmtime(path)
+            except (OSError, ValueError, KeyError):
+                continue
+            entries.append((mtime, path, blob))
+            referenced[blob] = referenced.get(blob, 0) + 1
+
+        # Blobs huérfanos fuera, después LRU por entrada
+        sizes = {}
+        for blob in os.listdir(self.blobs_dir):
+            blob_path = os.path.join(self.blobs_dir, blob)
+            if blob.endswith('.tmp'):
+                continue
+            if blob not in referenced:
+                os.remove(blob_path)
+            else:
+                sizes[blob] = os.path.getsize(blob_path)
+
+        total = sum(sizes.values())
+        for _, path, blob in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            referenced[blob] -= 1
+            if referenced[blob] == 0 and blob in sizes:
+                os.remove(os.path.join(self.blobs_dir, blob))
+                total -= sizes[blob]
+
+# Cache HTTP global (None = sin cache, se configura en main)
+HTTP_CACHE = None
+
+def http_get(url):
+    """Descarga `url` a través de la cache en disco si está activa"""
+    if HTTP_CACHE:
+        return HTTP_CACHE.get(url)
+    response = HTTP_SESSION.get(url)
+    response.raise_for_status()
+    return response.content
+
 def load_azure_policies():
     """Carga el mapping de Azure Policies desde la página oficial"""
     global AZURE_POLICIES_CACHE
@@ -49,12 +302,10 @@ def load_azure_policies():
     print("Cargando Azure Policy Mappings...")
     print(f"{'='*80}")
 
-    url = "https://learn.microsoft.com/en-us/security/benchmark/azure/mcsb-v2-controls-policy-mapping"
+    url = f"{BASE_URL}/mcsb-v2-controls-policy-mapping"
 
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'lxml')
+        soup = BeautifulSoup(http_get(url), 'lxml')
 
         # Buscar H2 (controles) y sus tablas
         h2_elements = soup.find_all('h2')
@@ -102,17 +353,16 @@ def load_azure_policies():
     except Exception as e:
         print(f"  ⚠️  Error cargando policies: {str(e)}")
 
-def extract_core_pillars(domain_slug, domain_prefix):
-    """Extrae core pillars de la introducción de cada dominio"""
-    global CORE_PILLARS_CACHE
+def fetch_domain_page(domain_slug):
+    """Descarga y parsea la página de un dominio (una sola vez por dominio)"""
+    url = f"{BASE_URL}/mcsb-v2-{domain_slug}"
+    return BeautifulSoup(http_get(url), 'lxml')
 
-    url = f"https://learn.microsoft.com/en-us/security/benchmark/azure/mcsb-v2-{domain_slug}"
+def extract_core_pillars(soup, domain_prefix, log=print):
+    """Extrae core pillars de la introducción de cada dominio (sobre el documento ya parseado)"""
+    global CORE_PILLARS_CACHE
 
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'lxml')
-
         pillar_mapping = {}  # {control_id: pillar_name}
         current_pillar = None
 
@@ -154,25 +404,27 @@ def extract_core_pillars(domain_slug, domain_prefix):
         return pillar_mapping
 
     except Exception as e:
-        print(f"    ⚠️  Error extrayendo core pillars: {str(e)}")
+        log(f"    ⚠️  Error extrayendo core pillars: {str(e)}")
         return {}
 
-def extract_controls_from_domain(domain_name, domain_slug, domain_prefix):
-    """Extrae controles padre e hijos de un dominio MCSB v2"""
-    url = f"https://learn.microsoft.com/en-us/security/benchmark/azure/mcsb-v2-{domain_slug}"
-    print(f"\n{'='*80}")
-    print(f"Procesando: {domain_name} ({url})")
-    print(f"{'='*80}")
+def extract_controls_from_domain(domain_name, domain_slug, domain_prefix, log=print):
+    """Extrae controles padre e hijos de un dominio MCSB v2
 
-    # Extraer core pillars primero
-    pillar_mapping = extract_core_pillars(domain_slug, domain_prefix)
-    if pillar_mapping:
-        print(f"  ✓ Core pillars: {len(set(pillar_mapping.values()))} pillars mapeados a {len(pillar_mapping)} controles")
+    `log` permite acumular la salida por dominio cuando se procesan en paralelo.
+    """
+    url = f"{BASE_URL}/mcsb-v2-{domain_slug}"
+    log(f"\n{'='*80}")
+    log(f"Procesando: {domain_name} ({url})")
+    log(f"{'='*80}")
 
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'lxml')
+        # Un único fetch + parse alimenta core pillars y el recorrido H2/H3
+        soup = fetch_domain_page(domain_slug)
+
+        # Extraer core pillars primero
+        pillar_mapping = extract_core_pillars(soup, domain_prefix, log)
+        if pillar_mapping:
+            log(f"  ✓ Core pillars: {len(set(pillar_mapping.values()))} pillars mapeados a {len(pillar_mapping)} controles")
 
         controls = []
         current_parent = None
@@ -191,7 +443,7 @@ def extract_controls_from_domain(domain_name, domain_slug, domain_prefix):
             control_id = control_match.group(1).upper()
             control_title = control_match.group(2).strip()
 
-            print(f"  [PADRE] {control_id}: {control_title}")
+            log(f"  [PADRE] {control_id}: {control_title}")
 
             # Obtener core pillar del control
             pillar_map = CORE_PILLARS_CACHE.get(domain_prefix, {})
@@ -229,13 +481,13 @@ def extract_controls_from_domain(domain_name, domain_slug, domain_prefix):
                 child_data['Core Pillar'] = parent_data['Core Pillar']  # Heredar pillar
                 child_data['Azure Policy'] = parent_data['Azure Policy']  # Heredar policy
                 controls.append(child_data)
-                print(f"    [HIJO] {child_data['Implementation ID']}: {child_data['Control Name']}")
+                log(f"    [HIJO] {child_data['Implementation ID']}: {child_data['Control Name']}")
 
-        print(f"  Total controles extraídos: {len(controls)}")
+        log(f"  Total controles extraídos: {len(controls)}")
         return controls
 
     except Exception as e:
-        print(f"  ❌ ERROR: {str(e)}")
+        log(f"  ❌ ERROR: {str(e)}")
         return []
 
 def extract_parent_sections(h2, data, domain_prefix):
@@ -375,167 +627,218 @@ def extract_framework_mappings(h3_content, data):
             if value and len(value) < 200 and not any(fw in value for fw in ['PCI-DSS', 'CIS Controls', 'NIST Cybersecurity', 'NIST CSF', 'NIST SP', 'ISO 27001', 'SOC 2']):
                 data[key] = value
 
-def create_excel(all_controls, output_file):
-    """Genera Excel con todos los controles"""
-    print(f"\n{'='*80}")
-    print("Generando Excel...")
-    print(f"{'='*80}")
+# Headers - NUEVO ORDEN con Implementation ID y Core Pillar
+EXCEL_HEADERS = [
+    'Control ID', 'Implementation ID', 'Control Name', 'Control Type', 'Core Pillar', 'Azure Policy',
+    'Security Principle', 'Risk to mitigate', 'MITRE ATT&CK',
+    'Implementation example', 'Criticality',
+    'NIST SP 800-53 Rev.5', 'PCI-DSS v4', 'CIS Controls v8.1',
+    'NIST CSF v2.0', 'ISO 27001:2022', 'SOC 2'
+]
 
-    wb = openpyxl.Workbook()
-    wb.remove(wb.active)  # Eliminar hoja por defecto
+# Control ID | Impl ID | Name | Type | Core Pillar | Azure Policy | Security | Risk | MITRE | Impl | Crit | NIST | PCI | CIS | NIST CSF | ISO | SOC
+EXCEL_COLUMN_WIDTHS = [12, 15, 45, 10, 25, 50, 50, 50, 50, 60, 10, 25, 20, 20, 25, 20, 15]
 
-    # Agrupar controles por dominio
-    domains_controls = {}
-    for control in all_controls:
-        domain_prefix = control['Control ID'].split('-')[0]
-        domain_name = next((d[0] for d in DOMAINS if d[2] == domain_prefix), domain_prefix)
-        # Usar solo el nombre del dominio sin el prefijo
-        sheet_name = domain_name
+def register_excel_styles(wb):
+    """Registra estilos con nombre compartidos por todas las celdas (un único xf por estilo)"""
+    body_alignment = Alignment(wrap_text=True, vertical='top')
 
-        if sheet_name not in domains_controls:
-            domains_controls[sheet_name] = []
-        domains_controls[sheet_name].append(control)
+    header = NamedStyle(name='mcsb_header')
+    header.font = Font(bold=True, color="FFFFFF", size=11)
+    header.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
 
-    # Crear hojas por dominio
-    for sheet_name, controls in sorted(domains_controls.items()):
-        ws = wb.create_sheet(title=sheet_name[:31])  # Límite 31 caracteres
+    body = NamedStyle(name='mcsb_body')
+    body.alignment = body_alignment
 
-        # Headers - NUEVO ORDEN con Implementation ID y Core Pillar
-        headers = [
-            'Control ID', 'Implementation ID', 'Control Name', 'Control Type', 'Core Pillar', 'Azure Policy',
-            'Security Principle', 'Risk to mitigate', 'MITRE ATT&CK',
-            'Implementation example', 'Criticality',
-            'NIST SP 800-53 Rev.5', 'PCI-DSS v4', 'CIS Controls v8.1',
-            'NIST CSF v2.0', 'ISO 27001:2022', 'SOC 2'
-        ]
+    link = NamedStyle(name='mcsb_link')
+    link.font = Font(color="0563C1", underline="single")
+    link.alignment = body_alignment
 
-        ws.append(headers)
+    muted = NamedStyle(name='mcsb_muted')
+    muted.font = Font(color="666666", italic=True)
+    muted.alignment = body_alignment
 
-        # Formatear headers
-        for cell in ws[1]:
-            cell.font = Font(bold=True, size=11)
-            cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            cell.font = Font(bold=True, color="FFFFFF", size=11)
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    title = NamedStyle(name='mcsb_title')
+    title.font = Font(bold=True, size=16)
 
-        # Datos
-        for control in controls:
-            # Preparar fila con valores
-            row_values = []
-            for h in headers:
-                value = control.get(h, '')
-                # Azure Policy es lista de tuplas, convertir temporalmente
-                if h == 'Azure Policy' and isinstance(value, list):
-                    row_values.append('TEMP_POLICIES')  # Marcador temporal
-                else:
-                    row_values.append(value)
+    for style in (header, body, link, muted, title):
+        wb.add_named_style(style)
 
-            row_num = ws.max_row + 1
-            ws.append(row_values)
+def excel_cell(ws, value, style, hyperlink=None, comment=None):
+    """Crea una celda write-only con estilo con nombre, hyperlink y comentario opcionales"""
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    if hyperlink:
+        cell.hyperlink = hyperlink
+    if comment:
+        cell.comment = comment
+    return cell
 
+def control_row(ws, control):
+    """Construye en una sola pasada la fila con estilos de un control"""
+    row = []
+    for h in EXCEL_HEADERS:
+        value = control.get(h, '')
+
+        if h == 'Control ID' and value:
             # Agregar hyperlink al Control ID
-            control_id = control.get('Control ID', '')
-            if control_id:
-                control_id_col = headers.index('Control ID') + 1
-                cell = ws.cell(row_num, control_id_col)
-
-                # Extraer prefix del control (ej: AI-1 → AI)
-                prefix = control_id.split('-')[0] if '-' in control_id else ''
-
-                # Obtener domain slug del mapeo
-                if prefix in DOMAIN_SLUG_MAP:
-                    domain_slug = DOMAIN_SLUG_MAP[prefix]
-                    mapping_url = f"https://learn.microsoft.com/en-us/security/benchmark/azure/mcsb-v2-{domain_slug}#{control_id.lower()}"
-                    cell.hyperlink = mapping_url
-                    cell.font = Font(color="0563C1", underline="single")
-
-            # Manejar Azure Policies
-            azure_policy_col = headers.index('Azure Policy') + 1
-            cell = ws.cell(row_num, azure_policy_col)
-
-            if control.get('Azure Policy') and isinstance(control['Azure Policy'], list) and len(control['Azure Policy']) > 0:
-                cell = ws.cell(row_num, azure_policy_col)
-                policies = control['Azure Policy']
+            # Extraer prefix del control (ej: AI-1 → AI) y obtener domain slug del mapeo
+            prefix = value.split('-')[0] if '-' in value else ''
+            if prefix in DOMAIN_SLUG_MAP:
+                domain_slug = DOMAIN_SLUG_MAP[prefix]
+                mapping_url = f"https://learn.microsoft.com/en-us/security/benchmark/azure/mcsb-v2-{domain_slug}#{value.lower()}"
+                row.append(excel_cell(ws, value, 'mcsb_link', hyperlink=mapping_url))
+                continue
+
+        elif h == 'Azure Policy':
+            # Manejar Azure Policies (lista de tuplas (name, url))
+            if isinstance(value, list) and len(value) > 0:
                 control_id = control.get('Control ID', '')
                 impl_id = control.get('Implementation ID', '')
 
                 # Para child controls, usar el parent ID (ej: AI-1.1 → AI-1)
                 if impl_id and '.' in impl_id:
-                    # Es un child, extraer parent ID del Implementation ID
                     parent_id = impl_id.split('.')[0]
                 else:
-                    # Es parent, usar Control ID directamente
                     parent_id = control_id
 
-                if len(policies) == 1:
+                mapping_url = None
+                if parent_id:
+                    mapping_url = f"https://learn.microsoft.com/en-us/security/benchmark/azure/mcsb-v2-controls-policy-mapping#{parent_id.lower()}"
+
+                comment = None
+                if len(value) == 1:
                     # Una sola policy: nombre + hyperlink a documentación
-                    policy_name, _ = policies[0]
-                    cell.value = policy_name
-                    if parent_id:
-                        mapping_url = f"https://learn.microsoft.com/en-us/security/benchmark/azure/mcsb-v2-controls-policy-mapping#{parent_id.lower()}"
-                        cell.hyperlink = mapping_url
-                        cell.font = Font(color="0563C1", underline="single")
+                    policy_text = value[0][0]
                 else:
-                    # Múltiples policies: texto con hyperlink a documentación
-                    policy_text = '\n'.join([name for name, _ in policies])
-                    cell.value = policy_text
-
-                    # Hyperlink a la documentación de control mapping (usar parent ID)
-                    if parent_id:
-                        mapping_url = f"https://learn.microsoft.com/en-us/security/benchmark/azure/mcsb-v2-controls-policy-mapping#{parent_id.lower()}"
-                        cell.hyperlink = mapping_url
-                        cell.font = Font(color="0563C1", underline="single")
-
-                    # Agregar comentario con todas las URLs individuales del portal
+                    # Múltiples policies: texto con hyperlink + comentario con las URLs individuales del portal
+                    policy_text = '\n'.join([name for name, _ in value])
                     comment_text = 'Azure Policy URLs:\n\n'
-                    for policy_name, policy_url in policies:
+                    for policy_name, policy_url in value:
                         if policy_url:
                             comment_text += f"• {policy_name}\n  {policy_url}\n\n"
                         else:
                             comment_text += f"• {policy_name}\n\n"
+                    comment = Comment(comment_text[:500], "Azure Policy Mapping")
 
-                    from openpyxl.comments import Comment
-                    cell.comment = Comment(comment_text[:500], "Azure Policy Mapping")
+                style = 'mcsb_link' if mapping_url else 'mcsb_body'
+                row.append(excel_cell(ws, policy_text, style, hyperlink=mapping_url, comment=comment))
             else:
                 # No hay policies disponibles
-                cell.value = "No Azure Policy available"
-                cell.font = Font(color="666666", italic=True)
+                row.append(excel_cell(ws, "No Azure Policy available", 'mcsb_muted'))
+            continue
 
-        # Ajustar anchos - ACTUALIZADO con Core Pillar
-        # Control ID | Impl ID | Name | Type | Core Pillar | Azure Policy | Security | Risk | MITRE | Impl | Crit | NIST | PCI | CIS | NIST CSF | ISO | SOC
-        column_widths = [12, 15, 45, 10, 25, 50, 50, 50, 50, 60, 10, 25, 20, 20, 25, 20, 15]
-        for i, width in enumerate(column_widths, 1):
-            ws.column_dimensions[get_column_letter(i)].width = width
+        row.append(excel_cell(ws, value, 'mcsb_body'))
+    return row
+
+def create_excel(all_controls, output_file):
+    """Genera Excel con todos los controles
 
-        # Altura de filas y wrap text
+    Workbook write-only: cada fila se escribe ya con estilo en una sola pasada,
+    con estilos con nombre compartidos, así que la memoria no crece con las celdas.
+    """
+    print(f"\n{'='*80}")
+    print("Generando Excel...")
+    print(f"{'='*80}")
+
+    wb = openpyxl.Workbook(write_only=True)
+    register_excel_styles(wb)
+
+    # Agrupar controles por dominio
+    domains_controls = {}
+    for control in all_controls:
+        domain_prefix = control['Control ID'].split('-')[0]
+        domain_name = next((d[0] for d in DOMAINS if d[2] == domain_prefix), domain_prefix)
+        # Usar solo el nombre del dominio sin el prefijo
+        sheet_name = domain_name
+
+        if sheet_name not in domains_controls:
+            domains_controls[sheet_name] = []
+        domains_controls[sheet_name].append(control)
+
+    # Readme (primera hoja: en write-only las hojas se escriben en orden)
+    readme = wb.create_sheet(title="Readme")
+    readme.append([excel_cell(readme, "Microsoft Cloud Security Benchmark v2", 'mcsb_title')])
+    readme.append([])
+    readme.append([f"Generado: {time.strftime('%Y-%m-%d %H:%M:%S')}"])
+    readme.append(["Fuente: https://learn.microsoft.com/en-us/security/benchmark/azure/overview"])
+    readme.append([])
+    readme.append(["Estructura:"])
+    readme.append(["  - Controles Padre (ej: NS-1): Incluyen Azure Policy, Security Principle, Risk, MITRE, Criticality, Control mapping"])
+    readme.append(["  - Controles Hijo (ej: 1.1, 1.2): Heredan Security Principle y Azure Policy del padre"])
+    readme.append(["  - Columnas: Control ID (padre) + Implementation ID (hijo) para estructura clara"])
+    readme.append([])
+    readme.append([f"Total controles: {len(all_controls)}"])
+    readme.append([f"Total dominios: {len(domains_controls)}"])
+
+    # Crear hojas por dominio
+    for sheet_name, controls in sorted(domains_controls.items()):
+        ws = wb.create_sheet(title=sheet_name[:31])  # Límite 31 caracteres
+
+        # Anchos y alturas deben fijarse antes de escribir las filas en modo write-only
+        # Altura 100 como default de la hoja (sin un RowDimension por fila)
+        for i, width in enumerate(EXCEL_COLUMN_WIDTHS, 1):
+            ws.column_dimensions[get_column_letter(i)].width = width
+        ws.sheet_format = SheetFormatProperties(defaultRowHeight=100, customHeight=True)
         ws.row_dimensions[1].height = 40
-        for row in range(2, ws.max_row + 1):
-            ws.row_dimensions[row].height = 100
-            for col in range(1, ws.max_column + 1):
-                cell = ws.cell(row, col)
-                cell.alignment = Alignment(wrap_text=True, vertical='top')
 
-        print(f"  ✓ {sheet_name}: {len(controls)} controles")
+        ws.append([excel_cell(ws, h, 'mcsb_header') for h in EXCEL_HEADERS])
+
+        # Datos
+        for control in controls:
+            ws.append(control_row(ws, control))
 
-    # Readme
-    readme = wb.create_sheet(title="Readme", index=0)
-    readme['A1'] = "Microsoft Cloud Security Benchmark v2"
-    readme['A1'].font = Font(bold=True, size=16)
-    readme['A3'] = f"Generado: {time.strftime('%Y-%m-%d %H:%M:%S')}"
-    readme['A4'] = "Fuente: https://learn.microsoft.com/en-us/security/benchmark/azure/overview"
-    readme['A6'] = "Estructura:"
-    readme['A7'] = "  - Controles Padre (ej: NS-1): Incluyen Azure Policy, Security Principle, Risk, MITRE, Criticality, Control mapping"
-    readme['A8'] = "  - Controles Hijo (ej: 1.1, 1.2): Heredan Security Principle y Azure Policy del padre"
-    readme['A9'] = "  - Columnas: Control ID (padre) + Implementation ID (hijo) para estructura clara"
-    readme['A11'] = f"Total controles: {len(all_controls)}"
-    readme['A12'] = f"Total dominios: {len(domains_controls)}"
+        print(f"  ✓ {sheet_name}: {len(controls)} controles")
 
     wb.save(output_file)
     print(f"\n✓ Excel guardado: {output_file}")
     print(f"  Total controles: {len(all_controls)}")
     print(f"  Total dominios: {len(domains_controls)}")
 
+def scrape_domain(domain):
+    """Procesa un dominio acumulando su salida para imprimirla en orden"""
+    domain_name, domain_slug, domain_prefix = domain
+    lines = []
+    controls = extract_controls_from_domain(domain_name, domain_slug, domain_prefix, log=lines.append)
+    return controls, lines
+
 def main():
+    global BASE_URL, RATE_LIMITER, HTTP_CACHE, HTTP_SESSION
+
+    parser = argparse.ArgumentParser(description='Generador Excel MCSB v2 con estructura jerárquica padre-hijo')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Máximo de dominios procesándose en paralelo (default: 4)')
+    parser.add_argument('--rate', type=float, default=2.0,
+                        help='Peticiones HTTP por segundo como máximo, 0 = sin límite (default: 2)')
+    parser.add_argument('--burst', type=int, default=1,
+                        help='Peticiones que se pueden lanzar de golpe antes de aplicar --rate (default: 1)')
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help='URL base de las páginas mcsb-v2-* (ej: servidor local con HTML guardado)')
+    parser.add_argument('--retries', type=int, default=5,
+                        help='Reintentos ante 429/5xx con backoff exponencial (default: 5)')
+    parser.add_argument('--cache-dir', default='.cache/mcsb_v2_http',
+                        help='Directorio de la cache HTTP en disco (default: .cache/mcsb_v2_http)')
+    parser.add_argument('--cache-max-mb', type=float, default=50,
+                        help='Tamaño máximo de la cache antes de expulsar entradas (default: 50 MB)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Descargar siempre todas las páginas sin usar la cache')
+    parser.add_argument('--offline', action='store_true',
+                        help='Reproducir solo desde la cache, sin acceder a la red')
+    parser.add_argument('--output', default="docs/assets/tables/Microsoft_cloud_security_benchmark_v2.xlsx",
+                        help='Ruta del Excel generado')
+    args = parser.parse_args()
+
+    BASE_URL = args.base_url.rstrip('/')
+    RATE_LIMITER = TokenBucket(rate=args.rate, capacity=max(1, args.burst))
+    HTTP_SESSION = HttpSession(pool_size=max(16, args.workers), retries=args.retries)
+
+    if args.offline and args.no_cache:
+        parser.error("--offline requiere la cache (no se puede combinar con --no-cache)")
+    if not args.no_cache:
+        HTTP_CACHE = HttpCache(args.cache_dir, max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                               offline=args.offline)
+
     print("\n" + "="*80)
     print(" "*15 + "MCSB v2 - Extracción Jerárquica Padre-Hijo")
     print("="*80)
@@ -545,14 +848,26 @@ def main():
 
     all_controls = []
 
-    for domain_name, domain_slug, domain_prefix in DOMAINS:
-        controls = extract_controls_from_domain(domain_name, domain_slug, domain_prefix)
-        all_controls.extend(controls)
-        time.sleep(1)  # Rate limiting
+    # Los dominios se procesan en paralelo pero se recogen en el orden de DOMAINS
+    # para que el workbook final sea determinista
+    failed_domains = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        for domain, (controls, lines) in zip(DOMAINS, executor.map(scrape_domain, DOMAINS)):
+            print('\n'.join(lines))
+            if not controls:
+                failed_domains.append(domain[0])
+            all_controls.extend(controls)
+
+    HTTP_SESSION.print_metrics()
+
+    if failed_domains:
+        # No sobrescribir el workbook con dominios vacíos tras agotar los reintentos
+        print(f"\n❌ Dominios sin controles: {', '.join(failed_domains)}")
+        print("   No se genera el Excel para no perder datos; reintenta más tarde\n")
+        sys.exit(1)
 
     if all_controls:
-        output_file = "docs/assets/tables/Microsoft_cloud_security_benchmark_v2.xlsx"
-        create_excel(all_controls, output_file)
+        create_excel(all_controls, args.output)
         print(f"\n{'='*80}")
         print("✓ COMPLETED!")
         print(f"{'='*80}\n")
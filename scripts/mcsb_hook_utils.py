@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Utilidades compartidas por los hooks MCSB de MkDocs (splitMCSB.py y splitMCSBv2.py)
+Manifest de salidas generadas para regenerar solo cuando cambia el workbook origen
+Descarga cacheada con revalidación condicional para los workbooks remotos
+Render estático de hojas a tablas Markdown (sin read_excel en cada build)
+Lectura de hyperlinks de un xlsx sin cargar el modelo de celdas de openpyxl
+"""
+
+import hashlib
+import html
+import json
+import os
+import posixpath
+import re
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+# Fuera de docs/ para que escribir el manifest no dispare livereload en `mkdocs serve`
+MANIFEST_DIRECTORY = ".cache/mcsb/"
+
+# static: tabla Markdown pre-renderizada | read_excel: macro de mkdocs-table-reader en cada build
+RENDER_MODE = os.environ.get('MCSB_RENDER_MODE', 'static').lower()
+if RENDER_MODE not in ('static', 'read_excel'):
+    raise ValueError(f"MCSB_RENDER_MODE inválido: '{RENDER_MODE}' (usa 'static' o 'read_excel')")
+
+# Namespaces OOXML usados al leer hyperlinks directamente del zip
+XLSX_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+XLSX_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Caracteres con significado inline en Markdown que deben mostrarse literales en una celda
+MARKDOWN_SPECIAL_CHARS = re.compile(r'([\\`*_\[\]|])')
+
+
+def file_sha256(path):
+    """Calcula el SHA-256 de un fichero leyendo por bloques"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def manifest_path(name):
+    return os.path.join(MANIFEST_DIRECTORY, f"{name}.manifest.json")
+
+
+def load_manifest(name):
+    """Devuelve el manifest guardado o None si no existe / está corrupto"""
+    try:
+        with open(manifest_path(name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_up_to_date(name, source_path, generator_version):
+    """Indica si las salidas del manifest corresponden al workbook y versión actuales"""
+    manifest = load_manifest(name)
+    if not manifest or manifest.get('generator_version') != generator_version:
+        return False
+    before = json.dumps(manifest, sort_keys=True)
+
+    # Las salidas se comprueban por contenido, no solo por existencia: en CI el manifest
+    # viene de la cache restaurada y las páginas del checkout pueden ser de otra generación
+    outputs = manifest.get('outputs')
+    if not isinstance(outputs, dict):
+        return False  # Manifest de una versión que solo guardaba las rutas
+    for output, recorded in outputs.items():
+        if not _matches(output, recorded):
+            return False
+
+    source = {
+        'size': manifest.get('source_size'),
+        'mtime_ns': manifest.get('source_mtime_ns'),
+        'sha256': manifest.get('source_sha256'),
+    }
+    if not _matches(source_path, source):
+        return False
+
+    # Mismo contenido con otro mtime (ej: descarga repetida, checkout): actualizar stat en el manifest
+    manifest['source_mtime_ns'] = source['mtime_ns']
+    if json.dumps(manifest, sort_keys=True) != before:
+        _save_manifest(name, manifest)
+    return True
+
+
+def _file_state(path):
+    """Tamaño, mtime y SHA-256 de un fichero tal como se guardan en el manifest"""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_sha256(path)}
+
+
+def _matches(path, recorded):
+    """Indica si `path` tiene el contenido registrado
+
+    Camino rápido: mismo tamaño y mtime → no hace falta hashear. Si solo cambia el mtime
+    y el hash coincide, actualiza `recorded` con el stat actual.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if recorded.get('size') != stat.st_size:
+        return False
+    if recorded.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+    if recorded.get('sha256') != file_sha256(path):
+        return False
+    recorded['mtime_ns'] = stat.st_mtime_ns
+    return True
+
+
+def write_manifest(name, source_path, generator_version, outputs):
+    """Registra el workbook origen y las salidas generadas a partir de él (con su hash)"""
+    source = _file_state(source_path)
+    manifest = {
+        'source': source_path,
+        'source_sha256': source['sha256'],
+        'source_size': source['size'],
+        'source_mtime_ns': source['mtime_ns'],
+        'generator_version': generator_version,
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'outputs': {output: _file_state(output) for output in sorted(outputs)},
+    }
+    _save_manifest(name, manifest)
+
+
+def _save_manifest(name, manifest):
+    os.makedirs(MANIFEST_DIRECTORY, exist_ok=True)
+    tmp_path = manifest_path(name) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path(name))
+
+
+def fetch_cached(url, local_path, ttl_seconds=None, offline=None):
+    """Mantiene `local_path` sincronizado con `url` sin descargarlo en cada build
+
+    - Dentro del TTL no hay acceso a red (se usa la copia local)
+    - Pasado el TTL se revalida con If-None-Match / If-Modified-Since (304 → sin descarga)
+    - Sin red (o MCSB_OFFLINE=1) se usa la copia local si existe
+
+    TTL configurable con MCSB_FETCH_TTL (segundos, default 86400).
+    Devuelve True si el fichero local se ha actualizado.
+    """
+    if ttl_seconds is None:
+        ttl_seconds = float(os.environ.get('MCSB_FETCH_TTL', 86400))
+    if offline is None:
+        offline = os.environ.get('MCSB_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+    meta_path = os.path.join(MANIFEST_DIRECTORY, f"{os.path.basename(local_path)}.http.json")
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {}
+
+    has_local = os.path.exists(local_path)
+
+    if offline:
+        if not has_local:
+            raise RuntimeError(f"Modo offline: {local_path} no existe en local")
+        return False
+
+    if has_local and time.time() - meta.get('checked_at', 0) < ttl_seconds:
+        return False
+
+    headers = {}
+    if has_local:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    updated = False
+    try:
+        with urlopen(Request(url, headers=headers), timeout=30) as response:
+            # Escritura atómica: un fallo a mitad no deja un xlsx truncado
+            tmp_path = local_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                for chunk in iter(lambda: response.read(1024 * 1024), b''):
+                    f.write(chunk)
+            os.replace(tmp_path, local_path)
+            meta['etag'] = response.headers.get('ETag')
+            meta['last_modified'] = response.headers.get('Last-Modified')
+            updated = True
+    except HTTPError as e:
+        if e.code != 304:
+            if not has_local:
+                raise
+            print(f"Warning: {url} devolvió HTTP {e.code}, usando copia local")
+    except (URLError, OSError) as e:
+        if not has_local:
+            raise
+        print(f"Warning: no se pudo revalidar {url} ({e}), usando copia local")
+        return False
+
+    meta['checked_at'] = time.time()
+    os.makedirs(MANIFEST_DIRECTORY, exist_ok=True)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return updated
+
+
+def _markdown_cell(value):
+    """Escapa el valor de una celda para una tabla Markdown (multilínea → <br>)"""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        if value != value:  # NaN de pandas
+            return ''
+        if value.is_integer():
+            value = int(value)
+    if hasattr(value, 'strftime'):
+        value = value.strftime('%Y-%m-%d')
+
+    text = html.escape(str(value).strip(), quote=False)
+    text = MARKDOWN_SPECIAL_CHARS.sub(r'\\\1', text)
+    lines = [line.strip() for line in text.replace('\r\n', '\n').split('\n')]
+    return '<br>'.join(lines)
+
+
+def render_markdown_table(rows, links=None):
+    """Genera una tabla Markdown a partir de filas (la primera es la cabecera)
+
+    links: {(fila, columna): url} para las celdas con hyperlink
+    """
+    links = links or {}
+    lines = []
+    for r, row in enumerate(rows):
+        cells = []
+        for c, value in enumerate(row):
+            text = _markdown_cell(value)
+            url = links.get((r, c))
+            if url and text:
+                text = f"[{text}](<{url}>)"
+            cells.append(text)
+        lines.append('| ' + ' | '.join(cells) + ' |')
+        if r == 0:
+            lines.append('|' + '|'.join(['---'] * len(row)) + '|')
+    return '\n'.join(lines) + '\n'
+
+
+def _read_rels(archive, part):
+    """Devuelve {rId: target} del fichero .rels asociado a `part`"""
+    folder, name = posixpath.split(part)
+    rels_path = posixpath.join(folder, '_rels', f"{name}.rels")
+    if rels_path not in archive.namelist():
+        return {}
+    root = ET.fromstring(archive.read(rels_path))
+    return {rel.get('Id'): rel.get('Target') for rel in root.iter(f"{XLSX_PKG_REL_NS}Relationship")}
+
+
+def read_hyperlinks(xlsx_path, sheets=None):
+    """Lee los hyperlinks externos de cada hoja: {hoja: {(fila, columna): url}} (base 0)
+
+    openpyxl en modo read_only no expone hyperlinks; se leen del XML de cada hoja
+    en streaming, sin construir objetos celda. `sheets` limita la lectura a esas hojas.
+    """
+    from openpyxl.utils.cell import range_boundaries
+
+    result = {}
+    with zipfile.ZipFile(xlsx_path) as archive:
+        workbook_rels = _read_rels(archive, 'xl/workbook.xml')
+        workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+        for sheet in workbook.iter(f"{XLSX_MAIN_NS}sheet"):
+            if sheets is not None and sheet.get('name') not in sheets:
+                continue
+            target = workbook_rels.get(sheet.get(f"{XLSX_REL_NS}id"), '')
+            part = target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+            sheet_rels = _read_rels(archive, part)
+            links = {}
+            with archive.open(part) as f:
+                for _, elem in ET.iterparse(f):
+                    if elem.tag == f"{XLSX_MAIN_NS}hyperlink":
+                        url = sheet_rels.get(elem.get(f"{XLSX_REL_NS}id"))
+                        if url:
+                            min_col, min_row, max_col, max_row = range_boundaries(elem.get('ref'))
+                            for row in range(min_row, max_row + 1):
+                                for col in range(min_col, max_col + 1):
+                                    links[(row - 1, col - 1)] = url
+                    elif elem.tag == f"{XLSX_MAIN_NS}row":
+                        elem.clear()  # Memoria constante en hojas grandes
+            result[sheet.get('name')] = links
+    return result
@@ -0,0 +1,729 @@
+#!/usr/bin/env python3
+"""
+Índice del sitio para las reglas entre páginas de post_validator.py
+(SiteIndex, AssetCache, ExternalLinkChecker e informe de --image-report)
+
+post_validator lo importa solo cuando se piden esas reglas (--index, --links,
+--image-report...): validar un post sin índice no compila sus regex ni carga su código.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import posixpath
+from pathlib import Path
+from functools import lru_cache
+
+from post_validator import (
+    ASSET_BUDGETS, BLOG_DIR, DOCS_DIR, FRONTMATTER_PATTERN, LINK_TTL_HOURS, LOAD_RULE_ID,
+    LineScanner, Rule, RuleConfig, frontmatter_error, index_key, index_rules, make_finding,
+    parse_frontmatter, parse_iso_date,
+)
+
+
+# Índice del blog: encabezados ATX, enlaces inline / de referencia y código inline (se ignora)
+FENCE_PATTERN = re.compile(r'^\s*(`{3,}|~{3,})(.*)$')
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+INLINE_LINK_PATTERN = re.compile(r'(?<!!)\[[^\]]*\]\(\s*(?:<([^>]*)>|([^)\s]+))')
+REFERENCE_LINK_PATTERN = re.compile(r'^ {0,3}\[(?!\^)[^\]]+\]:\s*(?:<([^>]*)>|(\S+))')
+INLINE_CODE_PATTERN = re.compile(r'`[^`]*`')
+BARE_URL_PATTERN = re.compile(r'https?://[^\s<>"\'`()\[\]*]+')
+IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\(\s*(?:<([^>]*)>|([^)\s]+))')
+IMG_SRC_PATTERN = re.compile(r'<img\s[^>]*?\bsrc=["\']([^"\']+)["\']', re.IGNORECASE)
+# Cabecera de un SVG (image_header): width/height en px o sin unidad, o el viewBox
+SVG_TAG_PATTERN = re.compile(r'<svg\b[^>]*>', re.IGNORECASE)
+SVG_ATTR_PATTERN = re.compile(r'\b(width|height|viewBox)\s*=\s*["\']([^"\']*)["\']')
+SVG_LENGTH_PATTERN = re.compile(r'^\s*([0-9]+(?:\.[0-9]+)?)\s*(?:px)?\s*$')
+INLINE_CODE_SPLIT_PATTERN = re.compile(r'(`[^`]*`)')
+LINK_TEXT_PATTERN = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+HTML_TAG_PATTERN = re.compile(r'</?[A-Za-z][^>]*>')
+# IDs explícitos: attr_list ({#id} al final de un encabezado o en un bloque) y HTML (id= / name=)
+ATTR_LIST_PATTERN = re.compile(r'\s*\{:?([^}]*)\}\s*$')
+ATTR_ID_PATTERN = re.compile(r'\{:?\s*#([\w-]+)[^}]*\}')
+HTML_ID_PATTERN = re.compile(r'<[A-Za-z][^>]*?\s(?:id|name)=["\']([^"\']+)["\']')
+ANCHOR_COUNT_PATTERN = re.compile(r'^(.*)_([0-9]+)$')
+# Slugs y anclas como markdown.extensions.toc.slugify
+SLUG_STRIP_PATTERN = re.compile(r'[^\w\s-]')
+SLUG_SEPARATOR_PATTERN = re.compile(r'[-\s]+')
+
+# URL de un post publicado (post_url_format por defecto de Material: {date}/{slug})
+SITE_URL = 'https://rfernandezdo.github.io'
+BLOG_URL_PATTERN = re.compile(
+    r'^(?:' + re.escape(SITE_URL) + r')?/blog/(\d{4})/(\d{2})/(\d{2})/([^/]+)/?$'
+)
+
+
+@lru_cache(maxsize=None)
+def slugify(value: str) -> str:
+    """Slug como markdown.extensions.toc.slugify (Material: anclas, posts, tags y categorías)"""
+    import unicodedata
+
+    value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+    value = SLUG_STRIP_PATTERN.sub('', value).strip().lower()
+    return SLUG_SEPARATOR_PATTERN.sub('-', value)
+
+
+def unique_anchor(anchor: str, used: set) -> str:
+    """Como toc.unique: añade _1, _2... a IDs repetidos o vacíos y registra el resultado"""
+    while anchor in used or not anchor:
+        match = ANCHOR_COUNT_PATTERN.match(anchor)
+        anchor = f"{match.group(1)}_{int(match.group(2)) + 1}" if match else f"{anchor}_1"
+    used.add(anchor)
+    return anchor
+
+
+def heading_text(text: str) -> str:
+    """Texto de un encabezado tal y como lo ve toc: sin enlaces ni HTML fuera del código inline"""
+    parts = INLINE_CODE_SPLIT_PATTERN.split(text)
+    for i in range(0, len(parts), 2):  # Las posiciones impares son código inline
+        parts[i] = HTML_TAG_PATTERN.sub('', LINK_TEXT_PATTERN.sub(r'\1', parts[i]))
+    return ''.join(parts)
+
+
+def _as_list(value) -> list:
+    """Tags / categorías del frontmatter como lista de cadenas (admite un escalar suelto)"""
+    if isinstance(value, list):
+        return [str(item) for item in value if item is not None]
+    return [str(value)] if value is not None else []
+
+
+class PageIndexer:
+    """Visitante del LineScanner que recoge encabezados, IDs explícitos y enlaces de una página
+
+    Sigue los bloques de código como Markdown (vallas ``` o ~~~ con sangría, cerradas solo
+    por una valla sin lenguaje igual o más larga) en lugar de alternar con cada línea ```
+    como scan.in_code_block: un encabezado o ancla mal clasificado sería un falso positivo.
+    """
+
+    def __init__(self):
+        self.headings = []  # [[línea, nivel, texto, id de attr_list o None]]
+        self.ids = []  # IDs explícitos fuera de encabezados (attr_list, id= / name= en HTML)
+        self.links = []  # [[línea, destino]]: enlaces (sin imágenes locales) y URLs externas
+        self.images = []  # [[línea, src]]: imágenes Markdown (![...](...)) y <img src="...">
+        self.fence = None  # Valla que abrió el bloque de código actual
+
+    def visit(self, scan: LineScanner):
+        if scan.index < scan.body_start:
+            return
+        line = scan.line
+        if '```' in line or '~~~' in line:
+            match = FENCE_PATTERN.match(line)
+            if match:
+                fence, info = match.groups()
+                if self.fence is None:
+                    self.fence = fence
+                elif fence[0] == self.fence[0] and len(fence) >= len(self.fence) and not info.strip():
+                    self.fence = None
+                return
+        if self.fence is not None:
+            return
+        if line.startswith('#'):
+            match = HEADING_PATTERN.match(line)
+            if match:
+                text, anchor = match.group(2), None
+                attrs = ATTR_LIST_PATTERN.search(text)
+                if attrs:
+                    tokens = attrs.group(1).split()
+                    if tokens and all(token[0] in '#.' or '=' in token for token in tokens):
+                        text = text[:attrs.start()]
+                        anchor = next((token[1:] for token in tokens if token[0] == '#'), None)
+                self.headings.append([scan.number, len(match.group(1)), text, anchor])
+                return
+        if not ('<' in line or '{' in line or '](' in line or ']:' in line or '://' in line):
+            return
+        code_free = INLINE_CODE_PATTERN.sub('', line)
+        if '<' in line or '{' in line:
+            self.ids.extend(HTML_ID_PATTERN.findall(code_free))
+            self.ids.extend(ATTR_ID_PATTERN.findall(code_free))
+        if '![' in code_free:
+            self.images.extend([scan.number, match.group(1) or match.group(2)]
+                               for match in IMAGE_PATTERN.finditer(code_free))
+        if '<' in line and IMG_SRC_PATTERN.search(code_free):
+            self.images.extend([scan.number, src] for src in IMG_SRC_PATTERN.findall(code_free))
+        targets = []
+        if '](' in line:
+            targets = [match.group(1) or match.group(2) for match in INLINE_LINK_PATTERN.finditer(code_free)]
+        elif ']:' in line:
+            match = REFERENCE_LINK_PATTERN.match(line)
+            if match:
+                targets.append(match.group(1) or match.group(2))
+        if '://' in code_free:
+            # URLs sueltas, autolinks <https://...> e imágenes (las de los enlaces ya están)
+            for url in BARE_URL_PATTERN.findall(code_free):
+                url = url.rstrip('.,;:!?')
+                if url not in targets:
+                    targets.append(url)
+        self.links.extend([scan.number, target] for target in targets)
+
+    def anchors(self) -> list:
+        """IDs de la página: los explícitos y los que toc genera para cada encabezado"""
+        used = set(self.ids)
+        used.update(anchor for _, _, _, anchor in self.headings if anchor)
+        anchors = list(used)
+        for _, _, text, anchor in self.headings:
+            if not anchor:
+                anchors.append(unique_anchor(slugify(heading_text(text)), used))
+        return anchors
+
+
+def index_page(filepath: Path) -> dict:
+    """Entrada del índice de una página de docs/ (serializable; usable desde un process pool)
+
+    anchors sigue a la extensión toc (slugify de Markdown, sin unicode, sufijos _1...).
+    slug y url siguen al blog de Material: `slug` del frontmatter o el título (frontmatter
+    `title` o primer `# `) pasado por slugify, y URL {fecha}/{slug} con fecha yyyy/MM/dd.
+    Si la página no se puede leer o su frontmatter no se puede parsear se indexa con
+    frontmatter vacío y `error` guarda el hallazgo de carga (el mismo que da PostValidator).
+    """
+    error = None
+    try:
+        content = filepath.read_text(encoding='utf-8')
+    except (OSError, UnicodeDecodeError) as e:
+        content = ''
+        error = make_finding(LOAD_RULE_ID, 'error', f"Error leyendo archivo: {e}")
+
+    frontmatter = {}
+    body_start = 0
+    fm_match = FRONTMATTER_PATTERN.match(content)
+    if fm_match:
+        body_start = fm_match.group(0).count('\n')
+        value, e = parse_frontmatter(fm_match.group(1))
+        if e is not None:
+            error = frontmatter_error(e)
+        elif isinstance(value, dict):
+            frontmatter = value
+
+    indexer = PageIndexer()
+    LineScanner([indexer]).scan(content.split('\n'), body_start)
+
+    created = frontmatter.get('date')
+    if isinstance(created, dict):  # date: {created: ..., updated: ...}
+        created = created.get('created')
+    try:
+        post_date = parse_iso_date(str(created)[:10]).isoformat()
+    except ValueError:
+        post_date = None
+
+    title, title_line = frontmatter.get('title'), 1
+    if not isinstance(title, str):
+        title = None
+        for number, level, text, _ in indexer.headings:
+            if level == 1:
+                title, title_line = heading_text(text).strip(), number
+                break
+    slug = frontmatter.get('slug')
+    slug = str(slug) if slug is not None else (slugify(title) if title else None)
+
+    return {
+        'path': index_key(filepath),
+        'draft': frontmatter.get('draft') is True,
+        'date': post_date,
+        'title': title,
+        'title_line': title_line,
+        'slug': slug,
+        'url': f"{post_date.replace('-', '/')}/{slug}" if post_date and slug else None,
+        'tags': _as_list(frontmatter.get('tags')),
+        'categories': _as_list(frontmatter.get('categories')),
+        'headings': [heading[:3] for heading in indexer.headings],
+        'anchors': indexer.anchors(),
+        'links': indexer.links,
+        'images': indexer.images,
+        'error': error,
+    }
+
+
+def image_header(filepath: str) -> tuple:
+    """(formato, ancho, alto) leyendo solo la cabecera de la imagen; dimensiones None si no se conocen
+
+    PNG, GIF, BMP y WebP tienen el tamaño en los primeros bytes; en JPEG se saltan los
+    segmentos hasta el SOF. En SVG se usan width/height (o el viewBox) de la etiqueta <svg>.
+    """
+    with open(filepath, 'rb') as f:
+        head = f.read(64)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return 'png', int.from_bytes(head[16:20], 'big'), int.from_bytes(head[20:24], 'big')
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return 'gif', int.from_bytes(head[6:8], 'little'), int.from_bytes(head[8:10], 'little')
+        if head[:2] == b'BM' and len(head) >= 26:
+            return 'bmp', int.from_bytes(head[18:22], 'little', signed=True), \
+                abs(int.from_bytes(head[22:26], 'little', signed=True))
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            chunk = head[12:16]
+            if chunk == b'VP8 ' and len(head) >= 30:
+                return 'webp', int.from_bytes(head[26:28], 'little') & 0x3fff, \
+                    int.from_bytes(head[28:30], 'little') & 0x3fff
+            if chunk == b'VP8L' and len(head) >= 25:
+                bits = int.from_bytes(head[21:25], 'little')
+                return 'webp', (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+            if chunk == b'VP8X' and len(head) >= 30:
+                return 'webp', int.from_bytes(head[24:27], 'little') + 1, int.from_bytes(head[27:30], 'little') + 1
+            return 'webp', None, None
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            while True:
+                if f.read(1) != b'\xff':
+                    return 'jpeg', None, None
+                code = f.read(1)
+                while code == b'\xff':  # Bytes de relleno entre segmentos
+                    code = f.read(1)
+                if not code:
+                    return 'jpeg', None, None
+                code = code[0]
+                if code in (0x01, *range(0xd0, 0xd9)):  # Marcadores sin longitud
+                    continue
+                length = int.from_bytes(f.read(2), 'big')
+                # SOF0-SOF15 salvo DHT (c4), JPG (c8) y DAC (cc): precisión, alto, ancho
+                if 0xc0 <= code <= 0xcf and code not in (0xc4, 0xc8, 0xcc):
+                    sof = f.read(5)
+                    return 'jpeg', int.from_bytes(sof[3:5], 'big'), int.from_bytes(sof[1:3], 'big')
+                if code == 0xda or length < 2:  # Inicio de los datos de imagen sin SOF
+                    return 'jpeg', None, None
+                f.seek(length - 2, 1)
+        head += f.read(4096)
+    svg = SVG_TAG_PATTERN.search(head.decode('utf-8', 'replace'))
+    if not svg:
+        return None, None, None
+    attrs = dict(SVG_ATTR_PATTERN.findall(svg.group(0)))
+    width, height = (SVG_LENGTH_PATTERN.match(attrs.get(name, '')) for name in ('width', 'height'))
+    if width and height:
+        return 'svg', round(float(width.group(1))), round(float(height.group(1)))
+    box = attrs.get('viewBox', '').replace(',', ' ').split()
+    try:
+        return 'svg', round(float(box[2])), round(float(box[3]))
+    except (IndexError, ValueError):
+        return 'svg', None, None
+
+
+class AssetCache:
+    """Tamaño y dimensiones de los ficheros de docs/, cacheados por hash del contenido
+
+    Tablas asset_files (ruta → mtime, tamaño, sha256) y asset_info (sha256 → formato y
+    dimensiones) en la base del índice: si el mtime y el tamaño no cambian no se lee el
+    fichero; si cambian se hashea y solo se lee la cabecera cuando el contenido es nuevo
+    (una imagen movida o copiada reutiliza su resultado).
+    """
+
+    # Incrementar al cambiar image_header() (se vuelven a leer las cabeceras)
+    VERSION = '1'
+
+    def __init__(self, conn):
+        self.conn = conn
+        conn.execute("CREATE TABLE IF NOT EXISTS asset_files ("
+                     "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha256 TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS asset_info ("
+                     "sha256 TEXT PRIMARY KEY, version TEXT, format TEXT, width INTEGER, height INTEGER)")
+        self.files = {row[0]: row[1:] for row in conn.execute("SELECT path, mtime_ns, size, sha256 FROM asset_files")}
+        self.info = {row[0]: row[1:] for row in conn.execute(
+            "SELECT sha256, format, width, height FROM asset_info WHERE version = ?", (self.VERSION,))}
+        self.seen = {}  # {ruta: resultado} de esta ejecución
+        self.new_files = []
+        self.new_info = []
+
+    def get(self, key: str):
+        if key in self.seen:
+            return self.seen[key]
+        try:
+            stat = os.stat(key)
+        except OSError:
+            self.seen[key] = None
+            return None
+
+        stored = self.files.get(key)
+        if stored and stored[:2] == (stat.st_mtime_ns, stat.st_size):
+            digest = stored[2]
+        else:
+            sha = hashlib.sha256()
+            with open(key, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            self.files[key] = (stat.st_mtime_ns, stat.st_size, digest)
+            self.new_files.append((key, stat.st_mtime_ns, stat.st_size, digest))
+
+        info = self.info.get(digest)
+        if info is None:
+            try:
+                info = self.info[digest] = image_header(key)
+            except OSError:
+                info = (None, None, None)
+            self.new_info.append((digest, self.VERSION, *info))
+        self.seen[key] = result = {'size': stat.st_size, 'format': info[0], 'width': info[1], 'height': info[2]}
+        return result
+
+    def save(self):
+        if self.new_files or self.new_info:
+            self.conn.executemany("INSERT OR REPLACE INTO asset_files (path, mtime_ns, size, sha256) "
+                                  "VALUES (?, ?, ?, ?)", self.new_files)
+            self.conn.executemany("INSERT OR REPLACE INTO asset_info (sha256, version, format, width, height) "
+                                  "VALUES (?, ?, ?, ?, ?)", self.new_info)
+            self.conn.commit()
+            self.new_files, self.new_info = [], []
+
+
+class SiteIndex:
+    """Índice compacto de las páginas de docs/ para las reglas entre páginas (IndexRule)
+
+    Una entrada por página .md (ver index_page) y el conjunto de rutas del resto de
+    ficheros (imágenes, scripts...). Las entradas se persisten en SQLite junto a la
+    cache de resultados y en cada ejecución solo se reindexan, en paralelo si son
+    muchas, las páginas cuyo tamaño o mtime ha cambiado. Las reglas agrupan las
+    entradas en diccionarios en una pasada: O(n) sobre el sitio y O(1) por enlace,
+    sin volver a leer ficheros.
+    """
+
+    DEFAULT_DOCS_DIR = DOCS_DIR
+    DEFAULT_BLOG_DIR = BLOG_DIR
+    # Incrementar al cambiar lo que extrae index_page() (se reindexa todo)
+    INDEX_VERSION = '5'
+    # Presupuestos de image-budget y page-weight (KB de 1024 bytes; px: lado mayor)
+    ASSET_BUDGETS = ASSET_BUDGETS
+
+    def __init__(self, docs_dir: str = DEFAULT_DOCS_DIR, blog_dir: str = DEFAULT_BLOG_DIR, db_path: str = None):
+        import sqlite3
+
+        self.root = index_key(docs_dir)
+        self.blog = index_key(blog_dir)
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path or ':memory:')
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS post_index ("
+            "path TEXT PRIMARY KEY, version TEXT, mtime_ns INTEGER, size INTEGER, entry TEXT)"
+        )
+        self.entries = {}  # {clave: entrada} de todas las páginas, ordenado por ruta
+        self.posts = {}  # Subconjunto de entries bajo el directorio del blog
+        self.files = set()  # Claves del resto de ficheros
+        self.by_url = {}  # {url del post: clave}
+        self._anchors = {}  # {clave: set de anclas}, construido bajo demanda
+        self.targets = None  # Claves de las páginas validadas en esta ejecución (None: todas)
+        self.external = None  # ExternalLinkChecker configurado desde la CLI (external-links)
+        self.budgets = dict(self.ASSET_BUDGETS)
+        self._assets = None  # AssetCache, creado con la primera imagen consultada
+        self.config = None
+        self.findings = {}  # {clave: [hallazgos]} de la última llamada a check()
+
+    def _scan_tree(self, directory: str, stats: dict):
+        """{clave: (mtime_ns, tamaño)} de los .md bajo `directory` (sin plantillas); el resto a files"""
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                key = f"{directory}/{entry.name}"
+                if entry.is_dir():
+                    if entry.name != 'template':
+                        self._scan_tree(key, stats)
+                elif entry.name.endswith('.md'):
+                    stat = entry.stat()
+                    stats[key] = (stat.st_mtime_ns, stat.st_size)
+                else:
+                    self.files.add(key)
+        return stats
+
+    def refresh(self, jobs: int = 1) -> int:
+        """Sincroniza el índice con las páginas en disco; devuelve cuántas se han reindexado"""
+        self.files = set()
+        stats = {}
+        for root in (self.root, self.blog):
+            if Path(root).is_dir() and not (root != self.root and root.startswith(self.root + '/')):
+                self._scan_tree(root, stats)
+
+        stored = {row[0]: row[1:] for row in self.conn.execute(
+            "SELECT path, version, mtime_ns, size, entry FROM post_index")}
+        entries = {}
+        stale = []
+        for key, (mtime_ns, size) in stats.items():
+            row = stored.get(key)
+            if row and row[:3] == (self.INDEX_VERSION, mtime_ns, size):
+                entries[key] = json.loads(row[3])
+            else:
+                stale.append(key)
+
+        removed = stored.keys() - stats.keys()
+        if stale or removed:
+            indexed = self._index_many([Path(key) for key in stale], jobs)
+            entries.update(zip(stale, indexed))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO post_index (path, version, mtime_ns, size, entry) VALUES (?, ?, ?, ?, ?)",
+                [(key, self.INDEX_VERSION, *stats[key], json.dumps(entries[key], ensure_ascii=False))
+                 for key in stale]
+            )
+            self.conn.executemany("DELETE FROM post_index WHERE path = ?", [(key,) for key in removed])
+            self.conn.commit()
+
+        self.entries = dict(sorted(entries.items()))
+        self.posts = {key: entry for key, entry in self.entries.items() if key.startswith(self.blog + '/')}
+        self.by_url = {}
+        for key, entry in self.posts.items():
+            if entry['url']:
+                self.by_url.setdefault(entry['url'], key)
+        self._anchors = {}
+        return len(stale)
+
+    @staticmethod
+    def _index_many(paths: list, jobs: int) -> list:
+        # Mismo umbral que iter_results: con pocas páginas el pool cuesta más que indexar en serie
+        if jobs <= 1 or len(paths) < 4:
+            return [index_page(path) for path in paths]
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(index_page, paths, chunksize=8))
+
+    def selected(self):
+        """Claves de las páginas validadas en esta ejecución (todas si no se han indicado)"""
+        return self.targets if self.targets is not None else self.entries
+
+    def asset(self, key: str):
+        """{'size', 'format', 'width', 'height'} de un fichero de docs/ (None si no existe)"""
+        if self._assets is None:
+            self._assets = AssetCache(self.conn)
+        return self._assets.get(key)
+
+    def page_images(self, key: str) -> list:
+        """[(línea, src, clave o None si no existe, info de asset())] de las imágenes locales de una página"""
+        images = []
+        entry = self.entries.get(key)
+        for number, src in (entry['images'] if entry else ()):
+            kind, asset_key, _ = self.resolve_link(key, src)
+            if kind == 'file':
+                images.append((number, src, asset_key, self.asset(asset_key) if asset_key else None))
+        return images
+
+    def anchors(self, key: str) -> set:
+        anchors = self._anchors.get(key)
+        if anchors is None:
+            anchors = self._anchors[key] = set(self.entries[key]['anchors'])
+        return anchors
+
+    def resolve_link(self, source: str, target: str) -> tuple:
+        """Destino de un enlace de la página `source`: (tipo, clave o None si no existe, fragmento)
+
+        tipo: 'post' (.md bajo el blog o URL /blog/yyyy/MM/dd/slug/), 'page' (otro .md),
+        'file' (cualquier otro fichero) o None si el enlace no es interno (URL externa,
+        mailto:...) o no se puede resolver sin construir el sitio (URL relativa de directorio).
+        Las URLs absolutas (/ruta/ o SITE_URL/ruta/) se resuelven como use_directory_urls:
+        ruta.md, ruta/index.md o ruta/README.md.
+        """
+        path, _, fragment = target.partition('#')
+        path = path.split('?', 1)[0]
+        if not path:
+            return ('post' if source in self.posts else 'page'), source, fragment
+        if path.startswith(SITE_URL):
+            path = path[len(SITE_URL):] or '/'
+        if path.startswith('//') or ':' in path.split('/', 1)[0]:
+            return None, None, fragment
+        if '%' in path:
+            from urllib.parse import unquote
+            path = unquote(path)
+
+        if path.startswith('/blog/'):
+            match = BLOG_URL_PATTERN.match(path)
+            if match:
+                return 'post', self.by_url.get('/'.join(match.groups())), fragment
+        absolute = path.startswith('/')
+        base = posixpath.normpath(self.root + path if absolute else
+                                  posixpath.join(posixpath.dirname(source), path))
+
+        if base.endswith('.md'):
+            kind = 'post' if base.startswith(self.blog + '/') else 'page'
+            return kind, base if base in self.entries else None, fragment
+        if base in self.files:
+            return 'file', base, fragment
+        if absolute or path.endswith('/'):
+            for candidate in (f"{base}.md", f"{base}/index.md", f"{base}/README.md"):
+                if candidate in self.entries:
+                    return ('post' if candidate in self.posts else 'page'), candidate, fragment
+            # Una URL relativa de directorio depende de la URL de la página: no se comprueba
+            return ('page', None, fragment) if absolute else (None, None, fragment)
+        return 'file', None, fragment
+
+    def check(self, config: RuleConfig, timings: dict = None) -> dict:
+        """Ejecuta las reglas entre páginas activas y devuelve {clave: [hallazgos]}"""
+        self.config = config
+        self.findings = {}
+        if self._assets:
+            self._assets.seen = {}  # En --watch una imagen puede haber cambiado desde la última vez
+        for key in self.selected():
+            # Páginas indexadas sin frontmatter: las reglas las ven vacías, el fallo se informa
+            entry = self.entries.get(key)
+            if entry and entry['error']:
+                self.findings.setdefault(key, []).append(entry['error'])
+        for rule_cls in index_rules(config):
+            start = time.perf_counter()
+            rule_cls().check_index(self)
+            if timings is not None:
+                timings[rule_cls.id] = timings.get(rule_cls.id, 0.0) + time.perf_counter() - start
+        if self._assets:
+            self._assets.save()
+        return self.findings
+
+    def findings_for(self, filepath: Path, findings: list = ()) -> list:
+        """`findings` de la página más los del índice (sin repetir el error de carga de ambos)"""
+        return list(findings) + [finding for finding in self.findings.get(index_key(filepath), [])
+                                 if finding not in findings]
+
+    def report(self, rule: Rule, key: str, message: str, severity: str = None,
+               line: int = None, details: list = None):
+        """Registra un hallazgo para la página `key` (misma semántica que PostValidator.report)"""
+        severity = self.config.severity.get(rule.id) or severity or rule.severity
+        self.findings.setdefault(key, []).append(make_finding(rule.id, severity, message, line, details))
+
+    def report_lines(self, rule: Rule, key: str, title: str, issues: list, severity: str = None):
+        """Un hallazgo que agrupa [[línea, mensaje], ...] (como MD032: se muestran los 5 primeros)"""
+        if issues:
+            self.report(
+                rule, key,
+                f"{title}:\n  " + "\n  ".join(f"Línea {number}: {issue}" for number, issue in issues[:5])
+                + (f"\n  ... y {len(issues) - 5} más" if len(issues) > 5 else ''),
+                severity, line=issues[0][0], details=issues
+            )
+
+    def close(self):
+        self.conn.close()
+        if self.external:
+            self.external.close()
+
+
+class ExternalLinkChecker:
+    """Comprueba URLs externas en paralelo con asyncio y guarda el resultado con TTL
+
+    asyncio reparte el trabajo con un límite global (concurrency) y otro por host
+    (per_host) para no saturar learn.microsoft.com y similares. La librería estándar
+    no trae cliente HTTP asíncrono, así que cada petición (HEAD y, si el servidor no lo
+    admite, GET) es urllib en un pool de hilos. Resultados en SQLite (tabla
+    external_links): en cada ejecución solo se recomprueban las URLs sin resultado o
+    con más de `ttl` segundos. Un 429 con Retry-After corto se repite una vez tras esperar
+    (con el hueco del host ocupado); si sigue limitado no se guarda.
+    """
+
+    DEFAULT_TTL_HOURS = LINK_TTL_HOURS
+    USER_AGENT = 'validate_post.py link checker (+https://github.com/rfernandezdo/rfernandezdo.github.io)'
+    # El servidor no admite HEAD (o lo rechaza sin más): se repite con GET
+    RETRY_WITH_GET = (403, 405, 501)
+    # Retry-After (segundos) más largo que esto: no se espera, el 429 queda como warning
+    MAX_RETRY_AFTER = 5
+
+    def __init__(self, db_path: str = None, ttl: float = DEFAULT_TTL_HOURS * 3600, timeout: float = 10,
+                 concurrency: int = 16, per_host: int = 4, refresh: bool = False):
+        import sqlite3
+
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path or ':memory:')
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS external_links ("
+            "url TEXT PRIMARY KEY, status INTEGER, error TEXT, checked_at REAL)"
+        )
+        self.ttl = ttl
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.refresh = refresh  # Ignorar los resultados guardados (--no-cache)
+        self.checked = 0  # URLs pedidas por red en la última llamada a check()
+        self.cached = 0
+
+    def check(self, urls: list) -> dict:
+        """{url: (status HTTP o None, error o None)} de cada URL (sin fragmento)"""
+        import asyncio
+
+        results = {}
+        if not self.refresh:
+            fresh_after = time.time() - self.ttl
+            for url, status, error, checked_at in self.conn.execute(
+                    "SELECT url, status, error, checked_at FROM external_links"):
+                if checked_at >= fresh_after:
+                    results[url] = (status, error)
+            results = {url: results[url] for url in urls if url in results}
+        stale = [url for url in urls if url not in results]
+        self.cached, self.checked = len(results), len(stale)
+
+        if stale:
+            checked = asyncio.run(self._check_all(stale))
+            now = time.time()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO external_links (url, status, error, checked_at) VALUES (?, ?, ?, ?)",
+                [(url, status, error, now) for url, (status, error) in checked.items() if status != 429]
+            )
+            self.conn.commit()
+            results.update(checked)
+        return results
+
+    async def _check_all(self, urls: list) -> dict:
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from urllib.parse import urlsplit
+
+        loop = asyncio.get_running_loop()
+        total = asyncio.Semaphore(self.concurrency)
+        hosts = {}
+
+        async def check(url):
+            host = hosts.setdefault(urlsplit(url).netloc.lower(), asyncio.Semaphore(self.per_host))
+            async with host, total:
+                return url, await loop.run_in_executor(executor, self._request, url)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return dict(await asyncio.gather(*(check(url) for url in urls)))
+
+    def _request(self, url: str) -> tuple:
+        """(status, error) de una URL; urllib sigue las redirecciones"""
+        from urllib.error import HTTPError, URLError
+        from urllib.request import Request, urlopen
+
+        method = 'HEAD'
+        waited = False
+        while True:
+            request = Request(url, method=method, headers={'User-Agent': self.USER_AGENT})
+            try:
+                with urlopen(request, timeout=self.timeout) as response:
+                    return response.status, None
+            except HTTPError as e:
+                if method == 'HEAD' and e.code in self.RETRY_WITH_GET:
+                    method = 'GET'
+                    continue
+                delay = self._retry_after(e) if e.code == 429 and not waited else None
+                if delay is None:
+                    return e.code, None
+                waited = True
+                time.sleep(delay)
+            except (URLError, OSError, ValueError) as e:
+                return None, str(getattr(e, 'reason', e))
+
+    def _retry_after(self, error) -> float:
+        """Segundos de Retry-After si no pasan de MAX_RETRY_AFTER (None si falta o es una fecha)"""
+        value = (error.headers.get('Retry-After') or '').strip()
+        if not value.isdigit() or int(value) > self.MAX_RETRY_AFTER:
+            return None
+        return int(value)
+
+    def close(self):
+        self.conn.close()
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f} MB" if size >= 1024 * 1024 else f"{size / 1024:.0f} KB"
+
+
+def format_asset(info: dict) -> str:
+    """'702 KB, 2048×1152 px' (sin dimensiones si no se conocen)"""
+    text = format_size(info['size'])
+    if info['width'] is not None:
+        text += f", {info['width']}×{info['height']} px"
+    return text
+
+
+def print_image_report(index: SiteIndex, file=None):
+    """Informe de --image-report: peso y dimensiones de las imágenes locales de cada página"""
+    print(f"{'='*70}", file=file)
+    print("Imágenes por página (local; cada fichero cuenta una vez)", file=file)
+    print(f"{'='*70}", file=file)
+    for key in sorted(index.selected()):
+        images = {}
+        for _, src, asset_key, info in index.page_images(key):
+            images.setdefault(asset_key or src, (src, info))
+        if not images:
+            continue
+        total = sum(info['size'] for _, info in images.values() if info)
+        print(f"  {key}: {format_size(total)} en {len(images)} imágenes", file=file)
+        for src, info in sorted(images.values(), key=lambda image: image[1]['size'] if image[1] else -1, reverse=True):
+            print(f"    {format_asset(info) if info else 'no encontrada':<26} {src}", file=file)
+    print(f"{'='*70}", file=file)
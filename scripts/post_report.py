@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Salidas legibles por máquina de post_validator.py: JSON Lines y SARIF 2.1.0
+
+Se importa solo con --format jsonl / sarif (o en --watch con jsonl).
+"""
+
+import json
+from pathlib import Path
+
+from post_validator import LOAD_RULE_ID, RULES, RuleConfig, split_findings
+
+
+def finding_records(findings: list):
+    """Registros planos de los hallazgos: los agrupados (ej: MD032) dan uno por línea afectada"""
+    for finding in findings:
+        if finding['details']:
+            for line, message in finding['details']:
+                yield {'rule': finding['rule'], 'severity': finding['severity'], 'line': line, 'message': message}
+        else:
+            yield {'rule': finding['rule'], 'severity': finding['severity'],
+                   'line': finding['line'], 'message': finding['message']}
+
+
+def write_jsonl(stream, filepath: Path, findings: list, cached: bool):
+    """Un objeto JSON por post y línea, escrito y volcado en cuanto el post termina"""
+    errors, warnings = split_findings(findings)
+    record = {
+        'path': filepath.as_posix(),
+        'valid': not errors,
+        'errors': len(errors),
+        'warnings': len(warnings),
+        'cached': cached,
+        'findings': list(finding_records(findings)),
+    }
+    stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+    stream.flush()
+
+
+class SarifWriter:
+    """Log SARIF 2.1.0 escrito en streaming: cabecera, resultados según llegan y cierre
+
+    El documento completo nunca está en memoria: cada post añade sus resultados al
+    array `results` y se vuelca a la salida.
+    """
+
+    SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+    def __init__(self, stream, config: RuleConfig):
+        self.stream = stream
+        self.first = True
+        descriptors = [{
+            'id': LOAD_RULE_ID,
+            'shortDescription': {'text': "Lectura del fichero y frontmatter YAML"},
+            'defaultConfiguration': {'level': 'error'},
+        }]
+        for rule_id in config.active:
+            rule = RULES[rule_id]
+            descriptors.append({
+                'id': rule_id,
+                'shortDescription': {'text': rule.description},
+                'defaultConfiguration': {'level': config.severity.get(rule_id) or rule.severity},
+            })
+        self.rule_index = {descriptor['id']: i for i, descriptor in enumerate(descriptors)}
+        log = {
+            '$schema': self.SCHEMA,
+            'version': '2.1.0',
+            'runs': [{'tool': {'driver': {'name': 'validate_post', 'rules': descriptors}}, 'results': []}],
+        }
+        # Se parte el documento por el array de resultados vacío: prefijo + resultados + sufijo
+        self.prefix, self.suffix = json.dumps(log, ensure_ascii=False).split('"results": []')
+        self.stream.write(self.prefix + '"results": [')
+        self.stream.flush()
+
+    def write(self, filepath: Path, findings: list):
+        for record in finding_records(findings):
+            location = {'artifactLocation': {'uri': filepath.as_posix()}}
+            if record['line']:
+                location['region'] = {'startLine': record['line']}
+            result = {
+                'ruleId': record['rule'],
+                'ruleIndex': self.rule_index.get(record['rule'], -1),
+                'level': record['severity'],
+                'message': {'text': record['message']},
+                'locations': [{'physicalLocation': location}],
+            }
+            self.stream.write(('\n' if self.first else ',\n') + json.dumps(result, ensure_ascii=False))
+            self.first = False
+        self.stream.flush()
+
+    def close(self):
+        self.stream.write(']' + self.suffix + '\n')
+        self.stream.flush()
@@ -0,0 +1,1402 @@
+#!/usr/bin/env python3
+"""
+Validación de posts para MkDocs Material Blog: reglas, cache, salidas y CLI
+Verifica formato, frontmatter y convenciones del blog rfernandezdo.github.io
+
+Punto de entrada: scripts/validate_post.py (importa este módulo para que Python
+reutilice su bytecode de __pycache__ en lugar de compilarlo en cada ejecución).
+El índice del sitio (post_index.py), --watch (post_watch.py) y las salidas jsonl/sarif
+(post_report.py) van en módulos aparte que solo se importan si se usan.
+"""
+
+import sys
+import re
+import os
+import time
+import argparse
+from pathlib import Path
+from datetime import date
+from functools import partial
+from collections import deque
+
+# Importaciones pesadas (PyYAML, multiprocessing, sqlite3, hashlib, json, watchdog...) se
+# hacen donde se usan: validar un post en pre-commit no debe pagar el arranque de lo que
+# no necesita. Medición: python scripts/benchmark_validate_post.py --startup
+
+
+# Patrones precompilados: se evalúan una vez por línea en el escaneo único
+FRONTMATTER_PATTERN = re.compile(r'^---\n(.*?)\n---\n', re.DOTALL)
+LIST_ITEM_PATTERN = re.compile(r'^(\s*)([-*+]|\d+\.)\s+')
+FILENAME_PATTERN = re.compile(r'^\d{8}_[a-z0-9_]+\.md$')
+# Mismo formato que datetime.strptime(valor, '%Y-%m-%d') sin importar _strptime
+ISO_DATE_PATTERN = re.compile(r'^(\d\d\d\d)-(1[0-2]|0[1-9]|[1-9])-(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])$')
+
+# Subconjunto de YAML de los frontmatter del blog: `clave: escalar` y listas `- escalar`
+FM_KEY_PATTERN = re.compile(r'^([A-Za-z_][\w-]*):(?: +(.*?))? *$')
+FM_ITEM_PATTERN = re.compile(r'^( *)- +(.*?) *$')
+FM_INT_PATTERN = re.compile(r'^(?:0|[1-9][0-9]*)$')
+FM_DATE_PATTERN = re.compile(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}$')
+# Escalares planos que PyYAML (YAML 1.1) resuelve a bool / null
+FM_SPECIAL_SCALARS = {
+    **{word: True for word in ('yes', 'Yes', 'YES', 'true', 'True', 'TRUE', 'on', 'On', 'ON')},
+    **{word: False for word in ('no', 'No', 'NO', 'false', 'False', 'FALSE', 'off', 'Off', 'OFF')},
+    **{word: None for word in ('~', 'null', 'Null', 'NULL')},
+}
+# Primeros caracteres con significado en YAML (o numéricos): esos escalares van a PyYAML
+FM_INDICATORS = set('-?:,[]{}#&*!|>\'"%@`+.=<~')
+
+# Devuelto por parse_simple_frontmatter cuando hace falta el parser YAML completo
+COMPLEX_FRONTMATTER = object()
+
+
+def _simple_scalar(raw: str):
+    """Valor de un escalar del subconjunto simple, o COMPLEX_FRONTMATTER si no lo es"""
+    if raw in FM_SPECIAL_SCALARS:
+        return FM_SPECIAL_SCALARS[raw]
+    if not raw:
+        return COMPLEX_FRONTMATTER
+    first = raw[0]
+    if first in '\'"':
+        inner = raw[1:-1]
+        if len(raw) >= 2 and raw[-1] == first and first not in inner and '\\' not in inner:
+            return inner
+        return COMPLEX_FRONTMATTER
+    if first.isdigit():
+        if FM_INT_PATTERN.match(raw):
+            return int(raw)
+        if FM_DATE_PATTERN.match(raw):
+            try:
+                return date(int(raw[:4]), int(raw[5:7]), int(raw[8:]))
+            except ValueError:
+                return COMPLEX_FRONTMATTER
+        return COMPLEX_FRONTMATTER
+    if first in FM_INDICATORS or ':' in raw or '#' in raw or '\t' in raw:
+        return COMPLEX_FRONTMATTER
+    return raw
+
+
+def parse_simple_frontmatter(text: str):
+    """Parsea sin PyYAML el frontmatter típico de un post (mismo resultado que yaml.safe_load)
+
+    Admite `clave: escalar` y `clave:` seguida de `  - escalar`, con escalares planos,
+    entre comillas sin escapes, bool/null de YAML 1.1, enteros y fechas YYYY-MM-DD.
+    Ante cualquier otra construcción devuelve COMPLEX_FRONTMATTER.
+    """
+    result = {}
+    items = None  # Lista de la última clave sin valor en línea
+    items_indent = None
+
+    for line in text.split('\n'):
+        if not line.strip():
+            continue
+        match = FM_ITEM_PATTERN.match(line)
+        if match:
+            if items is None or (items_indent is not None and match.group(1) != items_indent):
+                return COMPLEX_FRONTMATTER
+            items_indent = match.group(1)
+            value = _simple_scalar(match.group(2))
+            if value is COMPLEX_FRONTMATTER:
+                return COMPLEX_FRONTMATTER
+            items.append(value)
+            continue
+
+        match = FM_KEY_PATTERN.match(line)
+        if not match or match.group(1) in FM_SPECIAL_SCALARS:
+            return COMPLEX_FRONTMATTER
+        key, raw = match.groups()
+        if raw:
+            value = _simple_scalar(raw)
+            if value is COMPLEX_FRONTMATTER:
+                return COMPLEX_FRONTMATTER
+            result[key] = value
+            items = None
+        else:
+            items = result[key] = []
+            items_indent = None
+
+    # `clave:` sin elementos es null en YAML
+    for key, value in result.items():
+        if isinstance(value, list) and not value:
+            result[key] = None
+    return result or None
+
+
+def load_yaml(text: str):
+    """yaml.safe_load con el loader en C (libyaml) si está disponible
+
+    Si falla se repite con el loader en Python, cuyo mensaje de error incluye el
+    fragmento con el problema. Devuelve (valor, excepción o None): además de YAMLError,
+    un valor imposible (`date: 2025-02-30`) da ValueError al construirlo.
+    """
+    import yaml
+
+    try:
+        return yaml.load(text, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader)), None
+    except (yaml.YAMLError, ValueError, TypeError):
+        pass
+    try:
+        return yaml.safe_load(text), None
+    except (yaml.YAMLError, ValueError, TypeError) as e:
+        return None, e
+
+
+def parse_frontmatter(text: str):
+    """Frontmatter por el camino rápido y, si no es el subconjunto simple, con PyYAML
+
+    Devuelve (valor, excepción o None) como load_yaml().
+    """
+    value = parse_simple_frontmatter(text)
+    if value is COMPLEX_FRONTMATTER:
+        return load_yaml(text)
+    return value, None
+
+
+def parse_iso_date(value) -> date:
+    """Fecha de `str(value)` con formato YYYY-MM-DD (ValueError si no lo cumple)"""
+    match = ISO_DATE_PATTERN.match(str(value))
+    if not match:
+        raise ValueError(f"Formato de fecha inválido: {value!r}")
+    return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+
+
+SEVERITIES = ('error', 'warning')
+
+# ID de los hallazgos previos a las reglas (lectura del fichero, frontmatter YAML)
+LOAD_RULE_ID = 'load'
+
+# Registro de reglas por ID, en orden de ejecución (y de reporte)
+RULES = {}
+
+
+def register_rule(cls):
+    """Decorador que registra una regla en RULES por su ID"""
+    if cls.id in RULES:
+        raise ValueError(f"Regla duplicada: '{cls.id}'")
+    RULES[cls.id] = cls
+    return cls
+
+
+class Rule:
+    """Regla de validación registrada
+
+    - id: identificador usado en --enable/--disable/--severity y en --profile
+    - severity: severidad por defecto de sus hallazgos ('error' o 'warning')
+    - enabled: si se ejecuta sin necesidad de --enable
+
+    Las reglas de documento implementan check(); las de línea heredan de LineRule.
+    Los hallazgos se registran con validator.report(self, mensaje[, severidad, line, details]).
+    """
+
+    id = None
+    description = ''
+    severity = 'error'
+    enabled = True
+
+    def check(self, validator):
+        raise NotImplementedError
+
+
+class LineRule(Rule):
+    """Regla evaluada línea a línea dentro del escaneo único (LineScanner)"""
+
+    def visit(self, scan):
+        raise NotImplementedError
+
+    def finish(self, validator):
+        """Se llama al terminar el escaneo para reportar lo acumulado"""
+
+
+class LineScanner:
+    """Recorre el cuerpo de un post una sola vez y entrega cada línea a las reglas
+
+    Estado compartido por todas las reglas (en lugar de que cada una vuelva a
+    recorrer el contenido y seguir frontmatter y bloques de código por su cuenta):
+      - lines / index / number: líneas del fichero, índice 0 y número de línea 1
+      - line: línea actual
+      - body_start: índice de la primera línea tras el frontmatter YAML parseado
+      - is_fence: la línea abre o cierra un bloque de código (```)
+      - in_code_block: la línea está dentro de un bloque (antes de procesar la valla)
+
+    Las líneas del frontmatter (desde un '---' inicial hasta el siguiente '---',
+    admitiendo espacios finales) y las líneas vacías no se entregan a las reglas;
+    siguen disponibles en `lines` para consultar el contexto (ej: prev_line).
+    """
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.lines = []
+        self.index = 0
+        self.line = ''
+        self.body_start = 0
+        self.is_fence = False
+        self.in_code_block = False
+
+    @property
+    def number(self):
+        return self.index + 1
+
+    @property
+    def prev_line(self):
+        return self.lines[self.index - 1] if self.index > 0 else None
+
+    @staticmethod
+    def frontmatter_end(lines: list) -> int:
+        """Índice de la primera línea tras el frontmatter (0 si no hay)"""
+        if not lines or lines[0].strip() != '---':
+            return 0
+        for index in range(1, len(lines)):
+            if lines[index].strip() == '---':
+                return index + 1
+        return len(lines)
+
+    @staticmethod
+    def _timed_visit(rule, timings: dict):
+        """Envuelve rule.visit acumulando su tiempo en timings[rule.id] (solo con --profile)"""
+        visit = rule.visit
+        perf_counter = time.perf_counter
+
+        def timed(scan):
+            start = perf_counter()
+            visit(scan)
+            timings[rule.id] += perf_counter() - start
+        return timed
+
+    def scan(self, lines: list, body_start: int = 0, timings: dict = None):
+        """Escanea `lines` entregando cada línea de contenido a las reglas"""
+        if timings is None:
+            visitors = [rule.visit for rule in self.rules]
+        else:
+            for rule in self.rules:
+                timings.setdefault(rule.id, 0.0)
+            visitors = [self._timed_visit(rule, timings) for rule in self.rules]
+        self.lines = lines
+        self.body_start = body_start
+        in_code_block = self.in_code_block = False
+
+        for index in range(self.frontmatter_end(lines), len(lines)):
+            line = lines[index]
+            if not line:
+                continue
+            self.index = index
+            self.line = line
+            is_fence = self.is_fence = line.startswith('```')
+            for visit in visitors:
+                visit(self)
+            if is_fence:
+                in_code_block = self.in_code_block = not in_code_block
+
+
+@register_rule
+class FilenameRule(Rule):
+    """Nombre YYYYMMDD_slug.md y fecha coherente con el frontmatter"""
+
+    id = 'filename'
+    description = "Nombre YYYYMMDD_slug.md y fecha igual a la del frontmatter"
+
+    def check(self, validator):
+        filename = validator.filepath.name
+
+        if not FILENAME_PATTERN.match(filename):
+            validator.report(
+                self,
+                f"Nombre de archivo inválido: '{filename}'. "
+                f"Debe seguir el patrón YYYYMMDD_descriptive_slug.md"
+            )
+
+        # Validar que la fecha del filename coincida con la del frontmatter
+        frontmatter = validator.frontmatter
+        if frontmatter and 'date' in frontmatter:
+            date_from_filename = filename[:8]
+            try:
+                expected_date = parse_iso_date(frontmatter['date']).strftime('%Y%m%d')
+                if date_from_filename != expected_date:
+                    validator.report(
+                        self,
+                        f"Fecha en filename ({date_from_filename}) no coincide "
+                        f"con frontmatter ({expected_date})",
+                        'warning'
+                    )
+            except ValueError:
+                pass  # Ya se reportará en la regla frontmatter
+
+
+@register_rule
+class FrontmatterRule(Rule):
+    """Campos obligatorios y tipos del frontmatter"""
+
+    id = 'frontmatter'
+    description = "Campos obligatorios, tipos, fecha ISO 8601 y author"
+    REQUIRED_FIELDS = ['draft', 'date', 'authors', 'categories', 'tags']
+    VALID_AUTHOR = 'rfernandezdo'
+
+    def check(self, validator):
+        frontmatter = validator.frontmatter
+        if not frontmatter:
+            return  # Ya se reportó el error al cargar
+
+        # Verificar campos obligatorios
+        for field in self.REQUIRED_FIELDS:
+            if field not in frontmatter:
+                validator.report(self, f"Campo obligatorio faltante en frontmatter: '{field}'", line=1)
+
+        # Validar draft (debe ser booleano)
+        if 'draft' in frontmatter:
+            if not isinstance(frontmatter['draft'], bool):
+                validator.report(self, "Campo 'draft' debe ser true o false (sin comillas)", line=1)
+
+        # Validar fecha (formato ISO 8601: YYYY-MM-DD)
+        if 'date' in frontmatter:
+            try:
+                parse_iso_date(frontmatter['date'])
+            except ValueError:
+                validator.report(
+                    self,
+                    f"Formato de fecha inválido: '{frontmatter['date']}'. "
+                    f"Debe ser YYYY-MM-DD (ISO 8601)",
+                    line=1
+                )
+
+        # Validar author
+        if 'authors' in frontmatter:
+            authors = frontmatter['authors']
+            if not isinstance(authors, list):
+                validator.report(self, "Campo 'authors' debe ser una lista", line=1)
+            elif self.VALID_AUTHOR not in authors:
+                validator.report(self, f"Author debe ser '{self.VALID_AUTHOR}' (case-sensitive)", line=1)
+
+        # Validar categories y tags (deben ser listas)
+        for field, label in (('categories', 'categorías definidas'), ('tags', 'tags definidos')):
+            if field in frontmatter:
+                if not isinstance(frontmatter[field], list):
+                    validator.report(self, f"Campo '{field}' debe ser una lista", line=1)
+                elif len(frontmatter[field]) == 0:
+                    validator.report(self, f"No hay {label}", 'warning', line=1)
+
+
+@register_rule
+class RequiredSectionsRule(LineRule):
+    """Título principal (# Título) y secciones recomendadas (## Resumen, ## Referencias)"""
+
+    id = 'required-sections'
+    description = "Título principal y secciones '## Resumen' / '## Referencias'"
+    severity = 'warning'
+
+    def __init__(self):
+        self.has_title = False
+        self.has_summary = False
+        self.has_references = False
+
+    def visit(self, scan: LineScanner):
+        line = scan.line
+        if not line.startswith('#') or scan.index < scan.body_start:
+            return
+        if line.startswith('# ') and len(line) > 2:
+            self.has_title = True
+        elif line.startswith('## Resumen'):
+            self.has_summary = True
+        elif line.startswith('## Referencias'):
+            self.has_references = True
+
+    def finish(self, validator):
+        if not self.has_title:
+            validator.report(self, "No se encontró ningún título principal (# Título)")
+        if not self.has_summary:
+            validator.report(self, "Falta sección '## Resumen' recomendada")
+        if not self.has_references:
+            validator.report(self, "Falta sección '## Referencias' recomendada")
+
+
+@register_rule
+class FenceLanguageRule(LineRule):
+    """Bloques de código abiertos sin lenguaje (``` sin texto en la misma línea)"""
+
+    id = 'fence-language'
+    description = "Bloques de código sin lenguaje especificado"
+    severity = 'warning'
+
+    def __init__(self):
+        self.lines = []  # Números de línea de las aperturas sin lenguaje
+
+    def visit(self, scan: LineScanner):
+        # Solo aperturas: los cierres también son líneas ``` sin texto
+        if scan.is_fence and not scan.in_code_block and scan.line.strip() == '```':
+            self.lines.append(scan.number)
+
+    def finish(self, validator):
+        if self.lines:
+            validator.report(
+                self,
+                f"Hay {len(self.lines)} bloque(s) de código sin lenguaje especificado. "
+                "Usa ```bash, ```python, etc.",
+                line=self.lines[0],
+                details=[[number, "Bloque de código sin lenguaje especificado"] for number in self.lines]
+            )
+
+
+@register_rule
+class ListSpacingRule(LineRule):
+    """MD032: Lists should be surrounded by blank lines"""
+
+    id = 'MD032'
+    description = "Listas precedidas de línea en blanco"
+
+    def __init__(self):
+        self.issues = []
+
+    def visit(self, scan: LineScanner):
+        if scan.is_fence or scan.in_code_block:
+            return
+        line = scan.line
+        # Detectar inicio de lista (-, *, + o número.)
+        if not LIST_ITEM_PATTERN.match(line) or scan.index == 0:
+            return
+
+        # Verificar línea anterior (debe estar vacía o ser parte de lista/tabla)
+        prev_line = scan.prev_line
+        prev_stripped = prev_line.strip()
+        if not prev_stripped or prev_stripped.startswith('|') or LIST_ITEM_PATTERN.match(prev_line):
+            return
+        # Encabezados delimitan la lista; el resto (ej: "**Título:**") necesita línea en blanco
+        if not prev_line.startswith('#'):
+            self.issues.append([
+                scan.number,
+                f"Lista sin línea en blanco anterior. Agrega línea vacía antes de '{line.strip()[:50]}...'"
+            ])
+
+    def finish(self, validator):
+        if self.issues:
+            validator.report(
+                self,
+                f"MD032 - Listas deben estar rodeadas de líneas en blanco:\n  " +
+                "\n  ".join(f"Línea {number}: {issue}"
+                             for number, issue in self.issues[:5]),  # Mostrar solo primeros 5
+                line=self.issues[0][0],
+                details=self.issues
+            )
+
+
+@register_rule
+class ForbiddenMarksRule(Rule):
+    """Marcas de validación interna que no deben publicarse"""
+
+    id = 'forbidden-marks'
+    description = "Marcas internas prohibidas (validado MCP, etc.)"
+    MARKS = [
+        'validado MCP', 'MCP validado', 'verificado con MCP',
+        'validado Terraform MCP', 'validación MCP'
+    ]
+
+    def check(self, validator):
+        if not validator.content:
+            return
+        content_lower = validator.content.lower()
+        for mark in self.MARKS:
+            position = content_lower.find(mark.lower())
+            if position != -1:
+                validator.report(
+                    self,
+                    f"Marca prohibida detectada: '{mark}'. "
+                    "La validación MCP es interna, no debe aparecer en el post.",
+                    line=content_lower.count('\n', 0, position) + 1
+                )
+
+
+class RuleConfig:
+    """Reglas activas y severidades configuradas (--enable / --disable / --severity)"""
+
+    def __init__(self, enable=(), disable=(), severity=None):
+        severity = dict(severity or {})
+        unknown = sorted((set(enable) | set(disable) | set(severity)) - set(RULES))
+        if unknown:
+            raise ValueError(f"Reglas desconocidas: {', '.join(unknown)} (disponibles: {', '.join(RULES)})")
+        invalid = sorted(f"{rule_id}={value}" for rule_id, value in severity.items() if value not in SEVERITIES)
+        if invalid:
+            raise ValueError(f"Severidad inválida: {', '.join(invalid)} (usa error o warning)")
+
+        self.severity = severity
+        self.active = [rule_id for rule_id, rule in RULES.items()
+                       if (rule.enabled or rule_id in enable) and rule_id not in disable]
+
+    def signature(self) -> str:
+        """Identifica la configuración (forma parte de la versión de reglas de la cache)"""
+        overrides = ','.join(f"{rule_id}={value}" for rule_id, value in sorted(self.severity.items()))
+        return f"{','.join(self.active)};{overrides}"
+
+
+def make_finding(rule_id: str, severity: str, message: str, line: int = None, details: list = None) -> dict:
+    """Hallazgo serializable (JSON / pickle): regla, severidad, mensaje, línea y detalle por línea"""
+    return {'rule': rule_id, 'severity': severity, 'message': message, 'line': line, 'details': details or []}
+
+
+def frontmatter_error(error: Exception) -> dict:
+    """Hallazgo de carga para un frontmatter que no se puede parsear"""
+    mark = getattr(error, 'problem_mark', None)
+    return make_finding(
+        LOAD_RULE_ID, 'error', f"Error parseando frontmatter YAML: {error}",
+        mark.line + 2 if mark else 1  # +1 base 1, +1 por el '---' inicial
+    )
+
+
+def index_key(path) -> str:
+    """Clave de una página en el índice: ruta relativa al directorio actual, con '/'"""
+    return Path(os.path.relpath(path)).as_posix()
+
+
+def split_findings(findings: list) -> tuple:
+    """Mensajes de los hallazgos separados en (errores, advertencias), en orden de reporte"""
+    errors = [finding['message'] for finding in findings if finding['severity'] == 'error']
+    warnings = [finding['message'] for finding in findings if finding['severity'] != 'error']
+    return errors, warnings
+
+
+class PostValidator:
+    """Validador de posts del blog: ejecuta las reglas activas de RULES"""
+
+    # Incrementar al cambiar reglas para invalidar la cache de resultados
+    RULES_VERSION = '4'
+
+    def __init__(self, filepath: Path, config: RuleConfig = None, profile: bool = False):
+        self.filepath = filepath
+        self.config = config or RuleConfig()
+        self.profile = profile
+        self.findings = []  # Ver make_finding()
+        self.content = None
+        self.frontmatter = None
+        self.body_start = 0  # Índice de la primera línea tras el frontmatter
+        self.timings = {}  # {rule_id: segundos} (solo con profile)
+
+    def validate(self) -> bool:
+        """Ejecuta todas las reglas activas en el orden del registro"""
+        self._timed('(carga)', self._load_file)
+
+        # Las reglas entre páginas se evalúan aparte, sobre el índice del sitio (SiteIndex)
+        rules = [RULES[rule_id]() for rule_id in self.config.active
+                 if not issubclass(RULES[rule_id], IndexRule)]
+        line_rules = [rule for rule in rules if isinstance(rule, LineRule)]
+        for rule in rules:
+            if not isinstance(rule, LineRule):
+                self._timed(rule.id, rule.check, self)
+            elif rule is line_rules[0]:
+                # Todas las reglas de línea comparten un escaneo, en la posición de la primera
+                self._scan_lines(line_rules)
+
+        return len(self.errors) == 0
+
+    @property
+    def errors(self) -> list:
+        return split_findings(self.findings)[0]
+
+    @property
+    def warnings(self) -> list:
+        return split_findings(self.findings)[1]
+
+    def report(self, rule: Rule, message: str, severity: str = None, line: int = None, details: list = None):
+        """Registra un hallazgo; la severidad configurada para la regla prevalece
+
+        line: primera línea afectada; details: [[línea, mensaje], ...] cuando el mensaje
+        agrupa varias líneas (las salidas jsonl/sarif emiten un registro por cada una).
+        """
+        severity = self.config.severity.get(rule.id) or severity or rule.severity
+        self.findings.append(make_finding(rule.id, severity, message, line, details))
+
+    def _timed(self, key: str, func, *args):
+        if not self.profile:
+            return func(*args)
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.timings[key] = self.timings.get(key, 0.0) + time.perf_counter() - start
+
+    def _load_file(self):
+        """Carga el contenido del archivo"""
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                self.content = f.read()
+        except Exception as e:
+            self.findings.append(make_finding(LOAD_RULE_ID, 'error', f"Error leyendo archivo: {e}"))
+            return
+
+        # Extraer frontmatter
+        fm_match = FRONTMATTER_PATTERN.match(self.content)
+        if fm_match:
+            self.body_start = fm_match.group(0).count('\n')
+            # Camino rápido sin PyYAML para el frontmatter habitual (clave: valor y listas)
+            self.frontmatter, e = parse_frontmatter(fm_match.group(1))
+            if e is not None:
+                self.findings.append(frontmatter_error(e))
+        else:
+            self.findings.append(make_finding(
+                LOAD_RULE_ID, 'error', "No se encontró frontmatter válido (debe empezar con ---)", 1
+            ))
+
+    def _scan_lines(self, rules: list):
+        """Evalúa las reglas de línea en un único recorrido del contenido"""
+        if not self.content:
+            return
+
+        if not self.profile:
+            LineScanner(rules).scan(self.content.split('\n'), self.body_start)
+        else:
+            start = time.perf_counter()
+            LineScanner(rules).scan(self.content.split('\n'), self.body_start, self.timings)
+            # Coste del propio recorrido (split, estado compartido) fuera de las reglas
+            self.timings['(escaneo)'] = (time.perf_counter() - start
+                                         - sum(self.timings[rule.id] for rule in rules))
+        for rule in rules:
+            self._timed(rule.id, rule.finish, self)
+
+    def print_results(self):
+        """Imprime resultados de la validación"""
+        return print_results(self.filepath, self.errors, self.warnings)
+
+
+def print_results(filepath: Path, errors: list, warnings: list) -> bool:
+    """Imprime resultados de la validación de un post"""
+    print(f"\n{'='*70}")
+    print(f"Validando: {filepath.name}")
+    print(f"{'='*70}\n")
+
+    if errors:
+        print("❌ ERRORES CRÍTICOS:")
+        for i, error in enumerate(errors, 1):
+            print(f"  {i}. {error}")
+        print()
+
+    if warnings:
+        print("⚠️  ADVERTENCIAS:")
+        for i, warning in enumerate(warnings, 1):
+            print(f"  {i}. {warning}")
+        print()
+
+    if not errors and not warnings:
+        print("✅ Post válido - no se encontraron problemas\n")
+    elif not errors:
+        print("✅ Post válido - solo advertencias menores\n")
+    else:
+        print("❌ Post inválido - corrige los errores críticos\n")
+
+    return len(errors) == 0
+
+
+def validate_file(filepath: Path, config: RuleConfig = None, profile: bool = False) -> tuple:
+    """Valida un post y devuelve (ruta, hallazgos, tiempos por regla)
+
+    Usable desde un process pool. Los tiempos solo se miden con profile.
+    """
+    if not filepath.exists():
+        return filepath, [make_finding(LOAD_RULE_ID, 'error', f"Archivo no encontrado: {filepath}")], {}
+    if filepath.suffix != '.md':
+        return filepath, [make_finding(LOAD_RULE_ID, 'error', "El archivo debe ser .md (Markdown)")], {}
+
+    validator = PostValidator(filepath, config, profile)
+    validator.validate()
+    return filepath, validator.findings, validator.timings
+
+
+class ResultCache:
+    """Cache persistente de resultados (SQLite) por hash de ruta + contenido y versión de reglas"""
+
+    DEFAULT_PATH = '.cache/validate_post.sqlite'
+    # Incrementar al cambiar el esquema de la tabla (se recrea vacía)
+    SCHEMA_VERSION = 2
+
+    def __init__(self, db_path: str = DEFAULT_PATH, config: RuleConfig = None):
+        import sqlite3
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS results")
+            self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, rules_version TEXT, findings TEXT)"
+        )
+        self.rules_version = self._rules_version(config or RuleConfig())
+        # Resultados de otras versiones de reglas ya no sirven
+        self.conn.execute("DELETE FROM results WHERE rules_version != ?", (self.rules_version,))
+        self.conn.commit()
+
+    @staticmethod
+    def _rules_version(config: RuleConfig) -> str:
+        """RULES_VERSION + hash del script y de la configuración de reglas activas/severidades"""
+        import hashlib
+
+        sha = hashlib.sha256(Path(__file__).read_bytes())
+        sha.update(config.signature().encode('utf-8'))
+        return f"{PostValidator.RULES_VERSION}-{sha.hexdigest()[:16]}"
+
+    @staticmethod
+    def key(filepath: Path) -> str:
+        """Hash de ruta + contenido (las reglas de filename dependen del nombre del fichero)"""
+        import hashlib
+
+        sha = hashlib.sha256(filepath.as_posix().encode('utf-8') + b'\0')
+        sha.update(filepath.read_bytes())
+        return sha.hexdigest()
+
+    def get(self, key: str):
+        import json
+
+        row = self.conn.execute(
+            "SELECT findings FROM results WHERE key = ? AND rules_version = ?",
+            (key, self.rules_version)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, entries: list):
+        """Guarda [(key, hallazgos)] en una sola transacción"""
+        import json
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO results (key, rules_version, findings) VALUES (?, ?, ?)",
+            [(key, self.rules_version, json.dumps(findings, ensure_ascii=False)) for key, findings in entries]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class IndexRule(Rule):
+    """Regla entre páginas: se evalúa una vez por ejecución sobre el índice del sitio
+
+    Implementa check_index(index) y registra hallazgos con
+    index.report(self, clave_de_la_página, mensaje[, severidad, line, details]).
+    """
+
+    def check_index(self, index: 'SiteIndex'):
+        raise NotImplementedError
+
+
+def index_rules(config: RuleConfig) -> list:
+    """Reglas entre páginas activas en la configuración"""
+    return [RULES[rule_id] for rule_id in config.active if issubclass(RULES[rule_id], IndexRule)]
+
+
+def _others(keys: list, key: str) -> str:
+    return ', '.join(Path(other).name for other in keys if other != key)
+
+
+@register_rule
+class DuplicateSlugRule(IndexRule):
+    """Posts con el mismo slug: misma URL (uno pisa al otro) o URLs casi iguales"""
+
+    id = 'duplicate-slug'
+    description = "Slug repetido en el blog (error si además coincide la URL)"
+
+    def check_index(self, index: 'SiteIndex'):
+        by_slug = {}
+        for key, entry in index.posts.items():
+            if entry['slug']:
+                by_slug.setdefault(entry['slug'], []).append(key)
+
+        for slug, keys in by_slug.items():
+            if len(keys) < 2:
+                continue
+            for key in keys:
+                entry = index.posts[key]
+                same_url = [other for other in keys if index.posts[other]['url'] == entry['url']]
+                if entry['url'] and len(same_url) > 1:
+                    index.report(self, key, f"URL blog/{entry['url']}/ duplicada con: {_others(same_url, key)}",
+                                 line=entry['title_line'])
+                else:
+                    index.report(self, key, f"Slug '{slug}' repetido en: {_others(keys, key)}",
+                                 'warning', line=entry['title_line'])
+
+
+@register_rule
+class DuplicateTitleRule(IndexRule):
+    """Posts con la misma fecha y el mismo título"""
+
+    id = 'duplicate-title'
+    description = "Misma fecha y título que otro post"
+    severity = 'warning'
+
+    def check_index(self, index: 'SiteIndex'):
+        by_title = {}
+        for key, entry in index.posts.items():
+            if entry['date'] and entry['title']:
+                title = ' '.join(entry['title'].casefold().split())
+                by_title.setdefault((entry['date'], title), []).append(key)
+
+        for keys in by_title.values():
+            if len(keys) > 1:
+                for key in keys:
+                    index.report(self, key, f"Misma fecha y título que: {_others(keys, key)}",
+                                 line=index.posts[key]['title_line'])
+
+
+@register_rule
+class TagVariantsRule(IndexRule):
+    """Tags o categorías que Material agrupa en el mismo slug pero se escriben distinto"""
+
+    id = 'tag-variants'
+    description = "Variantes de un tag/categoría ('Azure Policy' vs 'azure-policy')"
+    severity = 'warning'
+
+    def check_index(self, index: 'SiteIndex'):
+        from post_index import slugify
+
+        for field in ('tags', 'categories'):
+            # {slug: {forma: nº de posts}} y la forma más usada como canónica
+            spellings = {}
+            for entry in index.posts.values():
+                for value in set(entry[field]):
+                    counts = spellings.setdefault(slugify(value), {})
+                    counts[value] = counts.get(value, 0) + 1
+            canonical = {slug: min(counts, key=lambda value: (-counts[value], value))
+                         for slug, counts in spellings.items() if len(counts) > 1}
+            if not canonical:
+                continue
+
+            for key, entry in index.posts.items():
+                for value in entry[field]:
+                    preferred = canonical.get(slugify(value), value)
+                    if value != preferred:
+                        count = spellings[slugify(value)][preferred]
+                        index.report(self, key, f"{field}: '{value}' es una variante de '{preferred}' "
+                                                f"(en {count} post(s)); usa la misma forma en todo el blog",
+                                     line=1)
+
+
+@register_rule
+class PostLinksRule(IndexRule):
+    """Enlaces a posts del blog que no existen o que son borradores"""
+
+    id = 'post-links'
+    description = "Enlaces a posts inexistentes o a borradores"
+
+    def check_index(self, index: 'SiteIndex'):
+        for key, entry in index.entries.items():
+            broken = []
+            drafts = []
+            for number, target in entry['links']:
+                kind, linked, _ = index.resolve_link(key, target)
+                if kind != 'post':
+                    continue
+                if linked is None:
+                    broken.append([number, f"Enlace a un post inexistente: '{target}'"])
+                elif index.posts[linked]['draft'] and not entry['draft']:
+                    drafts.append([number, f"Enlace a un borrador (no se publica): '{target}'"])
+            index.report_lines(self, key, "Enlaces a posts inexistentes", broken)
+            index.report_lines(self, key, "Enlaces a borradores", drafts, 'warning')
+
+
+@register_rule
+class InternalLinksRule(IndexRule):
+    """Enlaces relativos a páginas/ficheros de docs/ y anclas (#...) a sus encabezados
+
+    Los posts inexistentes los reporta post-links; aquí se comprueba su ancla.
+    """
+
+    id = 'internal-links'
+    description = "Enlaces a páginas/ficheros de docs/ inexistentes y anclas rotas"
+
+    @staticmethod
+    def _checks_fragment(fragment: str) -> bool:
+        # Notas al pie (fn:/fnref:) y líneas de código (__codelineno...) no son encabezados
+        return bool(fragment) and not fragment.startswith(('fn:', 'fnref:', '__'))
+
+    def check_index(self, index: 'SiteIndex'):
+        for key, entry in index.entries.items():
+            issues = []
+            for number, target in entry['links']:
+                kind, linked, fragment = index.resolve_link(key, target)
+                if kind is None or (kind == 'post' and linked is None):
+                    continue
+                if linked is None:
+                    issues.append([number, f"Destino inexistente: '{target}'"])
+                elif (kind != 'file' and self._checks_fragment(fragment)
+                      and fragment not in index.anchors(linked)):
+                    where = 'esta página' if linked == key else f"'{Path(linked).name}'"
+                    issues.append([number, f"Ancla '#{fragment}' inexistente en {where}"])
+            index.report_lines(self, key, "Enlaces internos rotos", issues)
+
+
+@register_rule
+class ExternalLinksRule(IndexRule):
+    """URLs externas (http/https) que responden 404/410 o no se pueden comprobar
+
+    Solo las páginas validadas en la ejecución; cada URL se pide una vez aunque
+    aparezca en varias. Necesita red: desactivada por defecto.
+    """
+
+    id = 'external-links'
+    description = "URLs externas rotas (red; activar con --enable external-links)"
+    enabled = False
+    # Sin duda rotas; el resto de fallos (403, 5xx, timeout...) pueden ser transitorios
+    BROKEN_STATUS = (404, 410)
+
+    def check_index(self, index: 'SiteIndex'):
+        from post_index import SITE_URL, ExternalLinkChecker
+
+        occurrences = {}  # {url sin fragmento: [(clave, línea, destino)]}
+        for key in index.selected():
+            entry = index.entries.get(key)
+            for number, target in (entry['links'] if entry else ()):
+                if target.startswith(('http://', 'https://')) and not target.startswith(SITE_URL):
+                    occurrences.setdefault(target.split('#', 1)[0], []).append((key, number, target))
+        if not occurrences:
+            return
+
+        checker = index.external or ExternalLinkChecker()
+        broken = {}
+        unchecked = {}
+        for url, (status, error) in checker.check(list(occurrences)).items():
+            if status is not None and status < 400:
+                continue
+            if status in self.BROKEN_STATUS:
+                issues, problem = broken, f"HTTP {status}"
+            else:
+                issues, problem = unchecked, f"HTTP {status}" if status else (error or 'sin respuesta')
+            for key, number, target in occurrences[url]:
+                issues.setdefault(key, []).append([number, f"{problem}: {target}"])
+
+        for key in sorted(broken.keys() | unchecked.keys()):
+            index.report_lines(self, key, "URLs externas rotas", sorted(broken.get(key, [])))
+            index.report_lines(self, key, "URLs externas que no se pudieron comprobar",
+                               sorted(unchecked.get(key, [])), 'warning')
+
+
+@register_rule
+class ImageBudgetRule(IndexRule):
+    """Imágenes locales que no existen o superan el presupuesto de tamaño o de píxeles
+
+    El tamaño y las dimensiones salen de AssetCache (solo cabeceras). Los SVG no tienen
+    límite de píxeles; las imágenes externas no se comprueban (no hay red).
+    """
+
+    id = 'image-budget'
+    severity = 'warning'
+    description = "Imágenes inexistentes o por encima de --image-max-kb / --image-max-px"
+
+    def check_index(self, index: 'SiteIndex'):
+        from post_index import format_asset
+
+        max_size = index.budgets['image_kb'] * 1024
+        max_px = index.budgets['image_px']
+        for key in index.selected():
+            missing, heavy = [], []
+            for number, src, asset_key, info in index.page_images(key):
+                if info is None:
+                    missing.append([number, src])
+                elif info['size'] > max_size or (
+                        info['format'] != 'svg' and max(info['width'] or 0, info['height'] or 0) > max_px):
+                    heavy.append([number, f"{src} ({format_asset(info)})"])
+            index.report_lines(self, key, "Imágenes no encontradas", missing, 'error')
+            index.report_lines(self, key, f"Imágenes por encima del presupuesto "
+                                          f"({index.budgets['image_kb']} KB, {max_px} px)", heavy)
+
+
+@register_rule
+class PageWeightRule(IndexRule):
+    """Páginas cuyas imágenes locales (cada fichero una vez) suman más que el presupuesto"""
+
+    id = 'page-weight'
+    severity = 'warning'
+    description = "Peso total de las imágenes de la página por encima de --page-max-kb"
+
+    def check_index(self, index: 'SiteIndex'):
+        from post_index import format_size
+
+        max_size = index.budgets['page_kb'] * 1024
+        for key in index.selected():
+            images = {}  # {clave: (línea, src, tamaño)}: una imagen repetida se descarga una vez
+            for number, src, asset_key, info in index.page_images(key):
+                if info is not None and asset_key not in images:
+                    images[asset_key] = (number, src, info['size'])
+            total = sum(size for _, _, size in images.values())
+            if total > max_size:
+                heaviest = sorted(images.values(), key=lambda image: image[2], reverse=True)
+                index.report(
+                    self, key,
+                    f"Las imágenes de la página pesan {format_size(total)} en {len(images)} ficheros "
+                    f"(máx. {index.budgets['page_kb']} KB); las más pesadas: "
+                    + ", ".join(f"{src} ({format_size(size)})" for _, src, size in heaviest[:3]),
+                    line=heaviest[0][0], details=[[number, f"{src} ({format_size(size)})"] for number, src, size in heaviest]
+                )
+
+
+def collect_paths(targets: list) -> list:
+    """Expande ficheros, directorios (recursivo, sin plantillas) y globs a una lista de posts"""
+    paths = []
+    seen = set()
+
+    def add(path):
+        if path not in seen:
+            seen.add(path)
+            paths.append(path)
+
+    for target in targets:
+        if any(ch in target for ch in '*?['):
+            import glob
+            for match in sorted(glob.glob(target, recursive=True)):
+                add(Path(match))
+        elif Path(target).is_dir():
+            for match in sorted(Path(target).rglob('*.md')):
+                if 'template' not in match.parts:
+                    add(match)
+        else:
+            add(Path(target))
+
+    return paths
+
+
+class _Completed:
+    """Resultado ya disponible con la interfaz de Future que usa iter_results
+
+    Resultados en serie y de cache pasan por la misma cola que los del pool sin
+    importar concurrent.futures (y multiprocessing) cuando no hay pool.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def done(self):
+        return True
+
+    def result(self):
+        return self.value
+
+    def cancel(self):
+        return False
+
+
+def iter_results(paths: list, jobs: int, cache: ResultCache = None,
+                 config: RuleConfig = None, profile: bool = False):
+    """Valida los posts y devuelve (ruta, hallazgos, tiempos, desde_cache) en orden de entrada
+
+    Generador: cada resultado se entrega en cuanto está listo (y los anteriores también),
+    con como mucho jobs * 4 posts en vuelo, así la memoria no crece con el tamaño del
+    árbol y la salida empieza con el primer post. Con cache solo se validan los posts
+    cuyo contenido (o reglas) ha cambiado.
+    """
+    validate = partial(validate_file, config=config, profile=profile)
+    # Con pocos ficheros arrancar el pool cuesta más que validar en serie
+    use_pool = jobs > 1 and len(paths) >= 4
+    max_in_flight = max(1, jobs * 4)
+    executor = None
+    window = deque()  # (ruta, clave de cache, future, desde_cache)
+    to_store = []
+
+    def pop():
+        path, key, future, cached = window.popleft()
+        _, findings, timings = future.result()
+        if cache and key and not cached:
+            to_store.append((key, findings))
+            if len(to_store) >= 100:
+                cache.put_many(to_store)
+                to_store.clear()
+        return path, findings, timings, cached
+
+    try:
+        for path in paths:
+            key = cache.key(path) if cache and path.is_file() else None
+            cached = cache.get(key) if key else None
+            if cached is not None:
+                window.append((path, key, _Completed((path, cached, {})), True))
+            elif use_pool:
+                if executor is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    executor = ProcessPoolExecutor(max_workers=jobs)
+                window.append((path, key, executor.submit(validate, path), False))
+            else:
+                window.append((path, key, _Completed(validate(path)), False))
+
+            while window and (len(window) > max_in_flight or window[0][2].done()):
+                yield pop()
+
+        while window:
+            yield pop()
+    finally:
+        if executor is not None:
+            # Si el consumidor para antes de tiempo, no esperar a los posts aún en cola
+            for _, _, future, _ in window:
+                future.cancel()
+            executor.shutdown()
+        if cache and to_store:
+            cache.put_many(to_store)
+
+
+def print_profile(totals: dict, measured: int, config: RuleConfig, file=None):
+    """Informe de --profile: tiempo acumulado por regla en todos los posts medidos"""
+    if not measured:
+        return
+    total = sum(totals.values()) or 1e-9
+
+    print(f"{'='*70}", file=file)
+    print(f"Perfil por regla ({measured} posts, tiempo sumado de todos los procesos)", file=file)
+    print(f"{'='*70}", file=file)
+    print(f"  {'Regla':<20} {'Severidad':<10} {'Total ms':>10} {'ms/post':>10} {'%':>7}", file=file)
+    for key, seconds in sorted(totals.items(), key=lambda item: item[1], reverse=True):
+        rule = RULES.get(key)
+        severity = (config.severity.get(key) or rule.severity) if rule else '-'
+        print(f"  {key:<20} {severity:<10} {seconds * 1000:>10.1f} "
+              f"{seconds / measured * 1000:>10.3f} {seconds / total * 100:>6.1f}%", file=file)
+    print(f"{'='*70}", file=file)
+
+
+def print_rules(config: RuleConfig):
+    """Lista las reglas registradas con su severidad y estado"""
+    for rule_id, rule in RULES.items():
+        status = 'activa' if rule_id in config.active else 'inactiva'
+        severity = config.severity.get(rule_id) or rule.severity
+        print(f"  {rule_id:<20} {severity:<8} {status:<9} {rule.description}")
+
+
+# Reglas del modo --links (cualquier página de docs/, no solo posts)
+LINK_RULE_IDS = ('post-links', 'internal-links')
+
+# Valores por defecto del índice (post_index); aquí para construir la CLI sin importarlo
+DOCS_DIR = 'docs'
+BLOG_DIR = 'docs/blog/posts'
+# Presupuestos de image-budget y page-weight (KB de 1024 bytes; px: lado mayor)
+ASSET_BUDGETS = {'image_kb': 300, 'image_px': 2560, 'page_kb': 1024}
+LINK_TTL_HOURS = 24 * 7
+
+
+def parse_rule_ids(values: list) -> set:
+    """Une los valores repetidos/separados por comas de --enable y --disable"""
+    return {rule_id.strip() for value in values or [] for rule_id in value.split(',') if rule_id.strip()}
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description='Valida posts del blog MkDocs Material',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos:
+  python validate_post.py docs/blog/posts/2025/10/20251026_mi_post.md
+  python validate_post.py docs/blog/posts/2025/10/*.md
+  python validate_post.py docs/blog/posts
+  python validate_post.py 'docs/blog/posts/**/*.md' --jobs 4
+  python validate_post.py docs/blog/posts --disable MD032 --severity fence-language=error
+  python validate_post.py docs/blog/posts --profile
+  python validate_post.py docs/blog/posts --format sarif > validate_post.sarif
+  python validate_post.py docs/blog/posts --watch -q
+  python validate_post.py docs/blog/posts/2025/10/20251026_mi_post.md --index
+  python validate_post.py docs --links -q
+  python validate_post.py docs --links --enable external-links --link-ttl 24
+  python validate_post.py docs/blog/posts -q --image-max-kb 200 --image-report
+  python validate_post.py --list-rules
+        """
+    )
+    parser.add_argument('paths', nargs='*', help='Posts .md, directorios o patrones glob')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Procesos en paralelo para validar (default: nº de CPUs)')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='Mostrar solo los posts con errores o advertencias')
+    parser.add_argument('--format', '-f', choices=['text', 'jsonl', 'sarif'], default='text',
+                        help='Salida: text (default), jsonl (un objeto por post) o sarif (SARIF 2.1.0). '
+                             'En jsonl/sarif el resumen va a stderr')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Revalidar todos los posts sin usar la cache de resultados')
+    parser.add_argument('--cache-file', default=ResultCache.DEFAULT_PATH,
+                        help=f'Base de datos de la cache de resultados y del índice del blog '
+                             f'(default: {ResultCache.DEFAULT_PATH})')
+    parser.add_argument('--docs-dir', default=DOCS_DIR,
+                        help=f'Páginas que se indexan para las reglas entre páginas (default: {DOCS_DIR})')
+    parser.add_argument('--blog-dir', default=BLOG_DIR,
+                        help=f'Posts del blog dentro del índice (default: {BLOG_DIR})')
+    parser.add_argument('--index', action='store_true',
+                        help='Aplicar también las reglas entre páginas (índice de docs/); '
+                             '--links, --image-report o --enable de una de ellas lo activan')
+    parser.add_argument('--links', action='store_true',
+                        help=f'Modo enlaces: solo {", ".join(LINK_RULE_IDS)} sobre cualquier página de docs/ '
+                             '(sin red)')
+    parser.add_argument('--link-ttl', type=float, default=LINK_TTL_HOURS, metavar='HORAS',
+                        help='external-links: horas que vale un resultado antes de volver a pedir la URL '
+                             f'(default: {LINK_TTL_HOURS}; --no-cache las pide todas)')
+    parser.add_argument('--link-timeout', type=float, default=10, metavar='S',
+                        help='external-links: timeout por petición (default: 10 s)')
+    parser.add_argument('--link-concurrency', type=int, default=16, metavar='N',
+                        help='external-links: peticiones simultáneas en total (default: 16)')
+    parser.add_argument('--link-per-host', type=int, default=4, metavar='N',
+                        help='external-links: peticiones simultáneas a un mismo host (default: 4)')
+    parser.add_argument('--image-max-kb', type=int, default=ASSET_BUDGETS['image_kb'], metavar='KB',
+                        help=f"image-budget: tamaño máximo por imagen (default: {ASSET_BUDGETS['image_kb']} KB)")
+    parser.add_argument('--image-max-px', type=int, default=ASSET_BUDGETS['image_px'], metavar='PX',
+                        help=f"image-budget: lado mayor máximo de una imagen (default: {ASSET_BUDGETS['image_px']} px)")
+    parser.add_argument('--page-max-kb', type=int, default=ASSET_BUDGETS['page_kb'], metavar='KB',
+                        help=f"page-weight: suma máxima de las imágenes de una página (default: {ASSET_BUDGETS['page_kb']} KB)")
+    parser.add_argument('--image-report', action='store_true',
+                        help='Listar tamaño y dimensiones de las imágenes de cada página validada')
+    parser.add_argument('--enable', action='append', metavar='REGLA[,REGLA]',
+                        help='Activar reglas desactivadas por defecto')
+    parser.add_argument('--disable', action='append', metavar='REGLA[,REGLA]',
+                        help='Desactivar reglas (ver --list-rules)')
+    parser.add_argument('--severity', action='append', default=[], metavar='REGLA=error|warning',
+                        help='Cambiar la severidad de todos los hallazgos de una regla')
+    parser.add_argument('--profile', action='store_true',
+                        help='Medir el tiempo de cada regla (ignora la cache para medir todos los posts)')
+    parser.add_argument('--list-rules', action='store_true',
+                        help='Listar las reglas registradas y salir')
+    parser.add_argument('--watch', '-w', action='store_true',
+                        help='Tras validar, seguir vigilando y revalidar cada post al guardarlo')
+    parser.add_argument('--debounce', type=float, default=50, metavar='MS',
+                        help='Espera para agrupar ráfagas de guardado en --watch (default: 50 ms)')
+    args = parser.parse_args()
+
+    try:
+        severity = dict(item.split('=', 1) for item in args.severity)
+    except ValueError:
+        parser.error("--severity espera REGLA=error|warning")
+    enable, disable = parse_rule_ids(args.enable), parse_rule_ids(args.disable)
+    if args.links:
+        # Las demás reglas son de posts; se pueden volver a activar con --enable
+        enable |= set(LINK_RULE_IDS)
+        disable |= set(RULES) - enable
+    try:
+        config = RuleConfig(enable, disable, severity)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.list_rules:
+        print_rules(config)
+        sys.exit(0)
+    if not args.paths:
+        parser.error("indica al menos un post, directorio o patrón")
+    if args.watch and args.format == 'sarif':
+        parser.error("--watch no admite --format sarif (es un único documento); usa text o jsonl")
+
+    paths = collect_paths(args.paths)
+    if not paths:
+        print("❌ Error: No se encontraron posts para validar", file=sys.stderr)
+        sys.exit(1)
+
+    # stdout queda reservado para el formato legible por máquina
+    summary_out = sys.stdout if args.format == 'text' else sys.stderr
+    sarif = None
+    if args.format == 'sarif':
+        from post_report import SarifWriter
+        sarif = SarifWriter(sys.stdout, config)
+    elif args.format == 'jsonl':
+        from post_report import write_jsonl
+
+    start = time.perf_counter()
+    # Con un solo post la cache cuesta más de lo que ahorra: abrirla (sqlite3, hashlib, json y
+    # un commit) lleva varios ms y validar el post ~1 ms. Los hallazgos son los mismos
+    use_cache = not (args.no_cache or args.profile) and (len(paths) > 1 or args.watch)
+    cache = ResultCache(args.cache_file, config) if use_cache else None
+    invalid = 0
+    with_warnings = 0
+    cache_hits = 0
+    profile_totals = {}
+    measured = 0
+
+    # Reglas entre páginas: índice de todo docs/, incremental (--no-cache no le afecta: se
+    # valida con mtime/tamaño de cada página). Con --profile se reconstruye para medirlo.
+    # Solo si se pide explícitamente, igual con uno que con muchos ficheros: recorrer docs/
+    # y abrir la base se come la ganancia de arranque de un post (pre-commit)
+    page_rules = index_rules(config)
+    use_index = (args.index or args.links or args.image_report
+                 or bool(enable & {rule.id for rule in page_rules}))
+    index = None
+    if use_index and (page_rules or args.image_report) and (Path(args.docs_dir).is_dir() or Path(args.blog_dir).is_dir()):
+        from post_index import ExternalLinkChecker, SiteIndex
+
+        index = SiteIndex(args.docs_dir, args.blog_dir, None if args.profile else args.cache_file)
+        # Las reglas por página (imágenes, URLs externas) solo miran las páginas indicadas
+        index.targets = {index_key(path) for path in paths}
+        index.budgets.update(image_kb=args.image_max_kb, image_px=args.image_max_px, page_kb=args.page_max_kb)
+        if ExternalLinksRule.id in config.active:
+            # Los resultados se guardan en la misma base que la cache
+            index.external = ExternalLinkChecker(args.cache_file, args.link_ttl * 3600, args.link_timeout,
+                                                 args.link_concurrency, args.link_per_host, args.no_cache)
+        index_start = time.perf_counter()
+        reindexed = index.refresh(args.jobs)
+        if args.profile:
+            profile_totals['(índice)'] = time.perf_counter() - index_start
+        index.check(config, profile_totals if args.profile else None)
+
+    if len(page_rules) < len(config.active):
+        results = iter_results(paths, args.jobs, cache, config, args.profile)
+    else:
+        # Solo reglas entre páginas (ej: --links): no hace falta cargar ni validar cada fichero
+        results = ((path, [] if path.is_file() else [make_finding(LOAD_RULE_ID, 'error', f"Archivo no encontrado: {path}")],
+                    {}, False) for path in paths)
+    try:
+        for filepath, findings, timings, cached in results:
+            if index:
+                findings = index.findings_for(filepath, findings)
+            errors, warnings = split_findings(findings)
+            if errors:
+                invalid += 1
+            elif warnings:
+                with_warnings += 1
+            cache_hits += cached
+            if timings:
+                measured += 1
+                for key, seconds in timings.items():
+                    profile_totals[key] = profile_totals.get(key, 0.0) + seconds
+
+            if args.quiet and not findings:
+                continue
+            if args.format == 'jsonl':
+                write_jsonl(sys.stdout, filepath, findings, cached)
+            elif sarif:
+                sarif.write(filepath, findings)
+            else:
+                print_results(filepath, errors, warnings)
+    finally:
+        if cache and not args.watch:
+            cache.close()
+    if sarif:
+        sarif.close()
+    elapsed = time.perf_counter() - start
+
+    if len(paths) > 1:
+        print(f"{'='*70}", file=summary_out)
+        print(f"Resumen: {len(paths)} posts | {len(paths) - invalid} válidos "
+              f"({with_warnings} con advertencias) | {invalid} inválidos", file=summary_out)
+        print(f"Tiempo: {elapsed:.2f}s ({elapsed / len(paths) * 1000:.1f} ms/post, "
+              f"jobs={min(args.jobs, len(paths))}, {cache_hits} desde cache)", file=summary_out)
+        if index:
+            print(f"Índice del sitio: {len(index.entries)} páginas, {len(index.posts)} posts "
+                  f"({reindexed} reindexadas)", file=summary_out)
+        if index and index.external and index.external.checked + index.external.cached:
+            print(f"URLs externas: {index.external.checked + index.external.cached} únicas "
+                  f"({index.external.checked} comprobadas, {index.external.cached} desde cache)", file=summary_out)
+        print(f"{'='*70}", file=summary_out)
+
+    if args.profile:
+        print_profile(profile_totals, measured, config, file=summary_out)
+    if args.image_report and index:
+        from post_index import print_image_report
+        print_image_report(index, file=summary_out)
+    if index and not args.watch:
+        index.close()
+
+    if args.watch:
+        from post_watch import watch_posts
+
+        try:
+            watch_posts(args.paths, config, cache, args.format, args.debounce / 1000, index)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if cache:
+                cache.close()
+            if index:
+                index.close()
+        sys.exit(0)
+
+    sys.exit(0 if invalid == 0 else 1)
+
+
+def run():
+    """main() sin traceback cuando el consumidor de la salida (ej: `| head`) la cierra antes"""
+    try:
+        main()
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Modo --watch de post_validator.py: vigila los posts y los revalida al guardarlos
+
+Se importa solo con --watch.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+from post_validator import ResultCache, RuleConfig, collect_paths, print_results, split_findings, validate_file
+from post_report import write_jsonl
+
+
+class PostWatcher:
+    """Vigila los posts y entrega los modificados, agrupando ráfagas de guardado
+
+    Usa watchdog (inotify / FSEvents / ReadDirectoryChangesW; se instala con mkdocs) y,
+    si no está disponible, sondea mtimes cada POLL_INTERVAL segundos. Los editores que
+    guardan con fichero temporal + rename generan varios eventos: se acumulan hasta que
+    pasan `debounce` segundos sin eventos nuevos.
+    """
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, targets: list, debounce: float = 0.05):
+        import queue
+
+        self.targets = targets
+        self.debounce = debounce
+        self.changes = queue.Queue()
+        self.backend = None
+        self.files = {Path(target).resolve() for target in targets
+                      if not any(ch in target for ch in '*?[') and Path(target).is_file()}
+        self.dirs = [Path(target).resolve() for target in targets if Path(target).is_dir()]
+        self.globs = [os.path.abspath(target) for target in targets if any(ch in target for ch in '*?[')]
+
+    def watches(self, path: Path) -> bool:
+        """Indica si `path` (absoluta) corresponde a alguno de los objetivos vigilados"""
+        import fnmatch
+
+        if path.suffix != '.md' or 'template' in path.parts:
+            return False
+        return (path in self.files
+                or any(directory in path.parents for directory in self.dirs)
+                or any(fnmatch.fnmatch(str(path), pattern) for pattern in self.globs))
+
+    def _roots(self) -> list:
+        """Directorios a vigilar: los objetivos, el padre de los ficheros y la base de los globs"""
+        roots = {path.parent for path in self.files} | set(self.dirs)
+        for pattern in self.globs:
+            base = pattern.split('*')[0].split('?')[0].split('[')[0]
+            roots.add(Path(base if base.endswith(os.sep) else os.path.dirname(base)))
+        return [root for root in roots if root.is_dir()]
+
+    def _notify(self, path: str):
+        path = Path(path).resolve()
+        if self.watches(path):
+            self.changes.put(path)
+
+    def _start_watchdog(self):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory or event.event_type not in ('created', 'modified', 'moved', 'closed'):
+                    return
+                watcher._notify(getattr(event, 'dest_path', '') or event.src_path)
+
+        observer = Observer()
+        for root in self._roots():
+            observer.schedule(Handler(), str(root), recursive=True)
+        observer.daemon = True
+        observer.start()
+        self.backend = type(observer).__name__
+
+    def _start_polling(self):
+        import threading
+
+        def snapshot():
+            state = {}
+            for path in collect_paths(self.targets):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                state[path.resolve()] = (stat.st_mtime_ns, stat.st_size)
+            return state
+
+        def poll():
+            previous = snapshot()
+            while True:
+                time.sleep(self.POLL_INTERVAL)
+                current = snapshot()
+                for path, stamp in current.items():
+                    if previous.get(path) != stamp:
+                        self._notify(str(path))
+                previous = current
+
+        threading.Thread(target=poll, daemon=True).start()
+        self.backend = f"polling cada {self.POLL_INTERVAL}s"
+
+    def start(self):
+        try:
+            self._start_watchdog()
+        except ImportError:
+            self._start_polling()
+
+    def batches(self):
+        """Genera conjuntos de posts modificados, uno por ráfaga de eventos"""
+        import queue
+
+        while True:
+            changed = {self.changes.get()}
+            while True:
+                try:
+                    changed.add(self.changes.get(timeout=self.debounce))
+                except queue.Empty:
+                    break
+            yield sorted(changed)
+
+
+def watch_posts(targets: list, config: RuleConfig, cache: ResultCache, output_format: str, debounce: float,
+                index: 'SiteIndex' = None):
+    """--watch: revalida en este proceso (reglas, yaml y regex ya cargados) cada post guardado
+
+    Con índice, cada ráfaga lo actualiza (solo se reindexan los posts guardados) y
+    vuelve a evaluar las reglas entre posts.
+    """
+    watcher = PostWatcher(targets, debounce)
+    watcher.start()
+    sys.stdout.flush()  # Resultados de la pasada inicial antes de quedarse esperando
+    print(f"\n👀 Vigilando {', '.join(targets)} ({watcher.backend}). Ctrl+C para salir",
+          file=sys.stderr, flush=True)
+
+    cwd = Path.cwd()
+    for changed in watcher.batches():
+        if index:
+            index.refresh()
+            index.check(config)
+        for path in changed:
+            if not path.exists():
+                continue
+            # Misma ruta relativa que en modo batch (clave de cache y salida)
+            filepath = Path(os.path.relpath(path, cwd))
+            start = time.perf_counter()
+            _, findings, _ = validate_file(filepath, config)
+            elapsed = time.perf_counter() - start
+            if cache:
+                cache.put_many([(cache.key(filepath), findings)])
+            if index:
+                findings = index.findings_for(filepath, findings)
+
+            if output_format == 'jsonl':
+                write_jsonl(sys.stdout, filepath, findings, False)
+            else:
+                print_results(filepath, *split_findings(findings))
+            # Con stdout en un pipe (tee, tareas del editor) la salida va en bloques: vaciar
+            # antes de la línea de tiempo para que los resultados no lleguen tarde o nunca
+            sys.stdout.flush()
+            print(f"⏱  {filepath.name} revalidado en {elapsed * 1000:.1f} ms", file=sys.stderr, flush=True)
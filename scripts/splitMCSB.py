@@ -1,5 +1,13 @@
-import pandas as pd
-from urllib.request import urlretrieve
+#!/usr/bin/env python3
+"""
+MkDocs hook: split MCSB v1 Excel into separate files and generate Markdown pages
+Only regenerates outputs when the source workbook or GENERATOR_VERSION changes
+"""
+
+from mcsb_hook_utils import RENDER_MODE, fetch_cached, is_up_to_date, render_markdown_table, write_manifest
+
+# Bump to force regeneration when the output format changes
+GENERATOR_VERSION = "2"
 
 # Define file locations
 url = (
@@ -9,32 +17,56 @@ base_directory = "docs/assets/tables/"
 excel_file_name = "Microsoft_cloud_security_benchmark_v1.xlsx"
 full_file_path = base_directory + excel_file_name
 
-# Retrieve file from URL
-urlretrieve(url, full_file_path) 
-
-# Load Excel file with pandas
-xl = pd.ExcelFile(full_file_path)
-
 # Directory for split Excel files
 split_files_directory = base_directory + "MCSB/"
 
 # Directory for Markdown files
 markdown_files_directory = "docs/Azure/Security/MCSB/"
 
-for sheet in xl.sheet_names:
-    df = pd.read_excel(xl, sheet_name=sheet)
-    
-    # Write each DataFrame to a separate Excel file in the defined directory
-    split_file_path = split_files_directory + f"{sheet}.xlsx"
-    df.to_excel(split_file_path, index=False)
-    
-    # Create a Markdown file for each Excel file in the specified directory
-    markdown_file_path = markdown_files_directory + f"{sheet}.md"
-    
-    with open(markdown_file_path, 'w') as f:
-        f.write(f"---\n")
-        f.write(f"hide:  \n  - toc\n")
-        f.write(f"---\n")
-
-        f.write(f"# MCSB_v1 - {sheet}\n\n")
-        f.write(f"{{{{ read_excel('{split_file_path}', engine='openpyxl') }}}}\n")
+
+def split_workbook():
+    """Split every sheet into its own Excel file and Markdown page. Returns generated paths"""
+    import pandas as pd
+
+    # Load Excel file with pandas
+    xl = pd.ExcelFile(full_file_path)
+    outputs = []
+
+    for sheet in xl.sheet_names:
+        df = pd.read_excel(xl, sheet_name=sheet)
+
+        # Write each DataFrame to a separate Excel file in the defined directory
+        split_file_path = split_files_directory + f"{sheet}.xlsx"
+        df.to_excel(split_file_path, index=False)
+
+        # Create a Markdown file for each Excel file in the specified directory
+        markdown_file_path = markdown_files_directory + f"{sheet}.md"
+
+        with open(markdown_file_path, 'w') as f:
+            f.write(f"---\n")
+            f.write(f"hide:  \n  - toc\n")
+            f.write(f"---\n")
+
+            f.write(f"# MCSB_v1 - {sheet}\n\n")
+            if RENDER_MODE == 'static':
+                # Pre-rendered table: the build does no Excel parsing
+                f.write(render_markdown_table([list(df.columns)] + df.values.tolist()))
+            else:
+                f.write(f"{{{{ read_excel('{split_file_path}', engine='openpyxl') }}}}\n")
+
+        outputs.extend([split_file_path, markdown_file_path])
+
+    return outputs
+
+
+def on_pre_build(config):
+    # Refresh the local copy at most once per MCSB_FETCH_TTL (conditional request, offline fallback)
+    fetch_cached(url, full_file_path)
+
+    if is_up_to_date("splitMCSB", full_file_path, f"{GENERATOR_VERSION}-{RENDER_MODE}"):
+        print("✓ MCSB v1 unchanged - skipping split")
+        return
+
+    outputs = split_workbook()
+    write_manifest("splitMCSB", full_file_path, f"{GENERATOR_VERSION}-{RENDER_MODE}", outputs)
+    print(f"✓ MCSB v1 processing completed: {len(outputs) // 2} sheets processed")
@@ -1,56 +1,155 @@
 #!/usr/bin/env python3
 """
-Split MCSB v2 Excel into separate files and generate Markdown pages
+MkDocs hook: split MCSB v2 Excel into separate files and generate Markdown pages
 Similar to splitMCSB.py but for MCSB v2 hierarchical structure
+Only regenerates outputs when the source workbook or GENERATOR_VERSION changes
 """
 
-import pandas as pd
+import multiprocessing
 import os
 
+from mcsb_hook_utils import RENDER_MODE, is_up_to_date, read_hyperlinks, render_markdown_table, write_manifest
+
+# Bump to force regeneration when the output format changes
+GENERATOR_VERSION = "3"
+
+# Optional parallel split: number of worker processes (1 = sequential)
+SPLIT_WORKERS = int(os.environ.get('MCSB_SPLIT_WORKERS', '1'))
+
 # Define file locations
 base_directory = "docs/assets/tables/"
 excel_file_name = "Microsoft_cloud_security_benchmark_v2.xlsx"
 full_file_path = base_directory + excel_file_name
 
-# Check if Excel file exists
-if not os.path.exists(full_file_path):
-    print(f"Warning: {full_file_path} not found. Skipping MCSB v2 processing.")
-    exit(0)
-
-# Load Excel file with pandas
-xl = pd.ExcelFile(full_file_path)
-
 # Directory for split Excel files
 split_files_directory = base_directory + "MCSBv2/"
 
-# Create directory if it doesn't exist
-os.makedirs(split_files_directory, exist_ok=True)
-
 # Directory for Markdown files
 markdown_files_directory = "docs/Azure/Security/MCSBv2/"
 
-# Create directory if it doesn't exist
-os.makedirs(markdown_files_directory, exist_ok=True)
 
-for sheet in xl.sheet_names:
-    # Skip Readme sheet
-    if sheet.lower() == 'readme':
-        continue
+def domain_sheets():
+    """Names of the domain sheets in workbook order (Readme excluded)"""
+    import openpyxl
 
-    df = pd.read_excel(xl, sheet_name=sheet)
+    wb = openpyxl.load_workbook(full_file_path, read_only=True)
+    try:
+        return [name for name in wb.sheetnames if name.lower() != 'readme']
+    finally:
+        wb.close()
 
-    # Write each DataFrame to a separate Excel file in the defined directory
-    split_file_path = split_files_directory + f"{sheet}.xlsx"
-    df.to_excel(split_file_path, index=False)
 
-    # Create a Markdown file for each Excel file in the specified directory
-    markdown_file_path = markdown_files_directory + f"{sheet}.md"
+def read_workbook(sheets=None):
+    """Read-only pass over the source workbook yielding (sheet, rows, links) one sheet at a time
+
+    Only the sheet being yielded is held in memory. `sheets` limits the pass to those domains.
+    """
+    import openpyxl
+
+    # Read-only openpyxl does not expose hyperlinks: read them straight from the sheet XML
+    hyperlinks = read_hyperlinks(full_file_path, sheets)
+
+    wb = openpyxl.load_workbook(full_file_path, read_only=True)
+    try:
+        for ws in wb.worksheets:
+            # Skip Readme sheet
+            if ws.title.lower() == 'readme' or (sheets is not None and ws.title not in sheets):
+                continue
+            rows = [list(row) for row in ws.iter_rows(values_only=True)]
+            # Drop trailing empty rows left by formatting
+            while rows and all(value is None for value in rows[-1]):
+                rows.pop()
+            yield ws.title, rows, hyperlinks.get(ws.title, {})
+    finally:
+        wb.close()
+
+
+def output_paths(sheet):
+    """Split Excel file and Markdown page generated for a sheet"""
+    return split_files_directory + f"{sheet}.xlsx", markdown_files_directory + f"{sheet}.md"
+
 
+def write_sheet(sheet, rows, links):
+    """Write one domain to its own Excel file and Markdown page"""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    split_file_path, markdown_file_path = output_paths(sheet)
+
+    # Write each sheet to a separate Excel file (write-only: rows are streamed to disk)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet)
+    header_font = Font(bold=True)
+    for r, row in enumerate(rows):
+        cells = []
+        for c, value in enumerate(row):
+            cell = WriteOnlyCell(ws, value=value)
+            if r == 0:
+                cell.font = header_font
+            if (r, c) in links:
+                cell.hyperlink = links[(r, c)]
+            cells.append(cell)
+        ws.append(cells)
+    wb.save(split_file_path)
+
+    # Create a Markdown file for each Excel file in the specified directory
     with open(markdown_file_path, 'w') as f:
         f.write(f"---\n")
         f.write(f"hide:  \n  - toc\n")
         f.write(f"---\n\n")
         f.write(f"# MCSB v2 - {sheet}\n\n")
-        f.write(f"{{{{ read_excel('{split_file_path}', engine='openpyxl') }}}}\n")
+        if RENDER_MODE == 'static':
+            # Pre-rendered table: the build does no Excel parsing
+            f.write(render_markdown_table(rows, links))
+        else:
+            f.write(f"{{{{ read_excel('{split_file_path}', engine='openpyxl') }}}}\n")
+
+
+def _write_sheets(sheets=None):
+    """Write each sheet as soon as it is read. Returns the sheets written"""
+    written = []
+    for sheet, rows, links in read_workbook(sheets):
+        write_sheet(sheet, rows, links)
+        written.append(sheet)
+    return written
+
+
+def split_workbook():
+    """Split every domain sheet into its own Excel file and Markdown page. Returns generated paths"""
+    # Create directories if they don't exist
+    os.makedirs(split_files_directory, exist_ok=True)
+    os.makedirs(markdown_files_directory, exist_ok=True)
+
+    # Hooks are loaded by path and can't be pickled: workers inherit the module via fork.
+    # Each worker reads only its own sheets, so memory stays bounded by one sheet per process
+    if SPLIT_WORKERS > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        sheets = domain_sheets()
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_write_sheets, args=(sheets[i::SPLIT_WORKERS],))
+                   for i in range(min(SPLIT_WORKERS, len(sheets)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if any(worker.exitcode != 0 for worker in workers):
+            raise RuntimeError("MCSB v2 split failed in a worker process")
+    else:
+        sheets = _write_sheets()
+
+    return [path for sheet in sheets for path in output_paths(sheet)]
+
+
+def on_pre_build(config):
+    # Check if Excel file exists
+    if not os.path.exists(full_file_path):
+        print(f"Warning: {full_file_path} not found. Skipping MCSB v2 processing.")
+        return
+
+    if is_up_to_date("splitMCSBv2", full_file_path, f"{GENERATOR_VERSION}-{RENDER_MODE}"):
+        print("✓ MCSB v2 unchanged - skipping split")
+        return
 
-print(f"✓ MCSB v2 processing completed: {len(xl.sheet_names)-1} domains processed")
+    outputs = split_workbook()
+    write_manifest("splitMCSBv2", full_file_path, f"{GENERATOR_VERSION}-{RENDER_MODE}", outputs)
+    print(f"✓ MCSB v2 processing completed: {len(outputs) // 2} domains processed")
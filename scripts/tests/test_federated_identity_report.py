@@ -0,0 +1,210 @@
+"""Tests del reporte de Federated Identity Credentials contra mock-arm-endpoint.py en proceso"""
+
+import importlib.util
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+REPORT_DIR = Path(__file__).resolve().parents[2] / 'docs' / 'Tools' / 'Federated_Identity_Credentials_Report'
+RECORDED_PAGES = REPORT_DIR / 'resource-graph-pages.json'
+IDENTITY_QUERY = "resources | where type =~ 'microsoft.managedidentity/userassignedidentities' | order by id asc"
+CREDENTIAL_QUERY = ("resources | where type =~ "
+                    "'microsoft.managedidentity/userassignedidentities/federatedidentitycredentials' | order by id asc")
+
+
+def load_script(name, filename):
+    """Importa un script con guiones en el nombre como módulo"""
+    spec = importlib.util.spec_from_file_location(name, REPORT_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+mock = load_script('mock_arm_endpoint', 'mock-arm-endpoint.py')
+
+
+@pytest.fixture
+def start_mock():
+    """Arranca mocks en hilos (kwargs de create_server) y devuelve (url, servidor)"""
+    servers = []
+
+    def start(**kwargs):
+        server = mock.create_server(port=0, **{'latency': 0, **kwargs})
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}", server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def request(url, body=None):
+    """(status, cabeceras, JSON) de un GET o, con body, un POST"""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, response.headers, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, json.load(e)
+
+
+def resource_graph_pages(base_url, query, top=None):
+    """Páginas de una consulta de Resource Graph encadenando el $skipToken del mock"""
+    pages = []
+    skip_token = None
+    while True:
+        options = {'$top': top, '$skipToken': skip_token}
+        status, _, body = request(f"{base_url}/providers/Microsoft.ResourceGraph/resources?api-version=2021-03-01",
+                                  {'query': query, 'options': options})
+        assert status == 200
+        pages.append(body)
+        skip_token = body.get('$skipToken')
+        if not skip_token:
+            return pages
+
+
+def test_mock_serves_recorded_pages_with_own_skip_token(start_mock):
+    recorded = json.loads(RECORDED_PAGES.read_text(encoding='utf-8'))
+    base_url, _ = start_mock(subscriptions=2, arg_pages=recorded)
+
+    for query, kind in ((IDENTITY_QUERY, 'identities'), (CREDENTIAL_QUERY, 'credentials')):
+        pages = resource_graph_pages(base_url, query)
+
+        assert [page['data'] for page in pages] == [page['data'] for page in recorded[kind]]
+        # El $skipToken grabado no sirve contra el mock: se sustituye por el número de página
+        assert [page.get('$skipToken') for page in pages] == [str(n) for n in range(1, len(pages))] + [None]
+
+
+def test_mock_pages_synthetic_rows_by_top(start_mock):
+    base_url, _ = start_mock(subscriptions=2, identities=5)
+
+    pages = resource_graph_pages(base_url, IDENTITY_QUERY, top=3)
+    rows = [row for page in pages for row in page['data']]
+
+    assert [page['count'] for page in pages] == [3, 3, 3, 1]
+    assert [page.get('$skipToken') for page in pages] == ['3', '6', '9', None]
+    assert [row['id'] for row in rows] == sorted(row['id'] for row in rows)
+    assert len({row['id'] for row in rows}) == 10
+
+
+def test_mock_throttles_with_retry_after(start_mock):
+    base_url, server = start_mock(identities=5, rate=0.5, burst=2)
+    identities_url = (f"{base_url}/subscriptions/{server.subscriptions[0]}"
+                      f"/providers/Microsoft.ManagedIdentity/userAssignedIdentities")
+
+    statuses = [request(identities_url)[0] for _ in range(3)]
+    status, headers, _ = request(identities_url)
+    assert statuses + [status] == [200, 200, 429, 429]
+    assert int(headers['Retry-After']) >= 1
+
+    # Resource Graph comparte el bucket sin suscripción e indica la espera con su cuota
+    resource_graph_url = f"{base_url}/providers/Microsoft.ResourceGraph/resources"
+    responses = [request(resource_graph_url, {'query': IDENTITY_QUERY}) for _ in range(3)]
+    assert [status for status, _, _ in responses] == [200, 200, 429]
+    assert responses[-1][1]['x-ms-user-quota-resets-after'].startswith('00:00:')
+    assert 'Retry-After' not in responses[-1][1]
+
+    assert request(f"{base_url}/stats")[2]['throttled'] == 3
+
+
+@pytest.fixture(scope='module')
+def report(tmp_path_factory):
+    """El reporte (requiere el SDK de Azure), importado fuera del repo por su log en el cwd"""
+    pytest.importorskip('azure.mgmt.msi')
+    pytest.importorskip('azure.mgmt.resourcegraph')
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('report'))
+    try:
+        return load_script('federated_identity_credentials_report', 'federated-identity-credentials-report.py')
+    finally:
+        os.chdir(cwd)
+
+
+def run_report(report, base_url, backend):
+    reporter = report.FederatedIdentityReporter(all_subscriptions=True, arm_endpoint=base_url, backend=backend,
+                                                max_workers=4, subscription_workers=2)
+    records = list(reporter.iter_report())
+    return records, reporter.stats
+
+
+def without_timestamp(records):
+    return [{key: value for key, value in record.items() if key != 'report_timestamp'} for record in records]
+
+
+def test_backends_return_same_records_in_same_order_under_throttling(report, start_mock, monkeypatch):
+    # Páginas pequeñas para que Resource Graph encadene varios $skipToken
+    monkeypatch.setattr(report, 'RESOURCE_GRAPH_PAGE_SIZE', 7)
+    results = {}
+    for backend in report.BACKENDS:
+        base_url, server = start_mock(subscriptions=2, identities=24, rate=20, burst=5)
+        records, stats = run_report(report, base_url, backend)
+        # Cada 429 del mock se ve y se reintenta una vez; no se pierde ningún registro
+        assert stats['throttled'] == server.stats['throttled'] > 0
+        assert stats['requests'] == server.stats['requests']
+        results[backend] = records
+
+    assert len(results['arm']) == len(results['resource-graph']) == 2 * sum(max(1, i % 3) for i in range(24))
+    assert without_timestamp(results['arm']) == without_timestamp(results['resource-graph'])
+
+
+def test_resource_graph_backend_reads_recorded_pages(report, start_mock):
+    recorded = json.loads(RECORDED_PAGES.read_text(encoding='utf-8'))
+    base_url, server = start_mock(subscriptions=2, arg_pages=recorded)
+
+    records, _ = run_report(report, base_url, 'resource-graph')
+
+    # Las credenciales de id-github-deploy llegan repartidas en dos páginas
+    assert [(record['subscription_id'][-1], record['identity_name'], record['credential_name'])
+            for record in records] == [
+        ('0', 'id-aks-workload', 'fic-payments'),
+        ('0', 'id-github-deploy', 'fic-main'),
+        ('0', 'id-github-deploy', 'fic-prod'),
+        ('1', 'id-legacy', 'N/A'),
+        ('1', 'id-terraform', 'fic-apply'),
+    ]
+    assert records[0]['credential_type'] == report.FEDERATED_CREDENTIAL_TYPE
+    assert server.stats['requests'] == 1 + 2 * len(recorded['identities'])
+
+
+def test_interrupted_report_stops_workers_before_closing_checkpoint(report, start_mock, tmp_path):
+    base_url, server = start_mock(subscriptions=8, identities=60, latency=20)
+    checkpoint = report.CheckpointJournal(str(tmp_path / 'checkpoint.jsonl'), {})
+    reporter = report.FederatedIdentityReporter(all_subscriptions=True, arm_endpoint=base_url, checkpoint=checkpoint,
+                                                max_workers=4, subscription_workers=2)
+    records = reporter.iter_report()
+    next(records)
+
+    # Como tras Ctrl+C con el generador a medias: se cancela lo pendiente antes de cerrar el journal
+    report._keep_checkpoint(checkpoint, records)
+    requests = server.stats['requests']
+    time.sleep(0.2)
+
+    assert checkpoint.closed
+    assert server.stats['requests'] == requests < 1 + 8 * 61
+    lines = (tmp_path / 'checkpoint.jsonl').read_text(encoding='utf-8').splitlines()
+    assert all(json.loads(line) for line in lines)
+
+
+def test_checkpoint_drops_writes_after_close(report, tmp_path):
+    path = tmp_path / 'checkpoint.jsonl'
+    checkpoint = report.CheckpointJournal(str(path), {})
+    checkpoint.record_identity('sub', '/id/a', [{'identity_name': 'a'}])
+    checkpoint.close()
+
+    checkpoint.record_identity('sub', '/id/b', [{'identity_name': 'b'}])
+    checkpoint.record_subscription('sub', ['/id/a', '/id/b'])
+
+    resumed = report.CheckpointJournal(str(path), {}, resume=True)
+    assert resumed.identity_records('sub', '/id/a') == [{'identity_name': 'a'}]
+    assert resumed.identity_records('sub', '/id/b') is None
+    assert not resumed.is_completed('sub')
+    resumed.close()
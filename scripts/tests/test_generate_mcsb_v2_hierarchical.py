@@ -0,0 +1,399 @@
+"""Tests de generate_mcsb_v2_hierarchical.py contra HTML guardado (sin acceso a learn.microsoft.com)"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openpyxl
+import pytest
+import requests
+
+import generate_mcsb_v2_hierarchical as mcsb
+from conftest import FIXTURES_DIR
+
+
+@pytest.fixture
+def domain_page():
+    with open(os.path.join(FIXTURES_DIR, 'mcsb-v2-network-security.html'), 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def fetches(monkeypatch, domain_page):
+    """Sustituye http_get por la página guardada y cuenta las descargas por URL"""
+    counter = Counter()
+    lock = threading.Lock()
+
+    def fake_http_get(url):
+        with lock:
+            counter[url] += 1
+        return domain_page
+
+    monkeypatch.setattr(mcsb, 'http_get', fake_http_get)
+    monkeypatch.setattr(mcsb, 'BASE_URL', 'https://example.test/mcsb')
+    monkeypatch.setattr(mcsb, 'CORE_PILLARS_CACHE', {})
+    monkeypatch.setattr(mcsb, 'AZURE_POLICIES_CACHE', {'NS-1': [('Policy A', 'https://example.test/a')]})
+    return counter
+
+
+def test_scrape_domain_fetches_each_domain_once(fetches):
+    # Igual que main: dominios en paralelo
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(mcsb.scrape_domain, mcsb.DOMAINS))
+
+    expected = {f"https://example.test/mcsb/mcsb-v2-{slug}" for _, slug, _ in mcsb.DOMAINS}
+    assert set(fetches) == expected
+    assert all(count == 1 for count in fetches.values())
+    assert len(results) == len(mcsb.DOMAINS)
+
+
+def test_single_fetch_feeds_pillars_and_controls(fetches):
+    controls, lines = mcsb.scrape_domain(("Network Security", "network-security", "NS"))
+
+    assert sum(fetches.values()) == 1
+    ids = [(c['Control ID'], c['Implementation ID'], c['Control Type']) for c in controls]
+    assert ids == [
+        ('NS-1', '', 'Parent'),
+        ('NS-1', 'NS-1.1', 'Child'),
+        ('NS-1', 'NS-1.2', 'Child'),
+        ('NS-2', '', 'Parent'),
+        ('NS-2', 'NS-2.1', 'Child'),
+    ]
+
+    ns1, ns1_1 = controls[0], controls[1]
+    # Core pillars y controles salen del mismo documento parseado
+    assert ns1['Core Pillar'] == 'Establish secure network boundaries'
+    assert ns1_1['Core Pillar'] == ns1['Core Pillar']
+    assert ns1['Criticality'] == 'Must have'
+    assert ns1['Security Principle'].startswith('Ensure that your virtual network')
+    assert ns1_1['Security Principle'] == ns1['Security Principle']
+    assert ns1_1['Azure Policy'] == [('Policy A', 'https://example.test/a')]
+    assert controls[3]['Criticality'] == 'Should have'
+    assert any('Total controles extraídos: 5' in line for line in lines)
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Stand-in de learn.microsoft.com: responde 429 con Retry-After las primeras N veces"""
+
+    throttled = 1
+    retry_after = '1'
+    requests_seen = []
+
+    def do_GET(self):
+        type(self).requests_seen.append(time.monotonic())
+        if len(self.requests_seen) <= self.throttled:
+            self.send_response(429)
+            self.send_header('Retry-After', self.retry_after)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<html><body><h1>ok</h1></body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    """Servidor HTTP local; devuelve (url base, handler) y desactiva el rate limit global"""
+    monkeypatch.setattr(mcsb, 'RATE_LIMITER', mcsb.TokenBucket(rate=0))
+    handler = type('Handler', (FlakyHandler,), {'requests_seen': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_session_retries_429_honouring_retry_after(stand_in):
+    base_url, handler = stand_in
+    session = mcsb.HttpSession(pool_size=1, retries=3, backoff_factor=0, timeout=5)
+
+    response = session.get(f"{base_url}/mcsb-v2-network-security")
+
+    assert response.status_code == 200
+    assert b'ok' in response.content
+    assert len(handler.requests_seen) == 2
+    # El reintento espera lo que pide Retry-After (backoff_factor=0 no añade nada)
+    assert handler.requests_seen[1] - handler.requests_seen[0] >= 0.9
+    [(url, status, elapsed, size, retries)] = session.metrics
+    assert url.endswith('/mcsb-v2-network-security')
+    assert (status, retries) == (200, 1)
+    assert elapsed >= 0.9
+    assert size == len(response.content)
+
+
+def test_http_session_counts_exhausted_retries(stand_in):
+    base_url, handler = stand_in
+    handler.throttled = 10
+    handler.retry_after = '0'
+    session = mcsb.HttpSession(pool_size=1, retries=2, backoff_factor=0, timeout=5)
+
+    with pytest.raises(requests.exceptions.RetryError):
+        session.get(f"{base_url}/mcsb-v2-network-security")
+
+    assert len(handler.requests_seen) == 3
+    [(_, status, _, _, retries)] = session.metrics
+    assert (status, retries) == ('error', 2)
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+        self.headers = {'ETag': f'"{hashlib.sha256(content).hexdigest()[:16]}"'}
+
+
+def test_http_cache_concurrent_stores_keep_their_blobs(tmp_path):
+    cache = mcsb.HttpCache(str(tmp_path / 'cache'))
+    urls = [f"https://example.test/mcsb/page-{i}" for i in range(200)]
+
+    def store(url):
+        cache._store(url, FakeResponse(f"<html>{url}</html>".encode('utf-8') * 50))
+
+    # Cada _store lanza una eviction que no debe llevarse blobs de otros hilos a medio guardar
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(store, urls))
+
+    for url in urls:
+        entry, body = cache._load(url)
+        assert entry is not None, url
+        assert body == f"<html>{url}</html>".encode('utf-8') * 50
+
+
+class SavedPagesHandler(BaseHTTPRequestHandler):
+    """Stand-in que sirve la página guardada para cada dominio (IDs con el prefijo del dominio)
+
+    Los primeros dominios responden más despacio para que terminen en otro orden que DOMAINS.
+    """
+
+    page = b''
+    gets = None
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.gets[self.path] += 1
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            slugs = [slug for _, slug, _ in mcsb.DOMAINS]
+            slug = self.path.rsplit('/mcsb-v2-', 1)[-1]
+            if slug == 'controls-policy-mapping':
+                body = (b'<html><body><h2>NS-1: Establish network segmentation boundaries</h2>'
+                        b'<table><tr><th>Policy</th></tr><tr><td><a href="https://example.test/p">'
+                        b'Subnets should have a network security group</a></td></tr></table></body></html>')
+            elif slug in slugs:
+                time.sleep(0.02 * (len(slugs) - slugs.index(slug)))
+                prefix = mcsb.DOMAINS[slugs.index(slug)][2]
+                body = self.page.replace(b'NS-', f"{prefix}-".encode('ascii'))
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def saved_pages_server(domain_page, monkeypatch):
+    # main() reasigna estos globales: monkeypatch los restaura al terminar
+    for name in ('BASE_URL', 'RATE_LIMITER', 'HTTP_CACHE', 'HTTP_SESSION'):
+        monkeypatch.setattr(mcsb, name, getattr(mcsb, name))
+    monkeypatch.setattr(mcsb, 'AZURE_POLICIES_CACHE', {})
+    monkeypatch.setattr(mcsb, 'CORE_PILLARS_CACHE', {})
+    handler = type('Handler', (SavedPagesHandler,), {'page': domain_page, 'gets': Counter(),
+                                                     'lock': threading.Lock()})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_main_scrapes_concurrently_with_deterministic_order(saved_pages_server, tmp_path, monkeypatch, capsys):
+    base_url, handler = saved_pages_server
+    output = tmp_path / 'mcsb_v2.xlsx'
+    monkeypatch.setattr('sys.argv', ['generate_mcsb_v2_hierarchical.py', '--base-url', f"{base_url}/",
+                                     '--workers', '4', '--rate', '0', '--no-cache', '--output', str(output)])
+
+    mcsb.main()
+
+    # Un GET por dominio (más la página de policies) y varios dominios a la vez
+    expected = {f"/mcsb-v2-{slug}" for _, slug, _ in mcsb.DOMAINS} | {'/mcsb-v2-controls-policy-mapping'}
+    assert set(handler.gets) == expected
+    assert all(count == 1 for count in handler.gets.values())
+    assert handler.max_in_flight > 1
+
+    # La salida por dominio se imprime en el orden de DOMAINS aunque terminen en otro orden
+    out = capsys.readouterr().out
+    positions = [out.index(f"Procesando: {name} (") for name, _, _ in mcsb.DOMAINS]
+    assert positions == sorted(positions)
+
+    wb = openpyxl.load_workbook(output, read_only=True)
+    assert wb.sheetnames == ['Readme'] + sorted(name[:31] for name, _, _ in mcsb.DOMAINS)
+    for name, _, prefix in mcsb.DOMAINS:
+        rows = list(wb[name[:31]].iter_rows(min_row=2, max_col=2, values_only=True))
+        assert rows == [(f"{prefix}-1", None), (f"{prefix}-1", f"{prefix}-1.1"), (f"{prefix}-1", f"{prefix}-1.2"),
+                        (f"{prefix}-2", None), (f"{prefix}-2", f"{prefix}-2.1")]
+    ns1 = next(wb['Network Security'].iter_rows(min_row=2, max_row=2, values_only=True))
+    assert 'Subnets should have a network security group' in ns1[mcsb.EXCEL_HEADERS.index('Azure Policy')]
+    wb.close()
+
+
+def test_token_bucket_limits_rate_after_burst():
+    bucket = mcsb.TokenBucket(rate=20, capacity=3)
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    burst = time.monotonic() - start
+    for _ in range(4):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    assert burst < 0.05  # La ráfaga no espera
+    assert elapsed >= 4 / 20 * 0.9  # Después, un token cada 1/rate segundos
+
+
+def test_token_bucket_is_shared_between_threads():
+    bucket = mcsb.TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: bucket.acquire(), range(11)))
+    # 1 inmediato + 10 a 50/s, repartidos entre hilos
+    assert time.monotonic() - start >= 10 / 50 * 0.9
+
+
+def test_token_bucket_rate_zero_disables_limit():
+    bucket = mcsb.TokenBucket(rate=0)
+    start = time.monotonic()
+    for _ in range(1000):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.1
+
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    """Stand-in con ETag/Last-Modified: 304 si el cliente ya tiene la versión actual"""
+
+    bodies = {}  # {ruta: cuerpo}; cambiar el cuerpo cambia el ETag
+    seen = None  # [(ruta, If-None-Match, If-Modified-Since, status)]
+
+    def do_GET(self):
+        body = self.bodies.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        last_modified = 'Wed, 01 Oct 2025 10:00:00 GMT'
+        status = 304 if self.headers.get('If-None-Match') == etag else 200
+        self.seen.append((self.path, self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since'), status))
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        if status == 304:
+            self.end_headers()
+            return
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def conditional_server(monkeypatch):
+    monkeypatch.setattr(mcsb, 'RATE_LIMITER', mcsb.TokenBucket(rate=0))
+    monkeypatch.setattr(mcsb, 'HTTP_SESSION', mcsb.HttpSession(pool_size=2, retries=0, timeout=5))
+    handler = type('Handler', (ConditionalHandler,), {'bodies': {}, 'seen': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_cache_revalidates_with_conditional_headers(conditional_server, tmp_path):
+    base_url, handler = conditional_server
+    handler.bodies['/mcsb-v2-network-security'] = b'<html>v1</html>'
+    url = f"{base_url}/mcsb-v2-network-security"
+    cache = mcsb.HttpCache(str(tmp_path / 'cache'))
+
+    assert cache.get(url) == b'<html>v1</html>'
+    assert cache.get(url) == b'<html>v1</html>'  # 304: cuerpo desde la cache
+    handler.bodies['/mcsb-v2-network-security'] = b'<html>v2</html>'
+    assert cache.get(url) == b'<html>v2</html>'  # ETag distinto: se descarga y se guarda
+    assert cache.get(url) == b'<html>v2</html>'
+
+    first_etag = f'"{hashlib.sha256(b"<html>v1</html>").hexdigest()[:16]}"'
+    second_etag = f'"{hashlib.sha256(b"<html>v2</html>").hexdigest()[:16]}"'
+    modified = 'Wed, 01 Oct 2025 10:00:00 GMT'
+    assert [entry[1:] for entry in handler.seen] == [
+        (None, None, 200),
+        (first_etag, modified, 304),
+        (first_etag, modified, 200),
+        (second_etag, modified, 304),
+    ]
+    # Las peticiones 304 no descargan cuerpo
+    assert [size for _, status, _, size, _ in mcsb.HTTP_SESSION.metrics if status == 304] == [0, 0]
+
+
+def test_http_cache_offline_replays_without_network(conditional_server, tmp_path):
+    base_url, handler = conditional_server
+    handler.bodies['/mcsb-v2-network-security'] = b'<html>saved</html>'
+    url = f"{base_url}/mcsb-v2-network-security"
+    mcsb.HttpCache(str(tmp_path / 'cache')).get(url)
+    requests_online = len(handler.seen)
+
+    offline = mcsb.HttpCache(str(tmp_path / 'cache'), offline=True)
+    assert offline.get(url) == b'<html>saved</html>'
+    assert len(handler.seen) == requests_online  # Sin acceso al servidor
+
+    with pytest.raises(RuntimeError, match='no está en cache'):
+        offline.get(f"{base_url}/mcsb-v2-identity-management")
+    assert len(handler.seen) == requests_online
+
+
+def test_http_cache_evicts_least_recently_used_over_limit(conditional_server, tmp_path):
+    base_url, handler = conditional_server
+    for name in 'abcd':
+        handler.bodies[f"/{name}"] = name.encode('ascii') * 1000
+    cache = mcsb.HttpCache(str(tmp_path / 'cache'), max_bytes=2500)
+
+    def cached():
+        return {name for name in 'abcd' if cache._load(f"{base_url}/{name}")[0] is not None}
+
+    for name in 'abc':
+        cache.get(f"{base_url}/{name}")
+        time.sleep(0.02)  # mtimes distintos para el orden LRU
+    assert {name for name in 'abc' if os.path.exists(cache._entry_path(f"{base_url}/{name}"))} == {'b', 'c'}
+
+    # Usar b la convierte en la más reciente: la siguiente expulsión se lleva c
+    time.sleep(0.02)
+    assert cache.get(f"{base_url}/b") == b'b' * 1000
+    time.sleep(0.02)
+    cache.get(f"{base_url}/d")
+    assert cached() == {'b', 'd'}
+    blobs = os.listdir(os.path.join(str(tmp_path / 'cache'), 'blobs'))
+    assert len(blobs) == 2
+    assert sum(os.path.getsize(os.path.join(str(tmp_path / 'cache'), 'blobs', blob)) for blob in blobs) <= 2500
@@ -0,0 +1,69 @@
+"""Tests del manifest de salidas de mcsb_hook_utils.py"""
+
+import json
+import os
+
+import pytest
+
+import mcsb_hook_utils as utils
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Workbook origen y dos salidas generadas, con el manifest en un directorio temporal"""
+    monkeypatch.setattr(utils, 'MANIFEST_DIRECTORY', str(tmp_path / 'manifest'))
+    source = tmp_path / 'workbook.xlsx'
+    source.write_bytes(b'workbook v1')
+    outputs = [tmp_path / 'NS.md', tmp_path / 'NS.xlsx']
+    outputs[0].write_text('| Control ID |\n|---|\n| NS-1 |\n', encoding='utf-8')
+    outputs[1].write_bytes(b'split sheet')
+    utils.write_manifest('test', str(source), '3-static', [str(path) for path in outputs])
+    return source, outputs
+
+
+def test_unchanged_outputs_are_up_to_date(workspace):
+    source, _ = workspace
+    assert utils.is_up_to_date('test', str(source), '3-static')
+    assert not utils.is_up_to_date('test', str(source), '4-static')
+
+
+def test_stale_output_with_restored_manifest_is_not_up_to_date(workspace):
+    # CI: manifest de la cache + página del checkout de otra generación (mismo tamaño incluso)
+    source, outputs = workspace
+    outputs[0].write_text('| Control ID |\n|---|\n| NS-0 |\n', encoding='utf-8')
+    os.utime(outputs[0], ns=(1, 1))
+    assert not utils.is_up_to_date('test', str(source), '3-static')
+
+
+def test_missing_output_is_not_up_to_date(workspace):
+    source, outputs = workspace
+    outputs[1].unlink()
+    assert not utils.is_up_to_date('test', str(source), '3-static')
+
+
+def test_same_content_with_new_mtime_refreshes_manifest(workspace):
+    # Checkout o descarga repetida: cambia el mtime pero no el contenido
+    source, outputs = workspace
+    for path in [source] + outputs:
+        os.utime(path, ns=(10**18, 10**18))
+
+    assert utils.is_up_to_date('test', str(source), '3-static')
+    manifest = utils.load_manifest('test')
+    assert manifest['source_mtime_ns'] == 10**18
+    assert all(state['mtime_ns'] == 10**18 for state in manifest['outputs'].values())
+
+
+def test_changed_source_is_not_up_to_date(workspace):
+    source, _ = workspace
+    source.write_bytes(b'workbook v2')
+    assert not utils.is_up_to_date('test', str(source), '3-static')
+
+
+def test_manifest_with_output_paths_only_is_not_up_to_date(workspace):
+    # Formato anterior: solo rutas, sin forma de comprobar el contenido
+    source, outputs = workspace
+    manifest = utils.load_manifest('test')
+    manifest['outputs'] = sorted(str(path) for path in outputs)
+    with open(utils.manifest_path('test'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    assert not utils.is_up_to_date('test', str(source), '3-static')
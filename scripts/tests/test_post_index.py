@@ -0,0 +1,152 @@
+"""Tests de post_index.py: índice de páginas y ExternalLinkChecker contra un servidor local"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import post_index
+import post_validator as pv
+
+
+def test_index_page_keeps_pages_with_unparseable_frontmatter(tmp_path):
+    page = tmp_path / 'bad.md'
+    page.write_text('---\ndate: 2025-02-30\ntags: [a, {b: c}]\n---\n\n# Mala\n\n## Sección\n', encoding='utf-8')
+
+    entry = post_index.index_page(page)
+
+    assert entry['title'] == 'Mala'
+    assert entry['date'] is None and entry['tags'] == []
+    assert entry['anchors'] == ['mala', 'seccion']
+    assert entry['error']['rule'] == pv.LOAD_RULE_ID
+    assert 'day is out of range' in entry['error']['message']
+
+
+class LinkHandler(BaseHTTPRequestHandler):
+    """Stand-in de sitios enlazados: 200, 404, sin HEAD, 429 con Retry-After y respuestas lentas"""
+
+    seen = []  # (método, ruta, momento, User-Agent)
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def _respond(self):
+        cls = type(self)
+        with cls.lock:
+            cls.seen.append((self.command, self.path, time.monotonic(), self.headers['User-Agent']))
+            earlier = sum(1 for _, path, _, _ in cls.seen if path == self.path) - 1
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            if self.path.startswith('/slow/'):
+                time.sleep(0.2)
+            headers = {}
+            if self.path == '/missing':
+                status = 404
+            elif self.path == '/no-head':
+                status = 405 if self.command == 'HEAD' else 200
+            elif self.path == '/limited' and not earlier:
+                status, headers = 429, {'Retry-After': '1'}
+            elif self.path == '/throttled':
+                status, headers = 429, {'Retry-After': '120'}
+            else:
+                status = 200
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    do_HEAD = do_GET = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def link_server():
+    handler = type('Handler', (LinkHandler,), {'seen': [], 'lock': threading.Lock()})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", handler
+    server.shutdown()
+    server.server_close()
+
+
+def requests_for(handler, path):
+    return [(method, at) for method, seen_path, at, _ in handler.seen if seen_path == path]
+
+
+def test_external_link_checker_statuses(link_server, tmp_path):
+    base_url, handler = link_server
+    checker = post_index.ExternalLinkChecker(str(tmp_path / 'links.sqlite'), timeout=5)
+
+    results = checker.check([f"{base_url}/ok", f"{base_url}/missing", f"{base_url}/no-head", f"{base_url}/limited"])
+    checker.close()
+
+    assert results == {
+        f"{base_url}/ok": (200, None),
+        f"{base_url}/missing": (404, None),
+        f"{base_url}/no-head": (200, None),  # HEAD 405 -> GET
+        f"{base_url}/limited": (200, None),  # 429 -> espera Retry-After y repite
+    }
+    assert [method for method, _ in requests_for(handler, '/ok')] == ['HEAD']
+    assert [method for method, _ in requests_for(handler, '/no-head')] == ['HEAD', 'GET']
+    (_, first), (_, second) = requests_for(handler, '/limited')
+    assert second - first >= 0.9
+    assert {agent for *_, agent in handler.seen} == {post_index.ExternalLinkChecker.USER_AGENT}
+
+
+def test_external_link_checker_does_not_wait_long_retry_after(link_server, tmp_path):
+    base_url, handler = link_server
+    checker = post_index.ExternalLinkChecker(str(tmp_path / 'links.sqlite'), timeout=5)
+
+    start = time.monotonic()
+    assert checker.check([f"{base_url}/throttled"]) == {f"{base_url}/throttled": (429, None)}
+    checker.close()
+
+    assert time.monotonic() - start < 2
+    assert len(requests_for(handler, '/throttled')) == 1
+
+
+def test_external_link_checker_limits_requests_per_host(link_server, tmp_path):
+    base_url, handler = link_server
+    checker = post_index.ExternalLinkChecker(str(tmp_path / 'links.sqlite'), timeout=5, concurrency=8, per_host=2)
+
+    urls = [f"{base_url}/slow/{n}" for n in range(6)]
+    start = time.monotonic()
+    results = checker.check(urls)
+    checker.close()
+
+    assert results == {url: (200, None) for url in urls}
+    assert handler.max_in_flight == 2
+    assert time.monotonic() - start >= 0.55  # 6 peticiones de 0,2 s de 2 en 2
+
+
+def test_external_link_checker_reuses_results_within_ttl(link_server, tmp_path):
+    base_url, handler = link_server
+    db_path = str(tmp_path / 'links.sqlite')
+    urls = [f"{base_url}/ok", f"{base_url}/missing", f"{base_url}/throttled"]
+
+    first = post_index.ExternalLinkChecker(db_path, ttl=3600, timeout=5)
+    expected = first.check(urls)
+    first.close()
+    assert (first.checked, first.cached) == (3, 0)
+
+    # Segunda ejecución: solo se vuelve a pedir el 429 (no se guarda)
+    second = post_index.ExternalLinkChecker(db_path, ttl=3600, timeout=5)
+    assert second.check(urls) == expected
+    second.close()
+    assert (second.checked, second.cached) == (1, 2)
+    assert [len(requests_for(handler, path)) for path in ('/ok', '/missing', '/throttled')] == [1, 1, 2]
+
+    # Resultados más antiguos que el TTL o --no-cache: se piden todas
+    for checker in (post_index.ExternalLinkChecker(db_path, ttl=0, timeout=5),
+                    post_index.ExternalLinkChecker(db_path, ttl=3600, timeout=5, refresh=True)):
+        assert checker.check(urls) == expected
+        checker.close()
+        assert (checker.checked, checker.cached) == (3, 0)
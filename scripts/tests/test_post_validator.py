@@ -0,0 +1,23 @@
+"""Tests de post_validator.py con el índice del sitio (hallazgos combinados)"""
+
+from pathlib import Path
+
+import post_index
+import post_validator as pv
+
+
+def test_site_index_reports_load_error_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'docs').mkdir()
+    page = tmp_path / 'docs' / 'bad.md'
+    page.write_text('---\ndate: 2025-02-30\ntags: [a, {b: c}]\n---\n\n# Mala\n', encoding='utf-8')
+    config = pv.RuleConfig(set(), set(), {})
+
+    index = post_index.SiteIndex()
+    index.refresh()
+    index.check(config)
+    _, findings, _ = pv.validate_file(Path('docs/bad.md'), config)
+    merged = index.findings_for(Path('docs/bad.md'), findings)
+    index.close()
+
+    assert [finding['rule'] for finding in merged].count(pv.LOAD_RULE_ID) == 1